@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# Compara os modelos de previsão (Prophet, ETS do statsmodels e tendência linear em NumPy) nos cinco
+# indicadores: tempo de importação de cada biblioteca (em um processo novo) e tempo de ajuste + previsão.
+#
+# Uso: python benchmarks/bench_forecast_engines.py [--source synthetic|local|db] [--periods 365] [--repeat 3]
+import argparse
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import forecasting
+
+# Módulo importado por cada modelo na primeira previsão
+ENGINE_IMPORTS = {
+    "prophet": "prophet",
+    "ets": "statsmodels.tsa.exponential_smoothing.ets",
+    "drift": "numpy",
+}
+
+# Séries sintéticas com a frequência e o tamanho de histórico de cada indicador
+SYNTHETIC_SPECS = {
+    "Selic": ("D", "2020-01-01", 5 * 365),
+    "IPCA": ("MS", "1995-01-01", 30 * 12),
+    "Câmbio": ("B", "2020-01-01", 5 * 261),
+    "Desemprego": ("MS", "2012-03-01", 13 * 12),
+    "PIB": ("QS", "1996-01-01", 29 * 4),
+}
+
+def make_synthetic_frames():
+    """Gera passeios aleatórios com tendência no formato do Prophet (ds, y) para os cinco indicadores."""
+    rng = np.random.default_rng(42)
+    frames = {}
+    for name, (freq, start, n_points) in SYNTHETIC_SPECS.items():
+        ds = pd.date_range(start, periods=n_points, freq=freq)
+        y = 100 + np.cumsum(rng.normal(0.05, 1.0, n_points))
+        frames[name] = pd.DataFrame({"ds": ds, "y": y})
+    return frames
+
+def measure_import_time(module):
+    """Tempo de importação de um módulo em um interpretador novo (sem cache de módulos do processo atual)."""
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if completed.returncode != 0:
+        return None
+    return float(completed.stdout.strip().splitlines()[-1])
+
+def time_engine(engine, df_prophet, periods, repeat):
+    """Melhor tempo (s) de ajuste + previsão em repeat execuções, com a saída dos modelos suprimida."""
+    best = float("inf")
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            start_time = time.perf_counter()
+            forecasting.fit_and_predict(df_prophet, periods, engine)
+            best = min(best, time.perf_counter() - start_time)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara o custo dos modelos de previsão nos cinco indicadores.")
+    parser.add_argument("--source", choices=["synthetic", "local", "db"], default="synthetic")
+    parser.add_argument("--periods", type=int, default=forecasting.DEFAULT_FORECAST_PERIODS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--engines", nargs="+", default=list(forecasting.ENGINE_FUNCTIONS.keys()), choices=list(forecasting.ENGINE_FUNCTIONS.keys()))
+    args = parser.parse_args()
+
+    if args.source == "synthetic":
+        frames = make_synthetic_frames()
+    else:
+        frames = forecasting.load_indicator_frames(args.source)
+    if not frames:
+        print("Nenhuma série disponível.")
+        return
+
+    print("Tempo de importação (processo novo):")
+    available = []
+    for engine in args.engines:
+        import_time = measure_import_time(ENGINE_IMPORTS[engine])
+        if import_time is None:
+            print(f"  {engine:<8} indisponível (módulo {ENGINE_IMPORTS[engine]} não instalado)")
+            continue
+        available.append(engine)
+        print(f"  {engine:<8} {import_time:7.3f}s")
+
+    print(f"\nAjuste + previsão de {args.periods} dias (melhor de {args.repeat} execuções):")
+    print(f"  {'indicador':<12} {'pontos':>7}" + "".join(f"  {engine:>9}" for engine in available))
+    totals = dict.fromkeys(available, 0.0)
+    for name, df_prophet in frames.items():
+        timings = []
+        for engine in available:
+            elapsed = time_engine(engine, df_prophet, args.periods, args.repeat)
+            totals[engine] += elapsed
+            timings.append(elapsed)
+        print(f"  {name:<12} {len(df_prophet):>7}" + "".join(f"  {elapsed:8.3f}s" for elapsed in timings))
+    print(f"  {'total':<12} {'':>7}" + "".join(f"  {totals[engine]:8.3f}s" for engine in available))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+# Mede o custo de inicialização do dashboard:
+#   - tempo de importação dos módulos de topo do streamlit_app.py, em um interpretador novo;
+#   - tempo até os primeiros cartões (registrado pelo próprio app em st.session_state) e da execução
+#     completa do script, com o AppTest do Streamlit e séries sintéticas locais (DATA_SOURCE=local).
+#
+# Uso: python benchmarks/bench_startup.py [--rows 2000] [--output resultados_startup.json]
+import argparse
+import ast
+import datetime
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(REPO_ROOT, "streamlit_app.py")
+sys.path.insert(0, REPO_ROOT)
+
+import series_registry
+
+# Módulos que não devem ser importados na abertura do dashboard
+HEAVY_MODULES = ["prophet", "plotly", "psycopg2", "statsmodels"]
+
+# Séries exibidas no dashboard (series_registry.json)
+SERIES_NAMES = [entry["id"] for entry in series_registry.dashboard_series()]
+
+def top_level_imports(path):
+    """Lista os módulos importados no nível de topo de um script."""
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            modules.append(node.module)
+    return modules
+
+def measure_import_time(modules):
+    """Tempo para importar os módulos em um interpretador novo (executado a partir da raiz do repositório)."""
+    code = (
+        "import time; t = time.perf_counter()\n"
+        + "".join(f"import {module}\n" for module in modules)
+        + "print(time.perf_counter() - t)"
+    )
+    completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=REPO_ROOT)
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip())
+    return float(completed.stdout.strip().splitlines()[-1])
+
+def write_synthetic_store(n_rows):
+    """Grava séries sintéticas no armazenamento colunar local (diretório atual)."""
+    import columnar_store
+
+    start = datetime.date.today() - datetime.timedelta(days=n_rows)
+    for offset, series_name in enumerate(SERIES_NAMES):
+        records = [
+            {"data_referencia": (start + datetime.timedelta(days=i)).isoformat(), "valor": 10.0 + offset + (i % 30) / 10}
+            for i in range(n_rows)
+        ]
+        columnar_store.write_table(series_name, columnar_store.records_to_table(records))
+
+def measure_app_run(n_rows, timeout):
+    """Executa o app com o AppTest e devolve (tempo até os cartões, tempo total, módulos pesados carregados)."""
+    from streamlit.testing.v1 import AppTest
+
+    os.environ["DATA_SOURCE"] = "local"
+    os.environ["FORECAST_PREWARM"] = "0"
+    with tempfile.TemporaryDirectory() as work_dir:
+        previous_dir = os.getcwd()
+        os.chdir(work_dir)
+        try:
+            write_synthetic_store(n_rows)
+            loaded_before = set(sys.modules)
+            app = AppTest.from_file(APP_PATH, default_timeout=timeout)
+            start_time = time.perf_counter()
+            app.run()
+            full_run = time.perf_counter() - start_time
+        finally:
+            os.chdir(previous_dir)
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+    loaded = {name.split(".")[0] for name in set(sys.modules) - loaded_before}
+    return app.session_state["tempo_primeira_renderizacao_s"], full_run, sorted(loaded & set(HEAVY_MODULES))
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede o tempo de importação e de primeira renderização do dashboard.")
+    parser.add_argument("--rows", type=int, default=2000, help="Pontos por série sintética.")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--output", help="Arquivo JSON para gravar os resultados (ex.: artefato do CI).")
+    args = parser.parse_args()
+
+    modules = top_level_imports(APP_PATH)
+    import_time = measure_import_time(modules)
+    eager_heavy = sorted({module.split(".")[0] for module in modules} & set(HEAVY_MODULES))
+    print(f"Importações de topo ({len(modules)} módulos): {import_time:.3f}s")
+    if eager_heavy:
+        print(f"  Atenção: módulos pesados importados no topo: {', '.join(eager_heavy)}")
+
+    first_render, full_run, loaded_heavy = measure_app_run(args.rows, args.timeout)
+    print(f"Tempo até os cartões de últimos valores: {first_render:.3f}s")
+    print(f"Execução completa do script: {full_run:.3f}s")
+    print(f"Módulos pesados carregados na execução: {', '.join(loaded_heavy) or 'nenhum'}")
+
+    if args.output:
+        results = {
+            "data": datetime.datetime.now().isoformat(timespec="seconds"),
+            "importacao_topo_s": import_time,
+            "primeira_renderizacao_s": first_render,
+            "execucao_completa_s": full_run,
+            "modulos_pesados_no_topo": eager_heavy,
+            "modulos_pesados_carregados": loaded_heavy,
+            "linhas_por_serie": args.rows,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4, ensure_ascii=False)
+        print(f"Resultados gravados em {args.output}.")
+
+if __name__ == "__main__":
+    main()
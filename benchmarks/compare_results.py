@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+# Compara dois resultados de benchmarks/bench_pipeline.py (ex.: branch principal x pull request):
+# para cada etapa e tamanho presentes nos dois arquivos, mostra a variação do tempo e do pico de RSS
+# e destaca as regressões acima do limite.
+#
+# Uso: python benchmarks/compare_results.py base.json novo.json [--threshold 0.10] [--fail]
+import argparse
+import json
+import sys
+
+def load_results(path):
+    """Resultados de um arquivo, indexados por (etapa, linhas)."""
+    with open(path, "r", encoding="utf-8") as f:
+        return {(run["etapa"], run["linhas"]): run for run in json.load(f)["resultados"]}
+
+def relative_change(base, new):
+    return (new - base) / base if base else 0.0
+
+def compare(base, new, threshold):
+    """Linhas da comparação (etapa, linhas, tempos, RSS, variações) e a lista de regressões de tempo."""
+    rows, regressions = [], []
+    for key in sorted(base.keys() & new.keys()):
+        time_change = relative_change(base[key]["segundos"], new[key]["segundos"])
+        rss_change = relative_change(base[key]["pico_rss_mb"], new[key]["pico_rss_mb"])
+        rows.append((*key, base[key]["segundos"], new[key]["segundos"], time_change, rss_change))
+        if time_change > threshold:
+            regressions.append(key)
+    return rows, regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara dois resultados do benchmark do pipeline.")
+    parser.add_argument("base")
+    parser.add_argument("novo")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Aumento relativo de tempo considerado regressão.")
+    parser.add_argument("--fail", action="store_true", help="Termina com código 1 se houver regressões.")
+    args = parser.parse_args()
+
+    base, new = load_results(args.base), load_results(args.novo)
+    rows, regressions = compare(base, new, args.threshold)
+    print(f"{'etapa':<26} {'linhas':>10} {'base (s)':>10} {'novo (s)':>10} {'tempo':>8} {'RSS':>8}")
+    for stage, n_rows, base_time, new_time, time_change, rss_change in rows:
+        marker = "  <- regressão" if (stage, n_rows) in regressions else ""
+        print(f"{stage:<26} {n_rows:>10} {base_time:10.4f} {new_time:10.4f} {time_change:+8.1%} {rss_change:+8.1%}{marker}")
+    for key in sorted(new.keys() - base.keys()):
+        print(f"{key[0]:<26} {key[1]:>10}  (sem resultado na base)")
+
+    print(f"\n{len(regressions)} regressão(ões) acima de {args.threshold:.0%} em {len(rows)} comparações.")
+    if regressions and args.fail:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+-- models/intermediate/int_indicadores_long.sql
+-- Indicadores de staging em formato longo (indicador, data_referencia, valor), um por série do registro.
+
+{{ config(materialized='ephemeral') }}
+
+select
+    indicador,
+    data_referencia,
+    valor
+
+from {{ ref('stg_valores_series') }}
@@ -0,0 +1,86 @@
+-- models/marts/mart_indicadores_anual.sql
+-- Agregados anuais por indicador. Incremental: reprocessa, por indicador, o último ano materializado
+-- e o anterior (var mart_lookback_years), que ainda recebe dados atrasados no início do ano
+-- (IPCA de dezembro, valor anual do World Bank), ou mais, se a janela de revisão da série no
+-- catálogo (janela_revisao_dias) for maior.
+
+{{
+    config(
+        materialized='incremental',
+        incremental_strategy='delete+insert',
+        unique_key=['indicador', 'ano'],
+        indexes=[
+            {'columns': ['indicador', 'ano'], 'unique': True},
+            {'columns': ['ano']}
+        ]
+    )
+}}
+
+with
+
+{% if is_incremental() %}
+marcas as (
+
+    -- Último ano materializado de cada indicador
+    select indicador, max(ano) as ultimo_ano
+    from {{ this }}
+    group by indicador
+
+),
+
+janelas as (
+
+    -- Janela de revisão do registro (janela_revisao_dias), a mesma usada na staging
+    select indicador, max(janela_revisao_dias) as janela_revisao_dias
+    from {{ source('public', 'catalogo_series') }}
+    group by indicador
+
+),
+{% endif %}
+
+indicadores as (
+
+    select longo.*
+    from {{ ref('int_indicadores_long') }} as longo
+
+    {% if is_incremental() %}
+    left join marcas on marcas.indicador = longo.indicador
+    left join janelas on janelas.indicador = longo.indicador
+    where marcas.ultimo_ano is null
+        or longo.data_referencia >= least(
+            make_date(marcas.ultimo_ano - {{ var("mart_lookback_years", 1) }}, 1, 1),
+            date_trunc('year', make_date(marcas.ultimo_ano, 1, 1)
+                - make_interval(days => coalesce(janelas.janela_revisao_dias, 0)))::date
+        )
+    {% endif %}
+
+),
+
+ordenados as (
+
+    select
+        indicador,
+        extract(year from data_referencia)::int as ano,
+        data_referencia,
+        valor,
+        row_number() over (
+            partition by indicador, extract(year from data_referencia)
+            order by data_referencia desc
+        ) as posicao_desc
+
+    from indicadores
+
+)
+
+select
+    indicador,
+    ano,
+    avg(valor) as valor_medio,
+    min(valor) as valor_minimo,
+    max(valor) as valor_maximo,
+    max(case when posicao_desc = 1 then valor end) as valor_fim_periodo,
+    max(data_referencia) as ultima_data_referencia,
+    count(*) as observacoes
+
+from ordenados
+group by indicador, ano
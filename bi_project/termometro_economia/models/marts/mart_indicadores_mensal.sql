@@ -0,0 +1,89 @@
+-- models/marts/mart_indicadores_mensal.sql
+-- Agregados mensais por indicador. Incremental: reprocessa, por indicador, apenas os meses a partir
+-- do último mês já materializado do indicador menos a maior entre mart_lookback_months e a janela
+-- de revisão da série no catálogo (janela_revisao_dias), pois o mês corrente e as revisões ainda
+-- podem mudar. processado_em marca as linhas reprocessadas, para o painel mensal.
+
+{{
+    config(
+        materialized='incremental',
+        incremental_strategy='delete+insert',
+        unique_key=['indicador', 'mes'],
+        on_schema_change='append_new_columns',
+        indexes=[
+            {'columns': ['indicador', 'mes'], 'unique': True},
+            {'columns': ['mes']}
+        ]
+    )
+}}
+
+with
+
+{% if is_incremental() %}
+marcas as (
+
+    -- Último mês materializado de cada indicador: séries que param antes das demais (PIB, World Bank)
+    -- não ficam para trás quando as séries diárias já estão no mês seguinte
+    select indicador, max(mes) as ultimo_mes
+    from {{ this }}
+    group by indicador
+
+),
+
+janelas as (
+
+    -- Janela de revisão do registro (janela_revisao_dias), a mesma usada na staging
+    select indicador, max(janela_revisao_dias) as janela_revisao_dias
+    from {{ source('public', 'catalogo_series') }}
+    group by indicador
+
+),
+{% endif %}
+
+indicadores as (
+
+    select longo.*
+    from {{ ref('int_indicadores_long') }} as longo
+
+    {% if is_incremental() %}
+    left join marcas on marcas.indicador = longo.indicador
+    left join janelas on janelas.indicador = longo.indicador
+    where marcas.ultimo_mes is null
+        or longo.data_referencia >= date_trunc('month', marcas.ultimo_mes - greatest(
+            interval '{{ var("mart_lookback_months", 3) }} months',
+            make_interval(days => coalesce(janelas.janela_revisao_dias, 0))
+        ))::date
+    {% endif %}
+
+),
+
+ordenados as (
+
+    select
+        indicador,
+        date_trunc('month', data_referencia)::date as mes,
+        data_referencia,
+        valor,
+        row_number() over (
+            partition by indicador, date_trunc('month', data_referencia)
+            order by data_referencia desc
+        ) as posicao_desc
+
+    from indicadores
+
+)
+
+select
+    indicador,
+    mes,
+    extract(year from mes)::int as ano,
+    avg(valor) as valor_medio,
+    min(valor) as valor_minimo,
+    max(valor) as valor_maximo,
+    max(case when posicao_desc = 1 then valor end) as valor_fim_periodo,
+    max(data_referencia) as ultima_data_referencia,
+    count(*) as observacoes,
+    current_timestamp as processado_em
+
+from ordenados
+group by indicador, mes
@@ -0,0 +1,56 @@
+-- models/marts/mart_painel_indicadores.sql
+-- Painel largo, alinhado por mês, com o valor de fim de período de cada indicador exibido no
+-- dashboard. As colunas vêm do catálogo (catalogo_series, na ordem do registro): um indicador novo
+-- vira uma coluna nova, acrescentada à tabela já materializada.
+-- Incremental: refaz os meses que a mart mensal reprocessou (processado_em), qualquer que seja o indicador.
+-- O PIB é trimestral: o valor aparece apenas no último mês de cada trimestre.
+
+{% set indicadores_query %}
+select indicador from {{ source('public', 'catalogo_series') }} where dashboard order by ordem
+{% endset %}
+
+{% if execute %}
+    {% set indicadores = run_query(indicadores_query).columns[0].values() %}
+{% else %}
+    {% set indicadores = [] %}
+{% endif %}
+
+{{
+    config(
+        materialized='incremental',
+        incremental_strategy='delete+insert',
+        unique_key='mes',
+        on_schema_change='append_new_columns',
+        indexes=[
+            {'columns': ['mes'], 'unique': True},
+            {'columns': ['ano']}
+        ]
+    )
+}}
+
+with mensal as (
+
+    select * from {{ ref('mart_indicadores_mensal') }}
+
+    {% if is_incremental() %}
+    -- Meses com alguma linha reprocessada pela mart mensal desde a última execução do painel
+    where mes in (
+        select mes from {{ ref('mart_indicadores_mensal') }}
+        where processado_em > (
+            select coalesce(max(processado_em), '-infinity'::timestamptz) from {{ this }}
+        )
+    )
+    {% endif %}
+
+)
+
+select
+    mes,
+    extract(year from mes)::int as ano
+    {%- for indicador in indicadores %},
+    max(case when indicador = '{{ indicador }}' then valor_fim_periodo end) as {{ indicador }}
+    {%- endfor %},
+    max(processado_em) as processado_em
+
+from mensal
+group by mes
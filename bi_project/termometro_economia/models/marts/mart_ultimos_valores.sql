@@ -0,0 +1,31 @@
+-- models/marts/mart_ultimos_valores.sql
+-- Último valor registrado de cada indicador (uma linha por indicador), para os cartões do dashboard.
+
+{{
+    config(
+        materialized='table',
+        indexes=[
+            {'columns': ['indicador'], 'unique': True}
+        ]
+    )
+}}
+
+with ultimos_meses as (
+
+    select
+        indicador,
+        ultima_data_referencia,
+        valor_fim_periodo,
+        row_number() over (partition by indicador order by mes desc) as posicao_desc
+
+    from {{ ref('mart_indicadores_mensal') }}
+
+)
+
+select
+    indicador,
+    ultima_data_referencia as data_referencia,
+    valor_fim_periodo as valor
+
+from ultimos_meses
+where posicao_desc = 1
@@ -0,0 +1,67 @@
+-- models/staging/stg_valores_series.sql
+-- Valores de todas as séries do registro (series_registry.json) em formato longo, com o indicador do
+-- catálogo. Incremental: a cada dbt run processa, por série, apenas as datas a partir da última já
+-- materializada menos a janela de revisão da série (janela_revisao_dias no registro; as Contas
+-- Nacionais revisam vários trimestres anteriores, então a janela do PIB é maior).
+
+{{
+    config(
+        materialized='incremental',
+        incremental_strategy='delete+insert',
+        unique_key=['series_id', 'data_referencia'],
+        indexes=[
+            {'columns': ['series_id', 'data_referencia'], 'unique': True},
+            {'columns': ['indicador', 'data_referencia']}
+        ]
+    )
+}}
+
+with catalogo as (
+
+    select series_id, indicador, janela_revisao_dias
+    from {{ source('public', 'catalogo_series') }}
+
+),
+
+{% if is_incremental() %}
+ultimas_datas as (
+
+    select series_id, max(data_referencia) as ultima_data
+    from {{ this }}
+    group by series_id
+
+),
+{% endif %}
+
+source as (
+
+    select
+        valores.series_id,
+        catalogo.indicador,
+        valores.data,
+        valores.valor
+
+    from {{ source('public', 'valores_series') }} as valores
+    inner join catalogo on catalogo.series_id = valores.series_id
+
+    {% if is_incremental() %}
+    left join ultimas_datas on ultimas_datas.series_id = valores.series_id
+    where ultimas_datas.ultima_data is null
+        or valores.data >= ultimas_datas.ultima_data - make_interval(days => catalogo.janela_revisao_dias)
+    {% endif %}
+
+),
+
+renamed as (
+
+    select
+        series_id,
+        indicador,
+        data as data_referencia,
+        valor
+
+    from source
+
+)
+
+select * from renamed
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+# Armazenamento colunar local das séries (Arrow IPC), uma partição (arquivo) por série.
+# Cada arquivo tem uma coluna "data" (date32) e uma coluna "valor" (float64), ordenadas por data.
+# Os arquivos podem ser abertos com memory map, sem copiar os dados para a memória do processo.
+# O JSON em dados_economicos/<serie>.json continua disponível como formato de exportação opcional.
+import os
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+import json_stream
+from normalization import normalize_records
+
+DATA_DIR = "dados_economicos"
+STORE_DIR = os.path.join(DATA_DIR, "arrow")
+
+# Formatos gravados pelos coletores: "arrow" (padrão), "json" ou ambos ("arrow,json")
+DATA_FORMATS = {fmt.strip() for fmt in os.environ.get("DATA_FORMATS", "arrow").split(",") if fmt.strip()}
+
+SCHEMA = pa.schema([
+    pa.field("data", pa.date32(), nullable=False),
+    pa.field("valor", pa.float64()),
+])
+
+def series_path(name):
+    """Returns the path of a series' Arrow IPC file."""
+    return os.path.join(STORE_DIR, f"{name}.arrow")
+
+def has_series(name):
+    return os.path.exists(series_path(name))
+
+def has_saved_series(name, json_path=None):
+    """True when the series is saved in every configured format (DATA_FORMATS)."""
+    if "arrow" in DATA_FORMATS and not has_series(name):
+        return False
+    if "json" in DATA_FORMATS and (json_path is None or not os.path.exists(json_path)):
+        return False
+    return True
+
+def records_to_table(records):
+    """Builds a typed, date-sorted Arrow table from {data_referencia|data, valor} records (rejected rows are dropped)."""
+    records = list(records)
+    if not records:
+        return SCHEMA.empty_table()
+    valid, _, _ = normalize_records(records)
+    table = pa.table({
+        "data": pa.array(valid["data"].tolist(), type=pa.string()).cast(pa.date32()),
+        "valor": pa.array(valid["valor"].to_numpy(), type=pa.float64()),
+    }, schema=SCHEMA)
+    return table.sort_by("data")
+
+def read_series(name):
+    """Reads a series as an Arrow table backed by a memory map (zero-copy). Returns None if it does not exist."""
+    path = series_path(name)
+    if not os.path.exists(path):
+        return None
+    with pa.memory_map(path, "r") as source:
+        return pa.ipc.open_file(source).read_all()
+
+def read_series_frame(name):
+    """Reads a series as a pandas DataFrame with 'data_referencia' (datetime64) and 'valor' (float64)."""
+    table = read_series(name)
+    if table is None:
+        return None
+    frame = table.to_pandas(date_as_object=False)
+    return frame.rename(columns={"data": "data_referencia"})
+
+def iter_series_rows(name, chunk_rows):
+    """Yields lists of (YYYY-MM-DD, float) tuples from a stored series, one record batch at a time."""
+    table = read_series(name)
+    if table is None:
+        return
+    yield from iter_table_rows(table, chunk_rows)
+
+def iter_table_rows(table, chunk_rows):
+    """Yields lists of (YYYY-MM-DD, float) tuples from a series table, one record batch at a time."""
+    for batch in table.to_batches(max_chunksize=chunk_rows):
+        dates = batch.column(0).cast(pa.string()).to_pylist()
+        values = batch.column(1).to_pylist()
+        yield [(date_str, valor) for date_str, valor in zip(dates, values) if valor is not None]
+
+def last_date(name):
+    """Returns the most recent date (datetime.date) of a stored series, or None."""
+    table = read_series(name)
+    if table is None or table.num_rows == 0:
+        return None
+    return pc.max(table.column("data")).as_py()
+
+def write_table(name, table):
+    """Writes an Arrow table as a series partition (atomically)."""
+    os.makedirs(STORE_DIR, exist_ok=True)
+    path = series_path(name)
+    tmp_path = f"{path}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, SCHEMA) as writer:
+            writer.write_table(table.cast(SCHEMA))
+    os.replace(tmp_path, path)
+
+def merge_tables(existing, new):
+    """Combines two series tables; on the same date the value from new prevails (revisions)."""
+    if existing is None or existing.num_rows == 0:
+        combined = new
+    else:
+        combined = pa.concat_tables([existing, new])
+    # Mantém a última ocorrência de cada data: índice da última linha por data
+    indexed = combined.append_column("_ordem", pa.array(range(combined.num_rows), type=pa.int64()))
+    last_rows = indexed.group_by("data").aggregate([("_ordem", "max")]).column("_ordem_max")
+    return combined.take(last_rows).sort_by("data")
+
+def save_series(name, records, json_path=None, merge=False):
+    """Saves a series in the configured formats (DATA_FORMATS). Returns the number of rows in the store.
+
+    With merge=True the new records are merged into the stored series instead of replacing it.
+    """
+    records = list(records)
+    total_rows = len(records)
+    if "arrow" in DATA_FORMATS:
+        table = records_to_table(records)
+        if merge:
+            table = merge_tables(read_series(name), table)
+        write_table(name, table)
+        total_rows = table.num_rows
+        print(f"Série {name} salva em {series_path(name)} ({total_rows} registros).")
+    if "json" in DATA_FORMATS and json_path:
+        json_stream.write_json_records(json_path, records)
+        print(f"Série {name} exportada em {json_path}.")
+    return total_rows
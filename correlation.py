@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# Correlação entre os indicadores: todas as séries são reamostradas para uma frequência comum
+# (mensal, valor de fim de período) e as matrizes de Pearson e Spearman de todos os pares são
+# calculadas de uma vez, junto com as correlações em janela móvel. O dashboard só lê os resultados.
+import os
+
+import numpy as np
+import pandas as pd
+
+# Frequência comum do painel e tamanho da janela móvel (em períodos dessa frequência)
+CORRELATION_FREQ = "MS"
+ROLLING_WINDOW = int(os.environ.get("CORRELATION_ROLLING_WINDOW", "12"))
+# Mínimo de observações em comum para uma correlação ser exibida
+MIN_PERIODS = 3
+
+def build_panel(frames, freq=CORRELATION_FREQ):
+    """Monta um painel largo (um indicador por coluna, valor de fim de período) a partir dos DataFrames de cada indicador."""
+    series = [
+        df.set_index("data_referencia")[col].astype("float64").resample(freq).last().rename(col)
+        for col, df in frames.items() if not df.empty
+    ]
+    if not series:
+        return pd.DataFrame()
+    panel = pd.concat(series, axis=1).reset_index()
+    panel["ano"] = panel["data_referencia"].dt.year
+    return panel
+
+def correlation_matrices(panel, columns, min_periods=MIN_PERIODS):
+    """Matrizes de Pearson e Spearman de todos os pares (observações em comum por par) e o número de observações."""
+    values = panel[columns].astype("float64")
+    present = values.notna().to_numpy(dtype=np.int64)
+    observations = pd.DataFrame(present.T @ present, index=columns, columns=columns)
+    return {
+        "pearson": values.corr(method="pearson", min_periods=min_periods),
+        "spearman": values.corr(method="spearman", min_periods=min_periods),
+        "observacoes": observations,
+    }
+
+def rolling_correlations(panel, columns, window=ROLLING_WINDOW, min_periods=None):
+    """Correlações de Pearson em janela móvel para todos os pares, em formato longo (data_referencia, indicador_1, indicador_2, correlacao)."""
+    # Séries trimestrais têm um valor a cada três meses no painel mensal: exige um terço da janela
+    min_periods = max(MIN_PERIODS, window // 3) if min_periods is None else min_periods
+    values = panel.set_index("data_referencia")[columns].astype("float64")
+    # Uma única passada do rolling().corr() calcula a matriz de cada janela para todos os pares
+    rolling = values.rolling(window, min_periods=min_periods).corr()
+    rolling.index.names = ["data_referencia", "indicador_1"]
+    long = rolling.stack(future_stack=True).rename("correlacao").reset_index()
+    long = long.rename(columns={long.columns[2]: "indicador_2"})
+    # Mantém cada par uma vez, na ordem das colunas
+    order = {col: position for position, col in enumerate(columns)}
+    upper = long["indicador_1"].map(order) < long["indicador_2"].map(order)
+    return long[upper].dropna(subset=["correlacao"]).reset_index(drop=True)
+
+def compute_correlations(panel, date_mask=None, window=ROLLING_WINDOW):
+    """Calcula todos os resultados de correlação do painel.
+
+    As matrizes usam apenas as linhas selecionadas por date_mask; as janelas móveis são calculadas
+    sobre o painel completo (para que o início do período já tenha janela cheia) e depois filtradas.
+    """
+    columns = [col for col in panel.columns if col not in ("data_referencia", "ano") and panel[col].notna().any()]
+    panel = panel.astype({col: "float64" for col in columns})
+    selected = panel if date_mask is None else panel[date_mask]
+    results = correlation_matrices(selected, columns)
+    rolling = rolling_correlations(panel, columns, window)
+    if date_mask is not None:
+        rolling = rolling[rolling["data_referencia"].isin(selected["data_referencia"])].reset_index(drop=True)
+    results["rolling"] = rolling
+    results["painel"] = selected.reset_index(drop=True)
+    results["indicadores"] = columns
+    return results
+
+def pair_rolling(rolling, indicator1, indicator2):
+    """Série de correlação móvel de um par, independente da ordem em que os indicadores foram escolhidos."""
+    mask = ((rolling["indicador_1"] == indicator1) & (rolling["indicador_2"] == indicator2)) | (
+        (rolling["indicador_1"] == indicator2) & (rolling["indicador_2"] == indicator1)
+    )
+    return rolling.loc[mask, ["data_referencia", "correlacao"]]
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+# Pool de conexões PostgreSQL compartilhado entre as sessões do dashboard.
+#   - tamanho limitado (DB_POOL_MAX); quem não consegue uma conexão espera até DB_POOL_TIMEOUT segundos;
+#   - cada conexão é validada na retirada (SELECT 1 se ficou ociosa por mais de DB_POOL_PING_AFTER s);
+#   - conexões quebradas são descartadas e reabertas com backoff exponencial (DB_POOL_RETRIES tentativas);
+#   - contadores de espera na retirada e de reconexões, para dimensionar o pool (stats());
+#   - InstrumentedCursor conta as idas ao banco e mede cada comando (módulo metrics), também usado pela carga;
+#   - fetch_arrow lê o resultado de uma consulta com COPY ... TO STDOUT direto para uma tabela Arrow tipada.
+import io
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.extensions
+import psycopg2.pool
+
+import metrics
+
+DB_POOL_MAX = int(os.environ.get("DB_POOL_MAX", "5"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "10"))
+DB_POOL_RETRIES = int(os.environ.get("DB_POOL_RETRIES", "3"))
+DB_POOL_BACKOFF = float(os.environ.get("DB_POOL_BACKOFF", "0.5"))
+DB_POOL_PING_AFTER = float(os.environ.get("DB_POOL_PING_AFTER", "30"))
+
+# Erros que indicam conexão perdida (a conexão é descartada em vez de devolvida ao pool)
+CONNECTION_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+class InstrumentedCursor(psycopg2.extensions.cursor):
+    """Cursor that counts every database round trip and records each statement's latency in metrics.
+
+    Pass it as cursor_factory when connecting. executemany counts one round trip per parameter set, since
+    psycopg2 sends each of them as a separate statement.
+    """
+
+    def execute(self, query, vars=None):
+        with metrics.timer("db_statement_seconds", operation="execute"):
+            result = super().execute(query, vars)
+        metrics.inc("db_round_trips_total", operation="execute")
+        return result
+
+    def executemany(self, query, vars_list):
+        vars_list = list(vars_list)
+        with metrics.timer("db_statement_seconds", operation="executemany"):
+            result = super().executemany(query, vars_list)
+        metrics.inc("db_round_trips_total", len(vars_list), operation="executemany")
+        return result
+
+    def copy_expert(self, sql, file, size=8192):
+        with metrics.timer("db_statement_seconds", operation="copy"):
+            result = super().copy_expert(sql, file, size)
+        metrics.inc("db_round_trips_total", operation="copy")
+        return result
+
+def fetch_arrow(conn, query, params=None, column_types=None):
+    """Runs a query through COPY ... TO STDOUT (CSV) and decodes the output with pyarrow's CSV reader.
+
+    The rows never become Python objects: the server streams them as CSV into an in-memory buffer and
+    pyarrow parses each column straight into a typed array (column_types: {column: pyarrow type}).
+    COPY takes no bind parameters, so params are inlined with the cursor's own quoting (mogrify).
+    Returns a pyarrow.Table, with the header columns even when the query returns no rows.
+    """
+    import pyarrow.csv as pa_csv
+
+    buffer = io.BytesIO()
+    with conn.cursor() as cur:
+        statement = cur.mogrify(query.strip().rstrip(";"), params).decode(psycopg2.extensions.encodings[conn.encoding])
+        cur.copy_expert(f"COPY ({statement}) TO STDOUT WITH (FORMAT csv, HEADER true)", buffer)
+    buffer.seek(0)
+    return pa_csv.read_csv(buffer, convert_options=pa_csv.ConvertOptions(column_types=column_types or {}))
+
+class PoolTimeout(psycopg2.pool.PoolError):
+    """Raised when no connection becomes available within the checkout timeout."""
+
+class ConnectionPool:
+    """Thread-safe, bounded pool of psycopg2 connections with liveness checks and reconnect backoff."""
+
+    def __init__(self, maxconn=DB_POOL_MAX, checkout_timeout=DB_POOL_TIMEOUT, retries=DB_POOL_RETRIES,
+                 backoff=DB_POOL_BACKOFF, ping_after=DB_POOL_PING_AFTER, **connect_kwargs):
+        self.maxconn = maxconn
+        self.checkout_timeout = checkout_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.ping_after = ping_after
+        self.connect_kwargs = connect_kwargs
+        self._idle = []  # (conexão, instante em que foi devolvida)
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._counters = {
+            "retiradas": 0,
+            "espera_total_s": 0.0,
+            "espera_max_s": 0.0,
+            "timeouts": 0,
+            "conexoes_abertas": 0,
+            "reconexoes": 0,
+            "falhas_conexao": 0,
+            "descartadas": 0,
+        }
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self._counters[key] += amount
+
+    def _connect(self):
+        """Opens a new connection, retrying with exponential backoff and jitter."""
+        for attempt in range(self.retries + 1):
+            try:
+                conn = psycopg2.connect(**self.connect_kwargs)
+                self._count("conexoes_abertas")
+                return conn
+            except CONNECTION_ERRORS:
+                self._count("falhas_conexao")
+                if attempt == self.retries:
+                    raise
+                time.sleep(self.backoff * (2 ** attempt) * (1 + random.random()))
+
+    def _is_alive(self, conn, idle_since):
+        if conn.closed:
+            return False
+        if time.monotonic() - idle_since < self.ping_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1;")
+            conn.rollback()
+            return True
+        except CONNECTION_ERRORS:
+            return False
+
+    def _discard(self, conn):
+        self._count("descartadas")
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def getconn(self):
+        """Checks out a live connection, waiting up to checkout_timeout for a free slot."""
+        start_time = time.monotonic()
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            self._count("timeouts")
+            raise PoolTimeout(f"Nenhuma conexão disponível em {self.checkout_timeout:.1f}s (DB_POOL_MAX={self.maxconn}).")
+        waited = time.monotonic() - start_time
+        try:
+            reconnect = False
+            while True:
+                with self._lock:
+                    item = self._idle.pop() if self._idle else None
+                if item is None:
+                    conn = self._connect()
+                    if reconnect:
+                        self._count("reconexoes")
+                    break
+                conn, idle_since = item
+                if self._is_alive(conn, idle_since):
+                    break
+                # Conexão derrubada (pooler, rede, reinício do banco): descarta e tenta a próxima
+                self._discard(conn)
+                reconnect = True
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._in_use += 1
+            self._counters["retiradas"] += 1
+            self._counters["espera_total_s"] += waited
+            self._counters["espera_max_s"] = max(self._counters["espera_max_s"], waited)
+        return conn
+
+    def putconn(self, conn, close=False):
+        """Returns a connection to the pool (rolled back), or closes it when close=True or it is broken."""
+        try:
+            if close or conn.closed:
+                self._discard(conn)
+                return
+            try:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except CONNECTION_ERRORS:
+                self._discard(conn)
+                return
+            with self._lock:
+                self._idle.append((conn, time.monotonic()))
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Context manager that checks out a connection and always returns it.
+
+        putconn discards it only if it was actually closed; after a query error such as QueryCanceled the
+        connection is rolled back and reused.
+        """
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def stats(self):
+        """Pool counters: checkouts, checkout wait time (total/average/max), timeouts, reconnects, open/idle connections."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["em_uso"] = self._in_use
+            stats["ociosas"] = len(self._idle)
+        stats["tamanho_max"] = self.maxconn
+        stats["espera_media_s"] = stats["espera_total_s"] / stats["retiradas"] if stats["retiradas"] else 0.0
+        return stats
+
+    def closeall(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._discard(conn)
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+# Redução do número de pontos das séries antes de desenhar os gráficos, com o algoritmo
+# Largest-Triangle-Three-Buckets (LTTB), que preserva picos e vales visualmente relevantes.
+import os
+
+import numpy as np
+
+# Máximo de pontos por gráfico de linha (0 desliga a redução)
+MAX_PONTOS_GRAFICO = int(os.environ.get("MAX_PONTOS_GRAFICO", "1000"))
+
+def lttb_indices(x, y, threshold):
+    """Returns the indices of the threshold points selected by LTTB (always keeps the first and last points).
+
+    x and y are 1-D float arrays of the same length, with x in ascending order.
+    """
+    n_points = len(x)
+    if threshold >= n_points or threshold < 3:
+        return np.arange(n_points)
+
+    # Os pontos intermediários são divididos em threshold - 2 blocos de tamanho quase igual
+    edges = np.floor(np.linspace(1, n_points - 1, threshold - 1)).astype(np.int64)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n_points - 1
+
+    selected = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # Média do próximo bloco (o último bloco usa o último ponto)
+        next_start = end
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n_points
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        # Área do triângulo (ponto escolhido anterior, candidato, média do próximo bloco)
+        areas = np.abs(
+            (x[selected] - avg_x) * (y[start:end] - y[selected])
+            - (x[selected] - x[start:end]) * (avg_y - y[selected])
+        )
+        selected = start + int(np.argmax(areas))
+        indices[bucket + 1] = selected
+    return indices
+
+def downsample_frame(df, x_col, y_col, max_points=None):
+    """Reduces a DataFrame sorted by x_col to at most max_points rows with LTTB (returns df unchanged when smaller)."""
+    max_points = MAX_PONTOS_GRAFICO if max_points is None else max_points
+    if max_points <= 0 or len(df) <= max_points:
+        return df
+    df = df.dropna(subset=[y_col])
+    if np.issubdtype(df[x_col].dtype, np.datetime64):
+        x = df[x_col].to_numpy(dtype="datetime64[ns]").astype(np.int64).astype(np.float64)
+    else:
+        x = df[x_col].to_numpy(dtype=np.float64)
+    y = df[y_col].to_numpy(dtype=np.float64)
+    return df.iloc[lttb_indices(x, y, max_points)]
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+# Executa a coleta de todas as séries do registro (series_registry.json: BCB, IBGE SIDRA e World Bank) em paralelo.
+# Todas as requisições compartilham um http_client.HttpClient (conexões keep-alive, limite por
+# host, novas tentativas com backoff e requisições condicionais). Ao final é exibido um resumo
+# com o tempo de cada série e o tempo total.
+import datetime
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import get_bcb_data
+import get_sidra_data
+import get_worldbank_gdp_data_debug
+import http_client
+import series_registry
+
+# Número máximo de séries coletadas ao mesmo tempo
+MAX_WORKERS = int(os.environ.get("FETCH_MAX_WORKERS", "8"))
+
+def series_fetchers(session, bcb_state, end_date):
+    """Uma função de coleta por série do registro: {série: (rótulo, função sem argumentos)}."""
+    fetchers = {}
+    for entry in series_registry.SERIES.values():
+        name, code = entry["id"], entry["codigo"]
+        if entry["fonte"] == "bcb":
+            fetchers[name] = (
+                f"BCB {name} (SGS {code})",
+                lambda code=code, name=name: get_bcb_data.update_series(code, name, bcb_state, end_date, session=session)
+            )
+        elif entry["fonte"] == "sidra":
+            fetchers[name] = (f"IBGE {name} (SIDRA {code})", lambda name=name: get_sidra_data.update_table(name, session=session))
+        else:
+            fetchers[name] = (
+                f"World Bank {name} ({code})",
+                lambda name=name: get_worldbank_gdp_data_debug.update_indicator(name, session=session)
+            )
+    return fetchers
+
+def build_tasks(session, bcb_state, end_date):
+    """Monta a lista de (rótulo, função) com todas as séries a coletar."""
+    return list(series_fetchers(session, bcb_state, end_date).values())
+
+def run_task(label, func):
+    """Executa uma tarefa de coleta e devolve (rótulo, resultado, duração em segundos, erro)."""
+    start_time = time.perf_counter()
+    try:
+        result = func()
+        error = None
+    except Exception as e:
+        result = None
+        error = e
+        print(f"Erro inesperado na coleta de {label}: {e}")
+    return label, result, time.perf_counter() - start_time, error
+
+def print_summary(results, wall_time):
+    """Exibe o tempo de cada série e compara o tempo total com a soma dos tempos individuais."""
+    print("\n--- Resumo da coleta ---")
+    for label, result, duration, error in sorted(results, key=lambda r: r[2], reverse=True):
+        if error is not None:
+            status = f"erro: {error}"
+        elif result is None:
+            status = "sem dados"
+        else:
+            status = f"{result} registros"
+        print(f"  {label:<40} {duration:7.2f}s  ({status})")
+    summed_time = sum(r[2] for r in results)
+    print(f"Tempo total (paralelo): {wall_time:.2f}s | Soma dos tempos individuais: {summed_time:.2f}s")
+
+def main():
+    os.makedirs(get_bcb_data.save_dir, exist_ok=True)
+    bcb_state = get_bcb_data.load_state()
+    end_date = datetime.date.today()
+
+    start_time = time.perf_counter()
+    with http_client.HttpClient() as session:
+        tasks = build_tasks(session, bcb_state, end_date)
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            futures = [executor.submit(run_task, label, func) for label, func in tasks]
+            results = [future.result() for future in futures]
+    wall_time = time.perf_counter() - start_time
+
+    get_bcb_data.save_state(bcb_state)
+    print_summary(results, wall_time)
+
+if __name__ == "__main__":
+    main()
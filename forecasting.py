@@ -0,0 +1,541 @@
+# -*- coding: utf-8 -*-
+# Previsões dos indicadores: preparação dos dados, modelos (Prophet, ETS do statsmodels e uma
+# tendência linear em NumPy), treino, cache LRU (memória + disco) e treino em segundo plano.
+# A chave do cache é (indicador, impressão digital dos dados, horizonte, modelo), então uma
+# previsão só é refeita quando os dados, o horizonte ou o modelo mudam. O Prophet (e o Stan) só é
+# importado quando esse modelo é usado.
+#
+# Uso em lote, após cada carga: python forecasting.py [--horizons 180 365 730] [--target db|local]
+# ajusta todos os indicadores em paralelo (um processo por indicador), grava yhat/yhat_lower/yhat_upper
+# no banco (tabela previsoes_indicadores) ou no armazenamento local e exibe o tempo de ajuste por série.
+import argparse
+import hashlib
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+import metrics
+import series_registry
+
+# Diretório de persistência dos modelos ajustados e das previsões
+FORECAST_CACHE_DIR = os.environ.get("FORECAST_CACHE_DIR", os.path.join("dados_economicos", "previsoes_cache"))
+# Entradas mantidas em memória e em disco (as menos usadas recentemente são descartadas)
+FORECAST_CACHE_SIZE = int(os.environ.get("FORECAST_CACHE_SIZE", "16"))
+FORECAST_DISK_CACHE_SIZE = int(os.environ.get("FORECAST_DISK_CACHE_SIZE", "64"))
+# Workers de treino em segundo plano (o Prophet já usa vários núcleos no Stan)
+FORECAST_WORKERS = int(os.environ.get("FORECAST_WORKERS", "1"))
+DEFAULT_FORECAST_PERIODS = 365
+# Horizontes (dias) produzidos pelo job em lote e processos usados no ajuste
+FORECAST_HORIZONS = [int(h) for h in os.environ.get("FORECAST_HORIZONS", "180,365,730").split(",") if h.strip()]
+FORECAST_BATCH_WORKERS = int(os.environ.get("FORECAST_BATCH_WORKERS", str(os.cpu_count() or 1)))
+
+# Destinos dos resultados do job em lote
+FORECAST_TABLE = "previsoes_indicadores"
+FORECAST_RUNS_TABLE = "previsoes_execucoes"
+FORECAST_STORE_PATH = os.path.join("dados_economicos", "arrow", "previsoes.arrow")
+FORECAST_RUNS_PATH = os.path.join("dados_economicos", "previsoes_execucoes.csv")
+FORECAST_COLUMNS = ["ds", "yhat", "yhat_lower", "yhat_upper"]
+
+# Modelos de previsão: nome exibido -> identificador. ETS e tendência são rápidos o bastante para
+# rodar durante a requisição; o Prophet é treinado em segundo plano.
+FORECAST_ENGINES = {
+    "Prophet (completo)": "prophet",
+    "ETS - statsmodels (rápido)": "ets",
+    "Tendência linear (instantâneo)": "drift",
+}
+DEFAULT_FORECAST_ENGINE = os.environ.get("FORECAST_ENGINE", "prophet")
+# Largura do intervalo de previsão, a mesma do padrão do Prophet (interval_width=0.8)
+INTERVAL_WIDTH = 0.8
+
+# Indicadores disponíveis para previsão (os exibidos no dashboard, do registro series_registry.json):
+# nome exibido -> série (series_id em stg_valores_series e nome no armazenamento local)
+FORECAST_INDICATORS = {entry["nome"]: entry["id"] for entry in series_registry.dashboard_series()}
+
+def prepare_prophet_frame(df, date_col, y_col):
+    """Converte um DataFrame de indicador no formato do Prophet (ds, y), sem nulos e ordenado."""
+    df_prophet = df[[date_col, y_col]].rename(columns={date_col: "ds", y_col: "y"})
+    df_prophet = df_prophet.dropna(subset=["ds", "y"])
+    df_prophet["y"] = df_prophet["y"].astype("float64")
+    return df_prophet.sort_values(by="ds").reset_index(drop=True)
+
+def data_fingerprint(df_prophet):
+    """Hash do conteúdo (ds, y) da série, usado na chave do cache."""
+    # Normaliza a resolução das datas (o banco devolve ns; o Arrow local pode devolver ms)
+    normalized = pd.DataFrame({"ds": df_prophet["ds"].astype("datetime64[ns]"), "y": df_prophet["y"]})
+    hashed = pd.util.hash_pandas_object(normalized, index=False)
+    return hashlib.sha256(hashed.values.tobytes()).hexdigest()
+
+def make_cache_key(indicator, df_prophet, periods, engine="prophet"):
+    return (indicator, data_fingerprint(df_prophet), int(periods), engine)
+
+def fit_prophet(df_prophet, periods):
+    """Ajusta um Prophet à série e gera a previsão para os próximos periods dias."""
+    from prophet import Prophet
+
+    model = Prophet()
+    model.fit(df_prophet)
+    future = model.make_future_dataframe(periods=periods)
+    forecast = model.predict(future)
+    return model, forecast
+
+def infer_frequency(ds):
+    """Frequência nativa da série (pandas) e período sazonal, a partir do intervalo mediano entre datas."""
+    step_days = ds.diff().dt.days.median()
+    if step_days <= 1.5:
+        return "D", None
+    if step_days <= 8:
+        return "W", None
+    if step_days <= 45:
+        return "MS", 12
+    if step_days <= 120:
+        return "QS", 4
+    return "YS", None
+
+def regular_series(df_prophet):
+    """Reamostra a série na sua frequência nativa, preenchendo lacunas (fins de semana, feriados) por interpolação."""
+    freq, seasonal_periods = infer_frequency(df_prophet["ds"])
+    series = df_prophet.set_index("ds")["y"].resample(freq).mean().interpolate()
+    return series, freq, seasonal_periods
+
+def to_forecast_frame(df_prophet, periods, native_index, fitted, lower, upper):
+    """Projeta valores na frequência nativa no formato de saída do Prophet.
+
+    Uma linha por data do histórico mais periods dias futuros, com ds, yhat, yhat_lower e yhat_upper
+    interpolados no tempo.
+    """
+    history_ds = pd.DatetimeIndex(df_prophet["ds"].drop_duplicates())
+    future_ds = pd.date_range(history_ds[-1] + pd.Timedelta(days=1), periods=periods, freq="D")
+    ds = history_ds.append(future_ds)
+    source_x = native_index.asi8.astype("float64")
+    target_x = ds.as_unit(native_index.unit).asi8.astype("float64")
+    return pd.DataFrame({
+        "ds": ds,
+        "yhat": np.interp(target_x, source_x, fitted),
+        "yhat_lower": np.interp(target_x, source_x, lower),
+        "yhat_upper": np.interp(target_x, source_x, upper),
+    })
+
+def steps_for_horizon(last_date, periods, freq):
+    """Número de passos na frequência nativa necessários para cobrir periods dias após last_date."""
+    end_date = last_date + pd.Timedelta(days=periods)
+    return max(1, len(pd.date_range(last_date, end_date, freq=freq)))
+
+def fit_ets(df_prophet, periods):
+    """Suavização exponencial (ETS aditivo com tendência amortecida) do statsmodels, na frequência nativa."""
+    from statsmodels.tsa.exponential_smoothing.ets import ETSModel
+
+    series, freq, seasonal_periods = regular_series(df_prophet)
+    use_seasonal = seasonal_periods is not None and len(series) >= 2 * seasonal_periods
+    model = ETSModel(
+        series,
+        error="add",
+        trend="add",
+        damped_trend=True,
+        seasonal="add" if use_seasonal else None,
+        seasonal_periods=seasonal_periods if use_seasonal else None,
+    )
+    result = model.fit(disp=False)
+    steps = steps_for_horizon(series.index[-1], periods, freq)
+    prediction = result.get_prediction(start=len(series), end=len(series) + steps - 1).summary_frame(alpha=1 - INTERVAL_WIDTH)
+
+    # Intervalo do histórico a partir do desvio-padrão dos resíduos, como o Prophet faz no ajuste
+    margin = NormalDist().inv_cdf(0.5 + INTERVAL_WIDTH / 2) * np.nanstd(result.resid)
+    fitted = result.fittedvalues.to_numpy()
+    native_index = series.index.append(prediction.index)
+    forecast = to_forecast_frame(
+        df_prophet,
+        periods,
+        native_index,
+        np.concatenate([fitted, prediction["mean"].to_numpy()]),
+        np.concatenate([fitted - margin, prediction["pi_lower"].to_numpy()]),
+        np.concatenate([fitted + margin, prediction["pi_upper"].to_numpy()]),
+    )
+    return None, forecast
+
+def fit_drift(df_prophet, periods):
+    """Passeio aleatório com tendência (drift) em NumPy: a linha entre o primeiro e o último ponto, projetada adiante."""
+    series, freq, _ = regular_series(df_prophet)
+    values = series.to_numpy()
+    n_obs = len(values)
+    drift = (values[-1] - values[0]) / max(n_obs - 1, 1)
+    residuals = np.diff(values) - drift
+    sigma = residuals.std(ddof=1) if len(residuals) > 1 else 0.0
+    z_score = NormalDist().inv_cdf(0.5 + INTERVAL_WIDTH / 2)
+
+    steps = steps_for_horizon(series.index[-1], periods, freq)
+    horizon = np.arange(1, steps + 1)
+    future_mean = values[-1] + horizon * drift
+    future_sd = sigma * np.sqrt(horizon * (1 + horizon / max(n_obs - 1, 1)))
+    future_index = pd.date_range(series.index[-1], periods=steps + 1, freq=freq)[1:]
+
+    fitted = np.concatenate([values[:1], values[:-1] + drift])
+    native_index = series.index.append(future_index)
+    forecast = to_forecast_frame(
+        df_prophet,
+        periods,
+        native_index,
+        np.concatenate([fitted, future_mean]),
+        np.concatenate([fitted - z_score * sigma, future_mean - z_score * future_sd]),
+        np.concatenate([fitted + z_score * sigma, future_mean + z_score * future_sd]),
+    )
+    return None, forecast
+
+ENGINE_FUNCTIONS = {
+    "prophet": fit_prophet,
+    "ets": fit_ets,
+    "drift": fit_drift,
+}
+
+def fit_and_predict(df_prophet, periods, engine="prophet"):
+    """Ajusta o modelo escolhido e gera a previsão para os próximos periods dias.
+
+    Retorna (modelo, previsão); o modelo só existe para o Prophet (usado nos gráficos de componentes)
+    e é None nos demais. A previsão sempre tem as colunas ds, yhat, yhat_lower e yhat_upper.
+    """
+    if engine not in ENGINE_FUNCTIONS:
+        raise ValueError(f"Modelo de previsão desconhecido: {engine}")
+    with metrics.timer("forecast_fit_seconds", engine=engine) as measured:
+        result = ENGINE_FUNCTIONS[engine](df_prophet, periods)
+    metrics.log_event("previsao", modelo=engine, pontos=len(df_prophet), horizonte=periods, segundos=round(measured["segundos"], 4))
+    return result
+
+class ForecastCache:
+    """Cache LRU thread-safe de (modelo ajustado, previsão), persistido em disco."""
+
+    def __init__(self, cache_dir=FORECAST_CACHE_DIR, max_entries=FORECAST_CACHE_SIZE, max_disk_entries=FORECAST_DISK_CACHE_SIZE):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _paths(self, key):
+        digest = hashlib.sha256("|".join(map(str, key)).encode("utf-8")).hexdigest()[:32]
+        base = os.path.join(self.cache_dir, digest)
+        return f"{base}.model.json", f"{base}.forecast.arrow"
+
+    def get(self, key):
+        """Retorna (modelo, previsão) do cache em memória ou em disco, ou None."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        entry = self._load_from_disk(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, entry)
+            return entry
+
+    def put(self, key, model, forecast):
+        entry = (model, forecast)
+        with self._lock:
+            self._remember(key, entry)
+        self._save_to_disk(key, model, forecast)
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _load_from_disk(self, key):
+        model_path, forecast_path = self._paths(key)
+        if not os.path.exists(forecast_path):
+            return None
+        try:
+            model = None
+            if os.path.exists(model_path):
+                from prophet.serialize import model_from_json
+
+                with open(model_path, "r", encoding="utf-8") as f:
+                    model = model_from_json(f.read())
+            forecast = pd.read_feather(forecast_path)
+            # Atualiza o horário de acesso para a política LRU em disco
+            os.utime(forecast_path)
+            return model, forecast
+        except Exception as e:
+            print(f"Erro ao ler previsão em cache ({model_path}): {e}")
+            return None
+
+    def _save_to_disk(self, key, model, forecast):
+        model_path, forecast_path = self._paths(key)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            if model is not None:
+                from prophet.serialize import model_to_json
+
+                with open(model_path, "w", encoding="utf-8") as f:
+                    f.write(model_to_json(model))
+            forecast.reset_index(drop=True).to_feather(forecast_path)
+            self._evict_disk()
+        except Exception as e:
+            print(f"Erro ao salvar previsão em cache ({model_path}): {e}")
+
+    def _evict_disk(self):
+        forecast_files = [
+            os.path.join(self.cache_dir, name)
+            for name in os.listdir(self.cache_dir) if name.endswith(".forecast.arrow")
+        ]
+        forecast_files.sort(key=os.path.getmtime)
+        for forecast_path in forecast_files[:max(0, len(forecast_files) - self.max_disk_entries)]:
+            model_path = forecast_path.replace(".forecast.arrow", ".model.json")
+            for path in (model_path, forecast_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+class ForecastTrainer:
+    """Treina previsões em segundo plano e grava o resultado no cache; pedidos repetidos reaproveitam o mesmo treino."""
+
+    def __init__(self, cache, max_workers=FORECAST_WORKERS):
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="forecast")
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, df_prophet, periods, engine="prophet"):
+        """Agenda o treino (se ainda não estiver em cache nem em andamento) e retorna o Future."""
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                return future
+            future = self._executor.submit(self._train, key, df_prophet, periods, engine)
+            self._pending[key] = future
+            return future
+
+    def _train(self, key, df_prophet, periods, engine):
+        try:
+            entry = self.cache.get(key)
+            if entry is None:
+                model, forecast = fit_and_predict(df_prophet, periods, engine)
+                self.cache.put(key, model, forecast)
+                entry = (model, forecast)
+            return entry
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+def load_indicator_frames(source="db"):
+    """Lê as séries dos indicadores (do banco ou do armazenamento colunar local) no formato do Prophet."""
+    frames = {}
+    if source == "local":
+        import columnar_store
+
+        for name, series_name in FORECAST_INDICATORS.items():
+            df = columnar_store.read_series_frame(series_name)
+            if df is not None:
+                frames[name] = prepare_prophet_frame(df, "data_referencia", "valor")
+        return frames
+
+    from load_all_data_to_supabase_normalized_v2 import get_db_connection
+
+    conn = get_db_connection()
+    if not conn:
+        return frames
+    try:
+        query = "SELECT data_referencia, valor FROM public.stg_valores_series WHERE series_id = %s ORDER BY data_referencia ASC;"
+        for name, series_name in FORECAST_INDICATORS.items():
+            df = pd.read_sql_query(query, conn, params=(series_name,))
+            df["data_referencia"] = pd.to_datetime(df["data_referencia"])
+            frames[name] = prepare_prophet_frame(df, "data_referencia", "valor")
+    finally:
+        conn.close()
+    return frames
+
+def fit_indicator(name, df_prophet, horizons):
+    """Ajusta um modelo (em um processo do pool) e gera as previsões de todos os horizontes.
+
+    O ajuste não depende do horizonte: a previsão é feita uma vez para o maior horizonte e os
+    demais são recortes dela. Retorna (nome, modelo serializado, {horizonte: previsão}, tempos).
+    """
+    from prophet import Prophet
+    from prophet.serialize import model_to_json
+
+    start_time = time.perf_counter()
+    model = Prophet()
+    model.fit(df_prophet)
+    fit_seconds = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    max_periods = max(horizons)
+    forecast = model.predict(model.make_future_dataframe(periods=max_periods))
+    history_rows = len(forecast) - max_periods
+    forecasts = {periods: forecast.iloc[:history_rows + periods].reset_index(drop=True) for periods in horizons}
+    predict_seconds = time.perf_counter() - start_time
+    return name, model_to_json(model), forecasts, fit_seconds, predict_seconds
+
+def run_batch(frames, horizons, max_workers=FORECAST_BATCH_WORKERS, cache=None):
+    """Ajusta todos os indicadores em paralelo e grava os modelos no cache. Retorna a lista de resultados."""
+    from prophet.serialize import model_from_json
+
+    cache = cache or ForecastCache(max_entries=max(FORECAST_CACHE_SIZE, len(frames) * len(horizons)))
+    results = []
+    with ProcessPoolExecutor(max_workers=max(1, min(max_workers, len(frames)))) as executor:
+        futures = {}
+        for name, df_prophet in frames.items():
+            if len(df_prophet) < 2:
+                print(f"Dados insuficientes para prever {name}. Pulando.")
+                continue
+            futures[executor.submit(fit_indicator, name, df_prophet, horizons)] = name
+        for future in as_completed(futures):
+            name = futures[future]
+            df_prophet = frames[name]
+            try:
+                _, model_json, forecasts, fit_seconds, predict_seconds = future.result()
+            except Exception as e:
+                print(f"Erro ao ajustar o modelo de {name}: {e}")
+                results.append({"indicador": name, "pontos": len(df_prophet), "erro": str(e)})
+                continue
+            # O ajuste roda em outro processo: as métricas são registradas aqui, com os tempos devolvidos
+            metrics.observe("forecast_fit_seconds", fit_seconds, engine="prophet")
+            metrics.observe("forecast_predict_seconds", predict_seconds, engine="prophet")
+            metrics.log_event("previsao", modelo="prophet", indicador=name, pontos=len(df_prophet),
+                              segundos=round(fit_seconds, 4), previsao_segundos=round(predict_seconds, 4))
+            model = model_from_json(model_json)
+            for periods, forecast in forecasts.items():
+                cache.put(make_cache_key(name, df_prophet, periods), model, forecast)
+            results.append({
+                "indicador": name,
+                "pontos": len(df_prophet),
+                "hash_dados": data_fingerprint(df_prophet),
+                "previsoes": forecasts,
+                "tempo_ajuste_s": fit_seconds,
+                "tempo_previsao_s": predict_seconds,
+            })
+    return results
+
+def forecasts_frame(results):
+    """Empilha as previsões dos resultados em um DataFrame longo (indicador, horizonte, ds, yhat, ...)."""
+    frames = []
+    for result in results:
+        for periods, forecast in result.get("previsoes", {}).items():
+            frame = forecast[FORECAST_COLUMNS].copy()
+            frame.insert(0, "horizonte", periods)
+            frame.insert(0, "indicador", result["indicador"])
+            frame["hash_dados"] = result["hash_dados"]
+            frames.append(frame)
+    if not frames:
+        return pd.DataFrame(columns=["indicador", "horizonte"] + FORECAST_COLUMNS + ["hash_dados"])
+    return pd.concat(frames, ignore_index=True)
+
+def save_forecasts_db(conn, results):
+    """Substitui, em uma transação, as previsões de cada (indicador, horizonte) e registra os tempos de ajuste."""
+    frame = forecasts_frame(results)
+    generated_at = datetime.now()
+    with conn.cursor() as cur:
+        cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS {FORECAST_TABLE} (
+            indicador TEXT NOT NULL,
+            horizonte INTEGER NOT NULL,
+            ds DATE NOT NULL,
+            yhat DOUBLE PRECISION,
+            yhat_lower DOUBLE PRECISION,
+            yhat_upper DOUBLE PRECISION,
+            hash_dados CHAR(64) NOT NULL,
+            gerado_em TIMESTAMP NOT NULL,
+            PRIMARY KEY (indicador, horizonte, ds)
+        );
+        """)
+        cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS {FORECAST_RUNS_TABLE} (
+            id BIGSERIAL PRIMARY KEY,
+            indicador TEXT NOT NULL,
+            pontos INTEGER NOT NULL,
+            tempo_ajuste_s DOUBLE PRECISION,
+            tempo_previsao_s DOUBLE PRECISION,
+            erro TEXT,
+            gerado_em TIMESTAMP NOT NULL
+        );
+        """)
+        for (indicador, horizonte), group in frame.groupby(["indicador", "horizonte"]):
+            cur.execute(f"DELETE FROM {FORECAST_TABLE} WHERE indicador = %s AND horizonte = %s;", (indicador, int(horizonte)))
+            buffer = io.StringIO()
+            group.assign(ds=group["ds"].dt.strftime("%Y-%m-%d"), gerado_em=generated_at.isoformat()).to_csv(
+                buffer, sep="\t", header=False, index=False, na_rep="\\N", columns=["indicador", "horizonte"] + FORECAST_COLUMNS + ["hash_dados", "gerado_em"]
+            )
+            buffer.seek(0)
+            cur.copy_expert(f"COPY {FORECAST_TABLE} (indicador, horizonte, ds, yhat, yhat_lower, yhat_upper, hash_dados, gerado_em) FROM STDIN", buffer)
+        for result in results:
+            cur.execute(
+                f"INSERT INTO {FORECAST_RUNS_TABLE} (indicador, pontos, tempo_ajuste_s, tempo_previsao_s, erro, gerado_em) VALUES (%s, %s, %s, %s, %s, %s);",
+                (result["indicador"], result["pontos"], result.get("tempo_ajuste_s"), result.get("tempo_previsao_s"), result.get("erro"), generated_at),
+            )
+    conn.commit()
+    print(f"{len(frame)} linhas de previsão gravadas na tabela {FORECAST_TABLE}.")
+
+def save_forecasts_local(results):
+    """Grava as previsões em dados_economicos/arrow/previsoes.arrow e acrescenta os tempos de ajuste ao CSV de execuções."""
+    frame = forecasts_frame(results)
+    os.makedirs(os.path.dirname(FORECAST_STORE_PATH), exist_ok=True)
+    tmp_path = f"{FORECAST_STORE_PATH}.tmp"
+    frame.to_feather(tmp_path)
+    os.replace(tmp_path, FORECAST_STORE_PATH)
+
+    runs = pd.DataFrame([
+        {key: result.get(key) for key in ("indicador", "pontos", "tempo_ajuste_s", "tempo_previsao_s", "erro")}
+        for result in results
+    ])
+    runs["gerado_em"] = datetime.now().isoformat(timespec="seconds")
+    runs.to_csv(FORECAST_RUNS_PATH, mode="a", index=False, header=not os.path.exists(FORECAST_RUNS_PATH))
+    print(f"{len(frame)} linhas de previsão gravadas em {FORECAST_STORE_PATH}.")
+
+def print_batch_report(results, wall_time):
+    """Exibe o tempo de ajuste e de previsão de cada série e o tempo total do job."""
+    print("\n--- Resumo das previsões ---")
+    for result in sorted(results, key=lambda r: r["indicador"]):
+        if "erro" in result:
+            print(f"  {result['indicador']:<12} {result['pontos']:>7} pontos  falhou: {result['erro']}")
+        else:
+            print(f"  {result['indicador']:<12} {result['pontos']:>7} pontos  ajuste: {result['tempo_ajuste_s']:7.2f}s  previsão: {result['tempo_previsao_s']:7.2f}s")
+    summed_time = sum(result.get("tempo_ajuste_s", 0) + result.get("tempo_previsao_s", 0) for result in results)
+    print(f"Tempo total (relógio): {wall_time:.2f}s | Soma dos tempos por série: {summed_time:.2f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Ajusta as previsões de todos os indicadores em paralelo e grava os resultados.")
+    parser.add_argument("--source", choices=["db", "local"], default="db", help="Origem das séries históricas.")
+    parser.add_argument("--target", choices=["db", "local", "none"], default=None, help="Destino das previsões (padrão: o mesmo da origem).")
+    parser.add_argument("--horizons", type=int, nargs="+", default=FORECAST_HORIZONS, help="Horizontes de previsão em dias.")
+    parser.add_argument("--workers", type=int, default=FORECAST_BATCH_WORKERS)
+    args = parser.parse_args()
+    target = args.target or args.source
+
+    frames = load_indicator_frames(args.source)
+    if not frames:
+        print("Nenhuma série disponível para previsão.")
+        return
+
+    start_time = time.perf_counter()
+    results = run_batch(frames, args.horizons, max_workers=args.workers)
+    wall_time = time.perf_counter() - start_time
+    print_batch_report(results, wall_time)
+
+    if target == "db":
+        from load_all_data_to_supabase_normalized_v2 import get_db_connection
+
+        conn = get_db_connection()
+        if conn:
+            try:
+                save_forecasts_db(conn, results)
+            except Exception as e:
+                conn.rollback()
+                print(f"Erro ao gravar previsões no banco: {e}")
+            finally:
+                conn.close()
+    elif target == "local":
+        save_forecasts_local(results)
+
+if __name__ == "__main__":
+    main()
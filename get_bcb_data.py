@@ -1,55 +1,320 @@
 # -*- coding: utf-8 -*-
 import requests
+import argparse
 import json
 import datetime
+import heapq
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+import pyarrow as pa
+
+import columnar_store
+import http_client
+import json_stream
+import series_registry
+
+# Janela usada na primeira coleta de cada série (ou com o modo incremental desligado)
+FULL_WINDOW_DAYS = 5*365
 
-# Define a data de hoje e a data de 5 anos atrás
-end_date = datetime.date.today()
-start_date = end_date - datetime.timedelta(days=5*365)
+# Modo incremental: busca apenas as datas posteriores à última já coletada de cada série
+INCREMENTAL = os.environ.get("BCB_INCREMENTAL", "1") == "1"
+# Dias de sobreposição com a última coleta, para capturar revisões de valores já publicados
+OVERLAP_DAYS = int(os.environ.get("BCB_OVERLAP_DAYS", "7"))
 
-# Formata as datas para o formato da API (dd/MM/yyyy)
-start_date_str = start_date.strftime('%d/%m/%Y')
-end_date_str = end_date.strftime('%d/%m/%Y')
+# Backfill do histórico completo: o SGS limita as consultas de séries diárias a janelas de 10 anos,
+# então o período é dividido em janelas de BCB_CHUNK_YEARS anos baixadas em paralelo
+CHUNK_YEARS = int(os.environ.get("BCB_CHUNK_YEARS", "10"))
+BACKFILL_START = os.environ.get("BCB_BACKFILL_START", "01/01/1980")
+BACKFILL_WORKERS = int(os.environ.get("BCB_BACKFILL_WORKERS", "4"))
 
-# Define os códigos das séries e nomes dos arquivos
-series = {
-    '11': 'selic',
-    '433': 'ipca',
-    '1': 'cambio_ptax_venda' # Dólar PTAX Venda
-}
+# Códigos SGS das séries do BCB -> nomes dos arquivos (declarados em series_registry.json)
+series = {entry['codigo']: entry['id'] for entry in series_registry.by_source('bcb')}
 
 # Diretório para salvar os arquivos
 save_dir = 'dados_economicos'
 
-# Cria o diretório se não existir
-import os
-os.makedirs(save_dir, exist_ok=True)
+# Arquivo de estado com a última data coletada de cada série (high-water mark)
+STATE_FILE = os.path.join(save_dir, 'bcb_state.json')
+
+# Janelas já baixadas pelo backfill (uma por arquivo); permitem retomar um backfill interrompido
+BACKFILL_DIR = os.path.join(save_dir, 'backfill')
+
+# Formato de data usado pela API do BCB (dd/MM/yyyy)
+BCB_DATE_FORMAT = '%d/%m/%Y'
 
-# Função para buscar dados da API do BCB
-def fetch_bcb_data(series_code, start_date, end_date):
-    url = f"https://api.bcb.gov.br/dados/serie/bcdata.sgs.{series_code}/dados?formato=json&dataInicial={start_date}&dataFinal={end_date}"
+def bcb_url(series_code, start_date, end_date):
+    return f"https://api.bcb.gov.br/dados/serie/bcdata.sgs.{series_code}/dados?formato=json&dataInicial={start_date}&dataFinal={end_date}"
+
+def download_bcb_data(series_code, start_date, end_date, file_path, session, cache_key=None, conditional=False):
+    """Baixa a resposta da API do BCB direto para o disco, em blocos, sem montar a lista em memória.
+
+    Retorna o http_client.FetchResult (com unchanged=True para um 304 ou corpo idêntico ao da última
+    coleta, quando conditional=True), ou None em caso de erro.
+    """
+    url = bcb_url(series_code, start_date, end_date)
     try:
-        response = requests.get(url, timeout=60)
-        response.raise_for_status() # Lança exceção para erros HTTP
-        return response.json()
-    except requests.exceptions.RequestException as e:
+        return session.fetch(cache_key or f"bcb_{series_code}", url, file_path=file_path, conditional=conditional, timeout=60)
+    except (requests.exceptions.RequestException, IOError) as e:
         print(f"Erro ao buscar dados para a série {series_code}: {e}")
         return None
 
-# Busca e salva os dados para cada série
-for code, name in series.items():
-    print(f"Buscando dados para {name} (SGS {code})...")
-    data = fetch_bcb_data(code, start_date_str, end_date_str)
-    if data:
-        file_path = os.path.join(save_dir, f"{name}.json")
-        try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=4)
-            print(f"Dados de {name} salvos em {file_path}")
-        except IOError as e:
-            print(f"Erro ao salvar o arquivo {file_path}: {e}")
-    else:
-        print(f"Não foi possível obter dados para {name}.")
-
-print("Coleta de dados do BCB concluída.")
+def parse_bcb_date(date_str):
+    """Converte uma data no formato do BCB (dd/mm/yyyy) em datetime.date."""
+    return datetime.datetime.strptime(date_str, BCB_DATE_FORMAT).date()
+
+def load_state():
+    """Lê o arquivo de estado com a última data coletada de cada série."""
+    if not os.path.exists(STATE_FILE):
+        return {}
+    try:
+        with open(STATE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (IOError, json.JSONDecodeError) as e:
+        print(f"Erro ao ler o arquivo de estado {STATE_FILE}: {e}. Ignorando estado anterior.")
+        return {}
+
+def save_state(state):
+    """Grava o arquivo de estado com a última data coletada de cada série."""
+    try:
+        with open(STATE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=4)
+    except IOError as e:
+        print(f"Erro ao salvar o arquivo de estado {STATE_FILE}: {e}")
+
+def iter_existing_series(file_path):
+    """Itera os pontos já salvos de uma série (vazio se o arquivo não existir)."""
+    if not os.path.exists(file_path):
+        return
+    try:
+        yield from json_stream.iter_json_records(file_path)
+    except (IOError, ValueError) as e:
+        print(f"Erro ao ler o arquivo existente {file_path}: {e}. Pontos restantes ignorados.")
+
+def last_saved_date(file_path):
+    """Retorna a data do último ponto salvo de uma série, lendo o arquivo em streaming."""
+    last_item = None
+    for last_item in iter_existing_series(file_path):
+        pass
+    return last_item.get('data') if last_item else None
+
+def get_start_date(last_date_str, end_date):
+    """Define a data inicial da coleta a partir da última data já coletada (com sobreposição)."""
+    if INCREMENTAL and last_date_str:
+        start_date = parse_bcb_date(last_date_str) - datetime.timedelta(days=OVERLAP_DAYS)
+        return min(start_date, end_date)
+    return end_date - datetime.timedelta(days=FULL_WINDOW_DAYS)
+
+def merge_series(existing, new_points):
+    """Combina, em streaming, os pontos existentes com os novos; os novos prevalecem na mesma data (revisões).
+
+    As duas entradas devem estar ordenadas por data (como a API e os arquivos salvos).
+    """
+    keyed_existing = ((parse_bcb_date(item['data']), 0, item) for item in existing if item.get('data'))
+    keyed_new = ((parse_bcb_date(item['data']), 1, item) for item in new_points if item.get('data'))
+    previous = None
+    for date, _, item in heapq.merge(keyed_existing, keyed_new, key=lambda keyed: keyed[:2]):
+        if previous is not None and previous[0] != date:
+            yield previous[1]
+        previous = (date, item)
+    if previous is not None:
+        yield previous[1]
+
+def saved_last_date(name, file_path):
+    """Retorna a data (dd/mm/yyyy) do último ponto salvo, no armazenamento colunar ou no JSON."""
+    if "arrow" in columnar_store.DATA_FORMATS:
+        last = columnar_store.last_date(name)
+        return last.strftime(BCB_DATE_FORMAT) if last else None
+    return last_saved_date(file_path)
+
+def update_series(code, name, state, end_date, session=None):
+    """Busca os pontos novos de uma série, mescla aos dados locais e atualiza o estado.
+
+    Retorna o número de pontos recebidos (0 se a resposta não mudou desde a última coleta) ou None em caso de erro.
+    """
+    with http_client.client_scope(session) as http:
+        return _update_series(code, name, state, end_date, http)
+
+def _update_series(code, name, state, end_date, http):
+    file_path = os.path.join(save_dir, f"{name}.json")
+    download_path = os.path.join(save_dir, f".{name}.download.json")
+    use_arrow = "arrow" in columnar_store.DATA_FORMATS
+    use_json = "json" in columnar_store.DATA_FORMATS
+    has_arrow = INCREMENTAL and use_arrow and columnar_store.has_series(name)
+    has_json = INCREMENTAL and use_json and os.path.exists(file_path)
+    has_existing = has_arrow or has_json
+
+    # Sem estado salvo, usa a última data dos próprios dados locais como high-water mark
+    last_date_str = state.get(name)
+    if not last_date_str and has_existing:
+        last_date_str = saved_last_date(name, file_path)
+
+    start_date = get_start_date(last_date_str if has_existing else None, end_date)
+    start_date_str = start_date.strftime(BCB_DATE_FORMAT)
+    end_date_str = end_date.strftime(BCB_DATE_FORMAT)
+
+    print(f"Buscando dados para {name} (SGS {code}) de {start_date_str} a {end_date_str}...")
+    # Só compara com a última coleta se os dados locais existem (senão a resposta precisa ser gravada)
+    result = download_bcb_data(code, start_date_str, end_date_str, download_path, http,
+                               cache_key=f"bcb_{name}", conditional=has_existing)
+    if result is None:
+        print(f"Não foi possível obter dados para {name}." if not has_existing else f"Dados locais de {name} mantidos.")
+        return None
+    if result.unchanged:
+        print(f"Dados de {name} sem alterações desde a última coleta; processamento e gravação ignorados.")
+        if os.path.exists(download_path):
+            os.remove(download_path)
+        return 0
+    downloaded_bytes = result.size
+
+    try:
+        received, total = store_points(name, file_path, lambda: json_stream.iter_json_records(download_path),
+                                       merge_arrow=has_arrow, merge_json=has_json)
+        print(f"{received} pontos recebidos ({downloaded_bytes} bytes); {total} pontos nos dados locais.")
+        if total:
+            state[name] = saved_last_date(name, file_path)
+        http.commit(result)
+        return received
+    except (IOError, ValueError, pa.ArrowException) as e:
+        print(f"Erro ao salvar os dados de {name}: {e}")
+        return None
+    finally:
+        if os.path.exists(download_path):
+            os.remove(download_path)
+
+def store_points(name, file_path, new_points_factory, merge_arrow, merge_json):
+    """Grava os pontos novos nos formatos configurados, mesclando-os aos dados locais quando pedido.
+
+    new_points_factory devolve um iterador novo dos pontos (ordenados por data) a cada chamada, já que
+    cada formato consome os pontos uma vez. Retorna (pontos recebidos, pontos nos dados locais).
+    """
+    use_arrow = "arrow" in columnar_store.DATA_FORMATS
+    use_json = "json" in columnar_store.DATA_FORMATS
+    received = {"pontos": 0}
+    def count_received(points):
+        for point in points:
+            received["pontos"] += 1
+            yield point
+
+    total = 0
+    if use_arrow:
+        total = columnar_store.save_series(name, count_received(new_points_factory()), merge=merge_arrow)
+    if use_json:
+        # Exportação JSON opcional: mescla em streaming com o arquivo existente
+        existing = iter_existing_series(file_path) if merge_json else []
+        new_points = new_points_factory()
+        if not use_arrow:
+            new_points = count_received(new_points)
+        total, _ = json_stream.write_json_records(file_path, merge_series(existing, new_points))
+        print(f"Dados de {name} salvos em {file_path}")
+    return received["pontos"], total
+
+def add_years(date, years):
+    """Soma anos a uma data (29/02 vira 28/02 em anos não bissextos)."""
+    try:
+        return date.replace(year=date.year + years)
+    except ValueError:
+        return date.replace(year=date.year + years, day=28)
+
+def split_date_range(start_date, end_date, years=CHUNK_YEARS):
+    """Divide [start_date, end_date] em janelas consecutivas, sem sobreposição, de no máximo `years` anos."""
+    chunks = []
+    chunk_start = start_date
+    while chunk_start <= end_date:
+        chunk_end = min(add_years(chunk_start, years) - datetime.timedelta(days=1), end_date)
+        chunks.append((chunk_start, chunk_end))
+        chunk_start = chunk_end + datetime.timedelta(days=1)
+    return chunks
+
+def chunk_path(name, chunk_start, chunk_end):
+    return os.path.join(BACKFILL_DIR, name, f"{chunk_start:%Y%m%d}_{chunk_end:%Y%m%d}.json")
+
+def fetch_chunk(code, name, chunk_start, chunk_end, http):
+    """Baixa uma janela do backfill para o disco. Retorna True se a janela foi gravada.
+
+    O arquivo só aparece no caminho final quando o download termina, então uma janela presente em
+    disco está completa. Uma janela sem dados (404 do SGS, ex.: antes do início da série) é gravada vazia.
+    """
+    path = chunk_path(name, chunk_start, chunk_end)
+    url = bcb_url(code, chunk_start.strftime(BCB_DATE_FORMAT), chunk_end.strftime(BCB_DATE_FORMAT))
+    try:
+        http.fetch(f"bcb_{name}_backfill", url, file_path=path, conditional=False, timeout=60)
+        return True
+    except requests.exceptions.HTTPError as e:
+        if e.response is not None and e.response.status_code == 404:
+            json_stream.write_json_records(path, [])
+            return True
+        print(f"Erro ao buscar a janela {chunk_start:%d/%m/%Y}-{chunk_end:%d/%m/%Y} de {name}: {e}")
+    except (requests.exceptions.RequestException, IOError) as e:
+        print(f"Erro ao buscar a janela {chunk_start:%d/%m/%Y}-{chunk_end:%d/%m/%Y} de {name}: {e}")
+    return False
+
+def iter_chunk_records(paths):
+    """Itera os pontos das janelas na ordem das datas (as janelas são consecutivas e ordenadas)."""
+    for path in paths:
+        yield from json_stream.iter_json_records(path)
+
+def backfill_series(code, name, state, start_date, end_date, session=None, workers=BACKFILL_WORKERS):
+    """Baixa o histórico de uma série em janelas de CHUNK_YEARS anos, em paralelo, e o mescla aos dados locais.
+
+    Janelas já baixadas por uma execução anterior interrompida são reaproveitadas. Os arquivos das janelas
+    são apagados depois que a série mesclada é gravada. Retorna o número de pontos recebidos ou None.
+    """
+    file_path = os.path.join(save_dir, f"{name}.json")
+    chunks = split_date_range(start_date, end_date)
+    paths = [chunk_path(name, chunk_start, chunk_end) for chunk_start, chunk_end in chunks]
+    pending = [chunk for chunk, path in zip(chunks, paths) if not os.path.exists(path)]
+    print(f"Backfill de {name} (SGS {code}) de {start_date:%d/%m/%Y} a {end_date:%d/%m/%Y}: "
+          f"{len(chunks)} janelas de até {CHUNK_YEARS} anos, {len(chunks) - len(pending)} já baixadas.")
+
+    os.makedirs(os.path.join(BACKFILL_DIR, name), exist_ok=True)
+    with http_client.client_scope(session) as http:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            completed = list(executor.map(lambda chunk: fetch_chunk(code, name, chunk[0], chunk[1], http), pending))
+    if not all(completed):
+        print(f"{completed.count(False)} janelas de {name} falharam; execute o backfill novamente para retomar.")
+        return None
+
+    try:
+        received, total = store_points(
+            name, file_path, lambda: iter_chunk_records(paths),
+            merge_arrow=columnar_store.has_series(name), merge_json=os.path.exists(file_path)
+        )
+    except (IOError, ValueError, pa.ArrowException) as e:
+        print(f"Erro ao salvar os dados de {name}: {e}")
+        return None
+    print(f"Backfill de {name}: {received} pontos recebidos; {total} pontos nos dados locais.")
+    if total:
+        state[name] = saved_last_date(name, file_path)
+    shutil.rmtree(os.path.join(BACKFILL_DIR, name), ignore_errors=True)
+    return received
+
+def main():
+    parser = argparse.ArgumentParser(description="Coleta as séries do BCB (SGS).")
+    parser.add_argument("--backfill", action="store_true",
+                        help=f"Baixa o histórico completo em janelas de {CHUNK_YEARS} anos (retomável).")
+    parser.add_argument("--start", default=BACKFILL_START, help="Data inicial do backfill (dd/mm/aaaa).")
+    parser.add_argument("--series", nargs="+", choices=list(series.values()), help="Séries a coletar (padrão: todas).")
+    args = parser.parse_args()
+
+    # Cria o diretório se não existir
+    os.makedirs(save_dir, exist_ok=True)
+
+    end_date = datetime.date.today()
+    state = load_state()
+    selected = {code: name for code, name in series.items() if not args.series or name in args.series}
+
+    # Busca e salva os dados para cada série (o cliente grava o cache HTTP ao ser fechado)
+    with http_client.HttpClient() as session:
+        for code, name in selected.items():
+            if args.backfill:
+                backfill_series(code, name, state, parse_bcb_date(args.start), end_date, session=session)
+            else:
+                update_series(code, name, state, end_date, session=session)
+
+    save_state(state)
+    print("Coleta de dados do BCB concluída.")
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+# Coletor genérico de tabelas do IBGE SIDRA (https://apisidra.ibge.gov.br).
+# Cada série é declarada em series_registry.json (fonte "sidra": tabela, variável, classificação,
+# frequência e precisão) e convertida em uma especificação em SIDRA_TABLES; a URL é montada a partir dela. Com dados locais já salvos, apenas os últimos SIDRA_LAST_PERIODS
+# períodos são pedidos (p/last N) e mesclados ao histórico, o que também captura revisões recentes.
+# As tabelas são buscadas em paralelo com o http_client.HttpClient compartilhado.
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import requests
+
+import columnar_store
+import http_client
+import json_stream
+import series_registry
+
+SIDRA_API_URL = "https://apisidra.ibge.gov.br/values"
+
+# Séries do SIDRA: nome da série -> especificação
+#   tabela/variavel: códigos do SIDRA; nivel: nível territorial (n1/1 = Brasil)
+#   classificacao: filtros de classificação/categoria (opcional); decimais: casas decimais do valor
+#   periodicidade: "trimestral" (AAAATT), "mensal" (AAAAMM), "trimestre_movel" (AAAAMM do último mês) ou "anual"
+def table_spec(entry):
+    """Especificação de uma série do registro (fonte "sidra"): codigo é a tabela e o bloco "sidra" traz o restante."""
+    return {
+        "tabela": int(entry["codigo"]),
+        "variavel": entry["sidra"]["variavel"],
+        "nivel": entry["sidra"].get("nivel", "n1/1"),
+        "classificacao": entry["sidra"].get("classificacao"),
+        "decimais": entry["precisao"],
+        "periodicidade": entry["frequencia"],
+    }
+
+SIDRA_TABLES = {entry["id"]: table_spec(entry) for entry in series_registry.by_source("sidra")}
+
+# Modo incremental: com a série já salva, pede apenas os últimos N períodos (p/last N)
+INCREMENTAL = os.environ.get("SIDRA_INCREMENTAL", "1") == "1"
+LAST_PERIODS = int(os.environ.get("SIDRA_LAST_PERIODS", "8"))
+# Número máximo de tabelas buscadas ao mesmo tempo
+MAX_WORKERS = int(os.environ.get("SIDRA_MAX_WORKERS", "4"))
+
+OUTPUT_DIR = "dados_economicos"
+
+# Rótulos das dimensões de período no cabeçalho da resposta (D<n>N)
+PERIOD_LABELS = {"Trimestre", "Mês", "Trimestre Móvel", "Ano"}
+
+def json_path(name):
+    return os.path.join(OUTPUT_DIR, f"{name}.json")
+
+def build_url(spec, last_periods=None):
+    """Monta a URL da API SIDRA de uma especificação (todos os períodos ou apenas os últimos N)."""
+    periods = f"last%20{last_periods}" if last_periods else "all"
+    parts = [SIDRA_API_URL, f"t/{spec['tabela']}", spec.get("nivel", "n1/1"), f"v/{spec['variavel']}", f"p/{periods}"]
+    if spec.get("classificacao"):
+        parts.append(spec["classificacao"])
+    parts.append(f"d/v{spec['variavel']}%20{spec.get('decimais', 2)}")
+    return "/".join(parts)
+
+def period_key(header, default="D3C"):
+    """Encontra no cabeçalho a coluna com o código do período (ex.: D3C quando D3N é "Trimestre")."""
+    for n in range(1, 10):
+        if header.get(f"D{n}N") in PERIOD_LABELS:
+            return f"D{n}C"
+    return default
+
+def period_codes_to_dates(codes, periodicity):
+    """Converte códigos de período do SIDRA (Series de str) no último dia de cada período, de forma vetorizada.
+
+    Trimestral: AAAATT (trimestre 01-04); mensal e trimestre móvel: AAAAMM (no trimestre móvel, o último
+    mês do trimestre); anual: AAAA. Códigos inválidos viram NaT.
+    """
+    codes = codes.astype("string").str.strip()
+    year = pd.to_numeric(codes.str[:4], errors="coerce").astype("float64")
+    if periodicity == "anual":
+        month = pd.Series(12.0, index=codes.index)
+    else:
+        sub = pd.to_numeric(codes.str[4:6], errors="coerce").astype("float64")
+        if periodicity == "trimestral":
+            month = sub.where(sub.between(1, 4)) * 3
+        elif periodicity in ("mensal", "trimestre_movel"):
+            month = sub.where(sub.between(1, 12))
+        else:
+            raise ValueError(f"Periodicidade desconhecida: {periodicity}")
+    # Meses desde 1970-01 -> primeiro dia do mês seguinte - 1 dia = último dia do mês
+    month_index = (year - 1970) * 12 + (month - 1)
+    valid = month_index.notna().to_numpy()
+    dates = np.full(len(codes), np.datetime64("NaT"), dtype="datetime64[D]")
+    next_month = month_index.to_numpy()[valid].astype(np.int64).astype("datetime64[M]") + 1
+    dates[valid] = next_month.astype("datetime64[D]") - 1
+    return pd.Series(dates.astype("datetime64[ns]"), index=codes.index)
+
+def process_sidra_data(raw_data, spec):
+    """Converte a resposta da API SIDRA em um DataFrame ordenado (data_referencia, valor).
+
+    O primeiro item da resposta é o cabeçalho; valores como "...", "-" ou "X" (não disponível) são descartados.
+    """
+    if not raw_data or len(raw_data) <= 1:
+        return pd.DataFrame({"data_referencia": pd.Series(dtype="datetime64[ns]"), "valor": pd.Series(dtype="float64")})
+    header, rows = raw_data[0], pd.DataFrame(raw_data[1:])
+    dates = period_codes_to_dates(rows[period_key(header)], spec["periodicidade"])
+    values = pd.to_numeric(rows["V"], errors="coerce")
+    frame = pd.DataFrame({"data_referencia": dates, "valor": values}).dropna()
+    return frame.drop_duplicates("data_referencia", keep="last").sort_values("data_referencia").reset_index(drop=True)
+
+def read_existing(name):
+    """Lê a série já salva (armazenamento colunar ou JSON) como DataFrame (data_referencia, valor), ou None."""
+    if "arrow" in columnar_store.DATA_FORMATS:
+        return columnar_store.read_series_frame(name)
+    if os.path.exists(json_path(name)):
+        frame = pd.DataFrame(list(json_stream.iter_json_records(json_path(name))))
+        if frame.empty:
+            return None
+        return pd.DataFrame({"data_referencia": pd.to_datetime(frame["data_referencia"]), "valor": frame["valor"].astype("float64")})
+    return None
+
+def to_records(frame):
+    return [
+        {"data_referencia": date_str, "valor": float(valor)}
+        for date_str, valor in zip(frame["data_referencia"].dt.strftime("%Y-%m-%d"), frame["valor"])
+    ]
+
+def update_table(name, session=None, incremental=None):
+    """Busca uma série do SIDRA, mescla aos dados locais e grava nos formatos configurados.
+
+    Retorna o número de períodos recebidos (0 se a resposta não mudou desde a última coleta) ou None em caso de erro.
+    """
+    spec = SIDRA_TABLES[name]
+    incremental = INCREMENTAL if incremental is None else incremental
+    # Só pede os últimos períodos e compara com a última coleta se a série já está salva
+    has_existing = columnar_store.has_saved_series(name, json_path(name))
+    url = build_url(spec, LAST_PERIODS if incremental and has_existing else None)
+    print(f"Buscando {name} (SIDRA tabela {spec['tabela']}, variável {spec['variavel']}): {url}")
+
+    with http_client.client_scope(session) as http:
+        try:
+            result = http.fetch(f"sidra_{name}", url, conditional=has_existing, timeout=60)
+            if result.unchanged:
+                print(f"Dados de {name} sem alterações desde a última coleta; processamento e gravação ignorados.")
+                return 0
+            frame = process_sidra_data(result.json(), spec)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Erro ao buscar dados de {name} na API SIDRA: {e}")
+            return None
+        received = len(frame)
+        print(f"{received} períodos válidos recebidos para {name}.")
+        if received == 0:
+            return None
+
+        try:
+            existing = read_existing(name) if incremental and has_existing else None
+            if existing is not None and not existing.empty:
+                # Os períodos recebidos prevalecem sobre os salvos (revisões)
+                frame = pd.concat([existing, frame], ignore_index=True)
+                frame = frame.drop_duplicates("data_referencia", keep="last").sort_values("data_referencia")
+            os.makedirs(OUTPUT_DIR, exist_ok=True)
+            total = columnar_store.save_series(name, to_records(frame), json_path=json_path(name))
+        except (IOError, ValueError, pa.ArrowException) as e:
+            print(f"Erro ao salvar os dados de {name}: {e}")
+            return None
+        print(f"{total} períodos nos dados locais de {name}.")
+        http.commit(result)
+        return received
+
+def update_tables(names=None, session=None, incremental=None, max_workers=MAX_WORKERS):
+    """Busca várias séries do SIDRA em paralelo. Retorna {série: resultado de update_table}."""
+    names = list(names or SIDRA_TABLES)
+    with http_client.client_scope(session) as http:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(names)))) as executor:
+            results = executor.map(lambda name: update_table(name, session=http, incremental=incremental), names)
+            return dict(zip(names, results))
+
+def main():
+    parser = argparse.ArgumentParser(description="Coleta séries do IBGE SIDRA.")
+    parser.add_argument("--series", nargs="+", choices=list(SIDRA_TABLES), help="Séries a coletar (padrão: todas).")
+    parser.add_argument("--full", action="store_true", help="Pede todos os períodos, ignorando o modo incremental.")
+    args = parser.parse_args()
+
+    incremental = False if args.full else None
+    for name, received in update_tables(args.series, incremental=incremental).items():
+        print(f"  {name:<20} {'erro ou sem dados' if received is None else f'{received} períodos'}")
+    print("Coleta de dados do SIDRA concluída.")
+
+if __name__ == "__main__":
+    main()
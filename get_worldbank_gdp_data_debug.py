@@ -1,86 +1,140 @@
 # -*- coding: utf-8 -*-
+# Coleta os indicadores do World Bank declarados em series_registry.json (fonte "worldbank"; codigo é o
+# código do indicador, por exemplo NY.GDP.MKTP.CD = PIB em US$ correntes, e worldbank.pais o país).
 import requests
 import json
 from datetime import datetime
 import os
 
-# Indicador do World Bank para PIB (US$ correntes)
-INDICATOR_CODE = "NY.GDP.MKTP.CD"
-# Código do país para o Brasil
-COUNTRY_CODE = "BRA"
+import columnar_store
+import http_client
+import series_registry
+
 # Formato da resposta da API
 FORMAT = "json"
 # Número de resultados por página (tentar obter todos os dados anuais em uma página)
 PER_PAGE = "1000" # Dados anuais, 1000 deve ser suficiente para cobrir muitos anos
 
-# Construir a URL da API
 # Exemplo de URL: http://api.worldbank.org/v2/country/br/indicator/NY.GDP.MKTP.CD?format=json&per_page=100
-API_URL = f"http://api.worldbank.org/v2/country/{COUNTRY_CODE}/indicator/{INDICATOR_CODE}?format={FORMAT}&per_page={PER_PAGE}"
+API_BASE_URL = "http://api.worldbank.org/v2"
 
-# Arquivo de saída
+# Arquivos de saída
 OUTPUT_DIR = "dados_economicos"
-OUTPUT_FILE = os.path.join(OUTPUT_DIR, "gdp_worldbank_usd.json") # Nome de arquivo mais descritivo
-
-print(f"Buscando dados do PIB (US$ correntes) para o {COUNTRY_CODE} do World Bank.")
-print(f"URL da API: {API_URL}")
-
-processed_gdp_data = []
-
-try:
-    response = requests.get(API_URL, timeout=60)
-    response.raise_for_status()  # Lança uma exceção para códigos de status HTTP ruins (4xx ou 5xx)
-    raw_data = response.json()
-
-    # A API do World Bank retorna uma lista. O primeiro item [0] são metadados da página.
-    # O segundo item [1] é uma lista dos dados reais.
-    if raw_data and isinstance(raw_data, list) and len(raw_data) > 1 and raw_data[1]:
-        data_points = raw_data[1]
-        print(f"Recebidos {len(data_points)} pontos de dados do World Bank.")
-
-        for point in data_points:
-            year_str = point.get("date")
-            value = point.get("value")
-            country_iso3 = point.get("countryiso3code")
-
-            if country_iso3 == COUNTRY_CODE and year_str and value is not None:
-                try:
-                    year = int(year_str)
-                    # Usar o final do ano como data de referência
-                    date_obj = datetime(year, 12, 31)
-                    date_referencia = date_obj.strftime("%Y-%m-%d")
-                    processed_gdp_data.append({
-                        "data_referencia": date_referencia,
-                        "valor": float(value)
-                    })
-                except ValueError:
-                    print(f"Formato de ano inválido ou valor não numérico: ano 	'{year_str}	', valor 	'{value}	'. Pulando.")
-                    continue
-        
-        # Ordenar os dados por data
-        processed_gdp_data.sort(key=lambda x: x["data_referencia"])
-        print(f"Processamento concluído. {len(processed_gdp_data)} registros de PIB (World Bank) válidos foram extraídos.")
-    else:
-        print("Nenhum dado encontrado na resposta da API do World Bank ou formato inesperado.")
-        if raw_data and isinstance(raw_data, list) and len(raw_data) > 0:
-            print(f"Metadados da API: {raw_data[0]}")
-
-except requests.exceptions.RequestException as e:
-    print(f"Erro ao buscar dados da API do World Bank: {e}")
-except json.JSONDecodeError as e:
-    print(f"Erro ao decodificar JSON da resposta da API do World Bank: {e}")
-except Exception as e:
-    print(f"Um erro inesperado ocorreu: {e}")
-
-# Salvar dados processados em arquivo JSON
-try:
-    # Criar o diretório se não existir
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(processed_gdp_data, f, ensure_ascii=False, indent=4)
-    print(f"Dados do PIB (World Bank) salvos com sucesso em: {OUTPUT_FILE}")
-except IOError as e:
-    print(f"Erro ao salvar dados do PIB (World Bank) em arquivo JSON: {e}")
-except Exception as e:
-    print(f"Um erro inesperado ocorreu ao salvar o arquivo: {e}")
 
+def api_url(entry):
+    """URL da API para uma série do registro."""
+    country = entry.get("worldbank", {}).get("pais", "BRA")
+    return f"{API_BASE_URL}/country/{country}/indicator/{entry['codigo']}?format={FORMAT}&per_page={PER_PAGE}"
+
+def fetch_indicator_data(session, entry, conditional=False):
+    """Busca e processa uma série do World Bank com o http_client.HttpClient compartilhado.
+
+    Retorna (FetchResult, dados processados); com conditional=True, uma resposta 304 ou idêntica à da
+    última coleta volta com result.unchanged=True e sem dados processados. Em caso de erro, result é None.
+    """
+    country_code = entry.get("worldbank", {}).get("pais", "BRA")
+    url = api_url(entry)
+    print(f"Buscando {entry['nome']} ({entry['codigo']}) para o {country_code} do World Bank.")
+    print(f"URL da API: {url}")
+
+    processed_data = []
+    result = None
+
+    try:
+        result = session.fetch(f"worldbank_{entry['id']}", url, conditional=conditional, timeout=60)
+        if result.unchanged:
+            return result, processed_data
+        raw_data = result.json()
+
+        # A API do World Bank retorna uma lista. O primeiro item [0] são metadados da página.
+        # O segundo item [1] é uma lista dos dados reais.
+        if raw_data and isinstance(raw_data, list) and len(raw_data) > 1 and raw_data[1]:
+            data_points = raw_data[1]
+            print(f"Recebidos {len(data_points)} pontos de dados do World Bank.")
+
+            for point in data_points:
+                year_str = point.get("date")
+                value = point.get("value")
+                country_iso3 = point.get("countryiso3code")
+
+                if country_iso3 == country_code and year_str and value is not None:
+                    try:
+                        year = int(year_str)
+                        # Usar o final do ano como data de referência
+                        date_obj = datetime(year, 12, 31)
+                        date_referencia = date_obj.strftime("%Y-%m-%d")
+                        processed_data.append({
+                            "data_referencia": date_referencia,
+                            "valor": float(value)
+                        })
+                    except ValueError:
+                        print(f"Formato de ano inválido ou valor não numérico: ano 	'{year_str}	', valor 	'{value}	'. Pulando.")
+                        continue
+
+            # Ordenar os dados por data
+            processed_data.sort(key=lambda x: x["data_referencia"])
+            print(f"Processamento concluído. {len(processed_data)} registros válidos de {entry['id']} (World Bank) foram extraídos.")
+        else:
+            print("Nenhum dado encontrado na resposta da API do World Bank ou formato inesperado.")
+            if raw_data and isinstance(raw_data, list) and len(raw_data) > 0:
+                print(f"Metadados da API: {raw_data[0]}")
+
+    except requests.exceptions.RequestException as e:
+        print(f"Erro ao buscar dados da API do World Bank: {e}")
+        result = None
+    except json.JSONDecodeError as e:
+        print(f"Erro ao decodificar JSON da resposta da API do World Bank: {e}")
+        result = None
+    except Exception as e:
+        print(f"Um erro inesperado ocorreu: {e}")
+        result = None
+
+    return result, processed_data
+
+def output_file(series_id):
+    return os.path.join(OUTPUT_DIR, f"{series_id}.json")
+
+def save_indicator_data(series_id, processed_data):
+    """Salva os dados processados de uma série do World Bank. Retorna True em caso de sucesso."""
+    try:
+        # Criar o diretório se não existir
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+        # Armazenamento colunar por padrão; o JSON é gravado quando DATA_FORMATS inclui "json"
+        columnar_store.save_series(series_id, processed_data, json_path=output_file(series_id))
+        print(f"Dados de {series_id} (World Bank) salvos com sucesso.")
+        return True
+    except IOError as e:
+        print(f"Erro ao salvar dados de {series_id} (World Bank) em arquivo JSON: {e}")
+    except Exception as e:
+        print(f"Um erro inesperado ocorreu ao salvar o arquivo: {e}")
+    return False
+
+def update_indicator(series_id, session=None):
+    """Coleta e grava uma série do World Bank. Retorna o número de registros recebidos (0 sem alterações)
+    ou None em caso de falha ou resposta sem dados (a série salva é mantida)."""
+    entry = series_registry.get(series_id)
+    with http_client.client_scope(session) as http:
+        # Só compara com a última coleta se a série já está salva (senão a resposta precisa ser gravada)
+        has_existing = columnar_store.has_saved_series(series_id, output_file(series_id))
+        result, processed_data = fetch_indicator_data(http, entry, conditional=has_existing)
+        if result is None:
+            return None
+        if result.unchanged:
+            print(f"Dados de {series_id} (World Bank) sem alterações desde a última coleta; processamento e gravação ignorados.")
+            return 0
+        if not processed_data:
+            # Uma resposta vazia não sobrescreve a série salva
+            print(f"Nenhum registro válido recebido para {series_id} (World Bank); a série salva foi mantida.")
+            return None
+        if save_indicator_data(series_id, processed_data):
+            http.commit(result)
+        return len(processed_data)
+
+def main(session=None):
+    """Coleta todas as séries do World Bank do registro. Retorna {série: registros recebidos}."""
+    with http_client.client_scope(session) as http:
+        return {entry["id"]: update_indicator(entry["id"], session=http) for entry in series_registry.by_source("worldbank")}
+
+if __name__ == "__main__":
+    main()
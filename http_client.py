@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+# Cliente HTTP compartilhado pelos coletores (BCB, IBGE SIDRA e World Bank):
+#   - conexões keep-alive e respostas comprimidas (gzip/deflate);
+#   - limite de requisições simultâneas (inclusive a leitura de corpos em streaming) e intervalo
+#     mínimo entre requisições por host;
+#   - novas tentativas com backoff exponencial e jitter em erros de conexão, timeouts, 429 e 5xx
+#     (respeitando o cabeçalho Retry-After);
+#   - requisições condicionais (If-None-Match / If-Modified-Since) com os validadores e o hash do
+#     corpo guardados em dados_economicos/http_cache.json: uma resposta 304 ou um corpo idêntico ao
+#     da última coleta é marcado como inalterado, e o coletor não precisa processar nem gravar nada.
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import json_stream
+import metrics
+
+# Número máximo de requisições simultâneas para um mesmo host
+MAX_PER_HOST = int(os.environ.get("FETCH_MAX_PER_HOST", "3"))
+# Intervalo mínimo (s) entre o início de duas requisições para um mesmo host
+MIN_INTERVAL = float(os.environ.get("HTTP_MIN_INTERVAL", "0.2"))
+# Novas tentativas após a primeira falha, espera base (s) e espera máxima (s) entre tentativas
+RETRIES = int(os.environ.get("HTTP_RETRIES", "4"))
+BACKOFF = float(os.environ.get("HTTP_BACKOFF", "1.0"))
+BACKOFF_MAX = float(os.environ.get("HTTP_BACKOFF_MAX", "30"))
+# Requisições condicionais e detecção de corpo idêntico (HTTP_CONDITIONAL=0 sempre processa a resposta)
+CONDITIONAL = os.environ.get("HTTP_CONDITIONAL", "1") == "1"
+CACHE_FILE = os.path.join("dados_economicos", "http_cache.json")
+
+# Códigos de status que valem uma nova tentativa
+RETRY_STATUS = {429, 500, 502, 503, 504}
+# Erros de rede que valem uma nova tentativa (inclusive durante a leitura do corpo)
+RETRY_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+def backoff_delay(attempt, backoff=BACKOFF, backoff_max=BACKOFF_MAX):
+    """Returns the wait before retry number attempt (0-based): exponential with full jitter, capped."""
+    return min(backoff_max, backoff * (2 ** attempt)) * random.uniform(0.5, 1.0)
+
+def retry_after_seconds(response):
+    """Returns the Retry-After header of a response in seconds (only the numeric form), or None."""
+    value = response.headers.get("Retry-After")
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+def release_on_close(response, semaphore):
+    """Keeps a host slot taken while a streamed body is read: releases it (once) when the response is closed."""
+    close = response.close
+    released = False
+
+    def close_and_release():
+        nonlocal released
+        try:
+            close()
+        finally:
+            if not released:
+                released = True
+                semaphore.release()
+
+    response.close = close_and_release
+
+class HttpCache:
+    """Per-resource validators (ETag, Last-Modified) and body hashes from previous fetches, kept in a JSON file.
+
+    Entries are keyed by a stable name chosen by the fetcher (e.g. the series name), since some URLs change
+    between runs (BCB date windows); validators are only sent when the URL is the same as last time.
+    """
+
+    def __init__(self, path=CACHE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = self._load()
+        self._dirty = False
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (IOError, json.JSONDecodeError) as e:
+            print(f"Erro ao ler o cache HTTP {self.path}: {e}. Ignorando cache anterior.")
+            return {}
+
+    def conditional_headers(self, key, url):
+        """Returns If-None-Match / If-Modified-Since headers for key, when the last fetch used the same URL."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if not entry or entry.get("url") != url:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def matches(self, key, digest):
+        """True when digest is the body hash recorded for key."""
+        with self._lock:
+            entry = self._entries.get(key)
+        return bool(entry) and entry.get("sha256") == digest
+
+    def remember(self, key, url, response, digest):
+        """Records the URL, validators and body hash of a processed response."""
+        entry = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "sha256": digest,
+        }
+        with self._lock:
+            self._entries[key] = entry
+            self._dirty = True
+
+    def save(self):
+        """Writes the cache file (atomically) if anything changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = dict(self._entries)
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entries, f, ensure_ascii=False, indent=4)
+            os.replace(tmp_path, self.path)
+        except IOError as e:
+            print(f"Erro ao salvar o cache HTTP {self.path}: {e}")
+
+class FetchResult:
+    """Outcome of a conditional fetch: the response, the body size and sha256, and whether it is unchanged.
+
+    The body is in response.content, or in file_path when the fetch streamed it to disk. A 304 response
+    has no body (size 0, digest None).
+    """
+
+    def __init__(self, key, url, response, digest, size, unchanged, file_path=None):
+        self.key = key
+        self.url = url
+        self.response = response
+        self.digest = digest
+        self.size = size
+        self.unchanged = unchanged
+        self.file_path = file_path
+
+    def json(self):
+        return self.response.json()
+
+class HttpClient(requests.Session):
+    """requests.Session with per-host rate limiting, retries with backoff and conditional fetches."""
+
+    def __init__(self, max_per_host=MAX_PER_HOST, min_interval=MIN_INTERVAL, retries=RETRIES,
+                 backoff=BACKOFF, cache_file=CACHE_FILE):
+        super().__init__()
+        self.max_per_host = max_per_host
+        self.min_interval = min_interval
+        self.retries = retries
+        self.backoff = backoff
+        self.http_cache = HttpCache(cache_file)
+        self._host_semaphores = {}
+        self._next_start = {}
+        self._lock = threading.Lock()
+        # O requests já descomprime gzip/deflate; o cabeçalho é explícito para não depender do padrão
+        self.headers["Accept-Encoding"] = "gzip, deflate"
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=max_per_host)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def _semaphore_for(self, host):
+        with self._lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._host_semaphores[host]
+
+    def _wait_turn(self, host):
+        """Spaces out request starts to the same host by at least min_interval seconds."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start.get(host, now))
+            self._next_start[host] = start + self.min_interval
+        if start > now:
+            time.sleep(start - now)
+
+    def request(self, method, url, *args, **kwargs):
+        """Sends a request, retrying connection errors, timeouts, 429 and 5xx with exponential backoff and jitter.
+
+        The waits between attempts happen outside the host slot. With stream=True the slot stays taken until
+        the response is closed, so body reads also count against max_per_host.
+        """
+        host = urlparse(url).netloc
+        semaphore = self._semaphore_for(host)
+        for attempt in range(self.retries + 1):
+            semaphore.acquire()
+            try:
+                self._wait_turn(host)
+                response = super().request(method, url, *args, **kwargs)
+            except RETRY_ERRORS as e:
+                semaphore.release()
+                if attempt == self.retries:
+                    raise
+                metrics.inc("http_retries_total", host=host, reason=type(e).__name__)
+                delay = backoff_delay(attempt, self.backoff)
+                print(f"Falha de conexão com {host} ({type(e).__name__}); nova tentativa em {delay:.1f}s.")
+                time.sleep(delay)
+                continue
+            except BaseException:
+                semaphore.release()
+                raise
+            if kwargs.get("stream"):
+                release_on_close(response, semaphore)
+            else:
+                semaphore.release()
+            if response.status_code not in RETRY_STATUS or attempt == self.retries:
+                return response
+            delay = retry_after_seconds(response)
+            delay = backoff_delay(attempt, self.backoff) if delay is None else min(delay, BACKOFF_MAX)
+            metrics.inc("http_retries_total", host=host, reason=str(response.status_code))
+            print(f"{host} respondeu {response.status_code}; nova tentativa em {delay:.1f}s.")
+            response.close()
+            time.sleep(delay)
+
+    def fetch(self, key, url, file_path=None, conditional=CONDITIONAL, **kwargs):
+        """Conditional GET of url, keeping the body in memory or streaming it to file_path.
+
+        With conditional=True, sends the validators stored for key and marks the result as unchanged on a
+        304 or when the body hash equals the one recorded for key. Call commit() once the body has been
+        processed, so the next fetch compares against it. Raises requests exceptions (after the retries)
+        and requests.HTTPError for error statuses.
+        """
+        headers = dict(kwargs.pop("headers", None) or {})
+        if conditional:
+            headers.update(self.http_cache.conditional_headers(key, url))
+        with metrics.timer("http_fetch_seconds", series=key) as measured:
+            try:
+                result = self._fetch(key, url, file_path, conditional, headers, **kwargs)
+            except requests.exceptions.RequestException as e:
+                error = str(e.response.status_code) if e.response is not None else type(e).__name__
+                metrics.inc("http_errors_total", series=key, error=error)
+                metrics.log_event("http_fetch", serie=key, erro=error)
+                raise
+        status = result.response.status_code
+        metrics.inc("http_responses_total", series=key, status=str(status))
+        metrics.inc("http_response_bytes_total", result.size, series=key)
+        if result.unchanged:
+            metrics.inc("http_unchanged_total", series=key)
+        metrics.log_event("http_fetch", serie=key, status=status, segundos=round(measured["segundos"], 4),
+                          bytes=result.size, inalterado=result.unchanged)
+        return result
+
+    def _fetch(self, key, url, file_path, conditional, headers, **kwargs):
+        """Sends the GET and reads the body, redoing the request when the body is cut off mid-transfer."""
+        for attempt in range(self.retries + 1):
+            try:
+                with self.get(url, headers=headers, stream=file_path is not None, **kwargs) as response:
+                    if response.status_code == 304:
+                        return FetchResult(key, url, response, None, 0, unchanged=True, file_path=file_path)
+                    response.raise_for_status()
+                    if file_path is not None:
+                        hasher = hashlib.sha256()
+                        size = json_stream.download_to_file(response, file_path, hasher=hasher)
+                        digest = hasher.hexdigest()
+                    else:
+                        size = len(response.content)
+                        digest = hashlib.sha256(response.content).hexdigest()
+                break
+            except (requests.exceptions.ChunkedEncodingError, requests.exceptions.ContentDecodingError) as e:
+                # Corpo interrompido no meio da leitura: a requisição inteira é refeita
+                if attempt == self.retries:
+                    raise
+                delay = backoff_delay(attempt, self.backoff)
+                print(f"Resposta de {urlparse(url).netloc} interrompida ({type(e).__name__}); nova tentativa em {delay:.1f}s.")
+                time.sleep(delay)
+        unchanged = conditional and self.http_cache.matches(key, digest)
+        return FetchResult(key, url, response, digest, size, unchanged=unchanged, file_path=file_path)
+
+    def commit(self, result):
+        """Records the validators and body hash of a processed fetch (no-op for 304 responses)."""
+        if result.digest is not None:
+            self.http_cache.remember(result.key, result.url, result.response, result.digest)
+
+    def save_cache(self):
+        self.http_cache.save()
+
+    def close(self):
+        self.save_cache()
+        super().close()
+
+@contextmanager
+def client_scope(session=None):
+    """Yields session, or a new HttpClient that is closed (saving its HTTP cache) on exit."""
+    if session is not None:
+        yield session
+        return
+    with HttpClient() as client:
+        yield client
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+# Leitura e escrita incremental das séries em JSON, com memória limitada.
+# Os arquivos de dados_economicos/ são listas JSON de registros; aqui eles são lidos
+# registro a registro (sem carregar o documento inteiro) e gravados a partir de iteráveis.
+import json
+import os
+
+# Tamanho dos blocos lidos do disco ou da resposta HTTP
+READ_CHUNK_SIZE = 64 * 1024
+
+# JSON_COMPACT=1 grava um registro por linha, sem a indentação de 4 espaços
+JSON_COMPACT = os.environ.get("JSON_COMPACT", "0") == "1"
+
+_WHITESPACE = " \t\r\n"
+
+def iter_json_array(fp, chunk_size=READ_CHUNK_SIZE):
+    """Yields the items of a top-level JSON array from a text file object, reading it in chunks."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def read_more():
+        nonlocal buffer, pos, eof
+        chunk = fp.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        # Descarta o que já foi consumido para manter o buffer pequeno
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        return True
+
+    def next_char():
+        """Skips whitespace and returns the next significant character (or None at end of input)."""
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buffer):
+                return buffer[pos]
+            if not read_more():
+                return None
+
+    if next_char() != "[":
+        raise ValueError("O documento JSON não é uma lista.")
+    pos += 1
+
+    expect_separator = False
+    while True:
+        char = next_char()
+        if char is None:
+            raise ValueError("Lista JSON incompleta (fim do arquivo antes de ']').")
+        if char == "]":
+            return
+        if expect_separator:
+            if char != ",":
+                raise ValueError(f"Separador inesperado na lista JSON: {char!r}")
+            pos += 1
+            next_char()
+
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if read_more():
+                    continue
+                raise
+            # Um valor que termina exatamente no fim do buffer pode estar truncado (ex.: número)
+            if end == len(buffer) and not eof and read_more():
+                continue
+            break
+        pos = end
+        expect_separator = True
+        yield item
+
+def iter_json_records(file_path):
+    """Yields the records of a JSON list file (or newline-delimited JSON, for .ndjson files)."""
+    with open(file_path, "r", encoding="utf-8") as f:
+        if file_path.endswith(".ndjson"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from iter_json_array(f)
+
+def iter_chunks(iterable, size):
+    """Groups an iterable into lists of at most size items."""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def remove_partial_file(tmp_path):
+    """Removes a partially written temporary file after a failed write (ignoring a file never created)."""
+    try:
+        os.remove(tmp_path)
+    except OSError:
+        pass
+
+def write_json_records(file_path, records, compact=None):
+    """Writes an iterable of records as a JSON list, one record at a time.
+
+    Writes to a temporary file and replaces the target at the end, so the target can be one of the
+    inputs being streamed. Returns (number of records written, last record).
+    """
+    compact = JSON_COMPACT if compact is None else compact
+    tmp_path = f"{file_path}.tmp"
+    count = 0
+    last = None
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("[")
+            for item in records:
+                if compact:
+                    text = json.dumps(item, ensure_ascii=False, separators=(",", ":"))
+                else:
+                    # Mesmo resultado de json.dump(lista, indent=4)
+                    text = json.dumps(item, ensure_ascii=False, indent=4).replace("\n", "\n    ")
+                    text = "    " + text
+                f.write(("," if count else "") + "\n" + text)
+                count += 1
+                last = item
+            f.write("\n]" if count else "]")
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        remove_partial_file(tmp_path)
+        raise
+    return count, last
+
+def download_to_file(response, file_path, chunk_size=READ_CHUNK_SIZE, hasher=None):
+    """Streams an HTTP response body (requests, stream=True) to disk. Returns the number of bytes written.
+
+    When hasher (e.g. hashlib.sha256()) is given, it is updated with the body as it is written.
+    """
+    tmp_path = f"{file_path}.tmp"
+    total_bytes = 0
+    try:
+        with open(tmp_path, "wb") as f:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                f.write(chunk)
+                if hasher is not None:
+                    hasher.update(chunk)
+                total_bytes += len(chunk)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        remove_partial_file(tmp_path)
+        raise
+    return total_bytes
@@ -1,10 +1,22 @@
 # -*- coding: utf-8 -*-
 import psycopg2
+import psycopg2.pool
+import hashlib
+import io
 import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import base64
 
+import columnar_store
+import db_pool
+import json_stream
+import metrics
+import series_registry
+from normalization import normalize_records
+
 def decode_base64(encoded_string):
     """Decodes a Base64 encoded string."""
     return base64.b64decode(encoded_string).decode('utf-8')
@@ -17,18 +29,48 @@ DB_USER = "postgres.exjrfoajzobkncnoompk"
 DB_PASSWORD = decode_base64("cHJvamV0b2JpMTIz")
 
 # --- File Paths ---
-DATA_DIR = "dados_economicos"
-FILES_TO_LOAD = {
-    "selic": os.path.join(DATA_DIR, "selic.json"),
-    "ipca": os.path.join(DATA_DIR, "ipca.json"),
-    "cambio_ptax_venda": os.path.join(DATA_DIR, "cambio_ptax_venda.json"),
-    "desemprego": os.path.join(DATA_DIR, "desemprego.json"),
-    "pib_trimestral": os.path.join(DATA_DIR, "pib_trimestral.json") # Added PIB
-}
+DATA_DIR = series_registry.DATA_DIR
+# Uma entrada por série do registro (series_registry.json)
+FILES_TO_LOAD = {series_id: series_registry.json_path(series_id) for series_id in series_registry.SERIES}
+
+# --- Tables ---
+# Todas as séries ficam em uma única tabela longa (series_id, data, valor); a chave primária começa pela
+# série, então as consultas e os upserts de uma série usam o índice. O catálogo replica o registro no
+# banco para os modelos do dbt e para o dashboard.
+VALUES_TABLE = "valores_series"
+CATALOG_TABLE = "catalogo_series"
+
+# --- Rejected Rows Report ---
+REJECTED_DIR = os.path.join(DATA_DIR, "rejeitados")
 
 # --- Batch Size ---
 BATCH_SIZE = 100
 
+# --- Streaming ---
+# Registros lidos e normalizados por vez; limita o pico de memória independentemente do tamanho do arquivo
+CHUNK_ROWS = int(os.environ.get("LOADER_CHUNK_ROWS", "50000"))
+
+# --- Load Mode ---
+# COPY para uma tabela temporária + um único INSERT ... SELECT ... ON CONFLICT por série.
+# Defina LOADER_USE_COPY=0 para voltar ao caminho antigo com executemany em lotes.
+USE_COPY = os.environ.get("LOADER_USE_COPY", "1") == "1"
+
+# --- Change Detection ---
+# Hash por mês de (data, valor) guardado no próprio banco; meses com hash igual não são reenviados.
+# As chaves são "valores_series.<série>", distintas das gravadas pelas antigas tabelas por série.
+# Antes disso, o hash do arquivo de origem inteiro é comparado com o da última carga: se o coletor
+# não regravou a série (resposta 304 ou idêntica), a série é pulada sem ler nem normalizar o arquivo.
+# Defina LOADER_CHANGE_DETECTION=0 para reenviar todos os registros.
+CHANGE_DETECTION = os.environ.get("LOADER_CHANGE_DETECTION", "1") == "1"
+FINGERPRINT_TABLE = "carga_fingerprints"
+FILE_FINGERPRINT_TABLE = "carga_arquivos"
+
+# --- Parallel Load ---
+# As séries são independentes: cada uma é carregada por um worker com sua própria conexão do pool.
+# Defina LOADER_PARALLEL=0 para carregar uma série por vez em uma única conexão.
+PARALLEL_LOAD = os.environ.get("LOADER_PARALLEL", "1") == "1"
+MAX_WORKERS = int(os.environ.get("LOADER_MAX_WORKERS", str(min(8, len(FILES_TO_LOAD)))))
+
 # --- Helper Functions ---
 def get_db_connection():
     """Establishes a connection to the PostgreSQL database."""
@@ -39,7 +81,8 @@ def get_db_connection():
             database=DB_NAME,
             user=DB_USER,
             password=DB_PASSWORD,
-            connect_timeout=20
+            connect_timeout=20,
+            cursor_factory=db_pool.InstrumentedCursor
         )
         print("Conexão com o banco de dados estabelecida com sucesso.")
         return conn
@@ -47,28 +90,177 @@ def get_db_connection():
         print(f"Erro ao conectar ao banco de dados: {e}")
         return None
 
-def create_table(conn, table_name):
-    """Creates a table if it doesn\'t exist."""
-    # PIB (valores correntes em R$ milhões) pode ser um número grande
-    # Ajustar NUMERIC(20, 2) para PIB, manter NUMERIC(15,4) para outros
-    valor_column_type = "NUMERIC(20, 2)" if table_name == "pib_trimestral" else "NUMERIC(15, 4)"
-    
+def get_db_pool(maxconn):
+    """Creates a thread-safe connection pool to the PostgreSQL database."""
+    try:
+        pool = psycopg2.pool.ThreadedConnectionPool(
+            1,
+            maxconn,
+            host=DB_HOST,
+            port=DB_PORT,
+            database=DB_NAME,
+            user=DB_USER,
+            password=DB_PASSWORD,
+            connect_timeout=20,
+            cursor_factory=db_pool.InstrumentedCursor
+        )
+        print(f"Pool de conexões com o banco de dados criado com sucesso (máximo de {maxconn} conexões).")
+        return pool
+    except psycopg2.OperationalError as e:
+        print(f"Erro ao conectar ao banco de dados: {e}")
+        return None
+
+def create_series_tables(conn):
+    """Creates the long values table and the series catalog, and syncs the catalog with the registry."""
+    create_table_sql = f"""
+    CREATE TABLE IF NOT EXISTS {VALUES_TABLE} (
+        series_id TEXT NOT NULL,
+        data DATE NOT NULL,
+        valor NUMERIC,
+        PRIMARY KEY (series_id, data)
+    );
+    CREATE TABLE IF NOT EXISTS {CATALOG_TABLE} (
+        series_id TEXT PRIMARY KEY,
+        indicador TEXT NOT NULL UNIQUE,
+        nome TEXT NOT NULL,
+        fonte TEXT NOT NULL,
+        codigo TEXT NOT NULL,
+        frequencia TEXT NOT NULL,
+        unidade TEXT NOT NULL,
+        precisao SMALLINT NOT NULL,
+        janela_revisao_dias INTEGER NOT NULL,
+        dashboard BOOLEAN NOT NULL,
+        ordem INTEGER NOT NULL,
+        atualizado_em TIMESTAMPTZ NOT NULL DEFAULT now()
+    );
+    """
+    sync_sql = f"""
+    INSERT INTO {CATALOG_TABLE} (series_id, indicador, nome, fonte, codigo, frequencia, unidade, precisao,
+                                 janela_revisao_dias, dashboard, ordem, atualizado_em)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, now())
+    ON CONFLICT (series_id) DO UPDATE SET
+        indicador = EXCLUDED.indicador, nome = EXCLUDED.nome, fonte = EXCLUDED.fonte, codigo = EXCLUDED.codigo,
+        frequencia = EXCLUDED.frequencia, unidade = EXCLUDED.unidade, precisao = EXCLUDED.precisao,
+        janela_revisao_dias = EXCLUDED.janela_revisao_dias, dashboard = EXCLUDED.dashboard,
+        ordem = EXCLUDED.ordem, atualizado_em = EXCLUDED.atualizado_em;
+    """
+    try:
+        with conn.cursor() as cur:
+            cur.execute(create_table_sql)
+            # Séries removidas do registro saem do catálogo (os valores já carregados ficam na tabela longa)
+            cur.execute(f"DELETE FROM {CATALOG_TABLE} WHERE NOT (series_id = ANY(%s));", (list(series_registry.SERIES),))
+            cur.executemany(sync_sql, series_registry.catalog_rows())
+            conn.commit()
+            print(f"Tabelas \t'{VALUES_TABLE}\t' e \t'{CATALOG_TABLE}\t' verificadas/criadas; catálogo com {len(series_registry.SERIES)} séries.")
+    except psycopg2.Error as e:
+        print(f"Erro ao criar/verificar as tabelas {VALUES_TABLE} e {CATALOG_TABLE}: {e}")
+        conn.rollback()
+        raise
+
+def create_fingerprint_table(conn):
+    """Creates the metadata tables holding per-month content hashes and the last loaded source file hash of each series."""
     create_table_sql = f"""
-    CREATE TABLE IF NOT EXISTS {table_name} (
-        data DATE PRIMARY KEY,
-        valor {valor_column_type}
+    CREATE TABLE IF NOT EXISTS {FINGERPRINT_TABLE} (
+        tabela TEXT NOT NULL,
+        mes CHAR(7) NOT NULL,
+        hash CHAR(64) NOT NULL,
+        atualizado_em TIMESTAMPTZ NOT NULL DEFAULT now(),
+        PRIMARY KEY (tabela, mes)
+    );
+    CREATE TABLE IF NOT EXISTS {FILE_FINGERPRINT_TABLE} (
+        tabela TEXT PRIMARY KEY,
+        hash CHAR(64) NOT NULL,
+        atualizado_em TIMESTAMPTZ NOT NULL DEFAULT now()
     );
     """
     try:
         with conn.cursor() as cur:
             cur.execute(create_table_sql)
             conn.commit()
-            print(f"Tabela \t'{table_name}\t' verificada/criada com sucesso com tipo de valor {valor_column_type}.")
+            print(f"Tabelas de fingerprints \t'{FINGERPRINT_TABLE}\t' e \t'{FILE_FINGERPRINT_TABLE}\t' verificadas/criadas com sucesso.")
     except psycopg2.Error as e:
-        print(f"Erro ao criar/verificar tabela {table_name}: {e}")
+        print(f"Erro ao criar/verificar tabela {FINGERPRINT_TABLE}: {e}")
         conn.rollback()
         raise
 
+def fingerprint_key(series_id):
+    """Key of a series in the fingerprint tables."""
+    return f"{VALUES_TABLE}.{series_id}"
+
+def fetch_fingerprints(conn, series_id):
+    """Returns the stored {month: hash} fingerprints for a series."""
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT mes, hash FROM {FINGERPRINT_TABLE} WHERE tabela = %s;", (fingerprint_key(series_id),))
+            fingerprints = dict(cur.fetchall())
+        conn.commit()
+        return fingerprints
+    except psycopg2.Error as e:
+        print(f"Erro ao ler fingerprints da série {series_id}: {e}. Todos os registros serão enviados.")
+        conn.rollback()
+        return {}
+
+def file_fingerprint(filepath):
+    """Returns the sha256 of a source file, read in blocks."""
+    hasher = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(json_stream.READ_CHUNK_SIZE), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+def fetch_file_fingerprint(conn, series_id):
+    """Returns the hash of the source file of the series' last successful load, or None."""
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT hash FROM {FILE_FINGERPRINT_TABLE} WHERE tabela = %s;", (fingerprint_key(series_id),))
+            row = cur.fetchone()
+        conn.commit()
+        return row[0] if row else None
+    except psycopg2.Error as e:
+        print(f"Erro ao ler o fingerprint do arquivo da série {series_id}: {e}. O arquivo será processado.")
+        conn.rollback()
+        return None
+
+def save_file_fingerprint(conn, series_id, file_hash):
+    """Records the hash of the source file just loaded for a series."""
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                INSERT INTO {FILE_FINGERPRINT_TABLE} (tabela, hash, atualizado_em) VALUES (%s, %s, now())
+                ON CONFLICT (tabela) DO UPDATE SET hash = EXCLUDED.hash, atualizado_em = EXCLUDED.atualizado_em;
+                """,
+                (fingerprint_key(series_id), file_hash)
+            )
+        conn.commit()
+    except psycopg2.Error as e:
+        print(f"Erro ao salvar o fingerprint do arquivo da série {series_id}: {e}")
+        conn.rollback()
+
+def compute_month_fingerprints(batch_values):
+    """Groups (data, valor) tuples by month (YYYY-MM) and hashes each month's content."""
+    months = {}
+    for date_str, valor in dict(batch_values).items():
+        months.setdefault(date_str[:7], []).append((date_str, valor))
+    hashes = {}
+    for month, rows in months.items():
+        rows.sort()
+        content = "\n".join(f"{date_str}|{valor!r}" for date_str, valor in rows)
+        hashes[month] = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return months, hashes
+
+def save_fingerprints(cur, series_id, hashes):
+    """Upserts month hashes for a series using the caller's cursor (same transaction as the data)."""
+    if not hashes:
+        return
+    cur.executemany(
+        f"""
+        INSERT INTO {FINGERPRINT_TABLE} (tabela, mes, hash, atualizado_em) VALUES (%s, %s, %s, now())
+        ON CONFLICT (tabela, mes) DO UPDATE SET hash = EXCLUDED.hash, atualizado_em = EXCLUDED.atualizado_em;
+        """,
+        [(fingerprint_key(series_id), month, month_hash) for month, month_hash in hashes.items()]
+    )
+
 def normalize_date(date_str):
     """Tries to parse date string from multiple formats (DD/MM/YYYY, YYYY-MM-DD) and returns YYYY-MM-DD."""
     formats_to_try = ["%d/%m/%Y", "%Y-%m-%d"]
@@ -80,18 +272,12 @@ def normalize_date(date_str):
     print(f"Formato de data não reconhecido: {date_str}")
     return None # Return None if no format matches
 
-def load_data_batch(conn, table_name, data):
-    """Loads data into the specified table in batches after normalizing dates."""
-    if not data:
-        print(f"Nenhum dado para carregar na tabela {table_name}.")
-        return
-
-    insert_sql = f"INSERT INTO {table_name} (data, valor) VALUES (%s, %s) ON CONFLICT (data) DO UPDATE SET valor = EXCLUDED.valor;"
-    total_inserted = 0
+def prepare_records_loop(series_id, data):
+    """Row-by-row normalization (previous implementation, kept as a reference for the benchmarks)."""
     records_skipped = 0
     batch_values = []
 
-    print(f"Normalizando datas e preparando lotes para a tabela {table_name}...")
+    print(f"Normalizando datas e preparando lotes para a série {series_id}...")
     for item in data:
         original_date_str = item.get("data_referencia") # Changed from "data" to "data_referencia" to match JSON output
         valor = item.get("valor")
@@ -112,61 +298,372 @@ def load_data_batch(conn, table_name, data):
             records_skipped += 1
             
     if not batch_values:
-        print(f"Nenhum registro válido encontrado após normalização para {table_name}. Registros pulados: {records_skipped}")
-        return
+        print(f"Nenhum registro válido encontrado após normalização para {series_id}. Registros pulados: {records_skipped}")
+        return batch_values
         
     print(f"Normalização concluída. {len(batch_values)} registros válidos preparados. {records_skipped} registros pulados.")
-    print(f"Iniciando carregamento em lotes para a tabela {table_name}...")
-    
+    return batch_values
+
+def write_rejected_report(series_id, rejected):
+    """Prints a summary of rejected rows and writes them to dados_economicos/rejeitados/<série>.csv."""
+    counts = rejected["motivo"].value_counts()
+    print(f"{len(rejected)} registros rejeitados em {series_id}: " + ", ".join(f"{reason}={count}" for reason, count in counts.items()))
+    report_path = os.path.join(REJECTED_DIR, f"{series_id}.csv")
+    try:
+        os.makedirs(REJECTED_DIR, exist_ok=True)
+        rejected.to_csv(report_path, index_label="linha")
+        print(f"Relatório de registros rejeitados salvo em {report_path}")
+    except IOError as e:
+        print(f"Erro ao salvar relatório de rejeitados {report_path}: {e}")
+
+def prepare_records(series_id, data):
+    """Normalizes dates and values column-wise, returning a list of (data, valor) tuples ready to load."""
+    print(f"Normalizando datas e preparando lotes para a série {series_id}...")
+    valid, rejected, detected_format = normalize_records(data)
+    metrics.inc("loader_rows_normalized_total", len(valid), series=series_id)
+    metrics.inc("loader_rows_rejected_total", len(rejected), series=series_id)
+    if not rejected.empty:
+        write_rejected_report(series_id, rejected)
+
+    if valid.empty:
+        print(f"Nenhum registro válido encontrado após normalização para {series_id}. Registros pulados: {len(rejected)}")
+        return []
+
+    print(f"Normalização concluída (formato de data detectado: {detected_format}). {len(valid)} registros válidos preparados. {len(rejected)} registros pulados.")
+    # Ordenado por data (estável: entre datas repetidas, o último valor recebido continua por último),
+    # para que iter_month_chunks corte os meses sem dividi-los
+    valid = valid.sort_values("data", kind="stable")
+    # tolist() devolve floats nativos do Python (repr estável para o COPY e para os fingerprints)
+    return list(zip(valid["data"].tolist(), valid["valor"].tolist()))
+
+def load_data_executemany(conn, series_id, row_chunks, fingerprints=None):
+    """Loads chunks of (data, valor) tuples with executemany, committing after every batch (fallback path).
+
+    Returns a dict with row counts, or None on failure. Inserts and updates are not told apart here.
+    """
+    # Valores arredondados para a precisão da série no registro
+    insert_sql = f"""
+    INSERT INTO {VALUES_TABLE} (series_id, data, valor) VALUES (%s, %s, round(%s::numeric, %s))
+    ON CONFLICT (series_id, data) DO UPDATE SET valor = EXCLUDED.valor
+    WHERE {VALUES_TABLE}.valor IS DISTINCT FROM EXCLUDED.valor;
+    """
+    precision = int(series_registry.get(series_id)["precisao"])
+    total_inserted = 0
+    total_changed = 0
+    batch_number = 0
+
+    print(f"Iniciando carregamento em lotes para a série {series_id}...")
     try:
         with conn.cursor() as cur:
-            for i in range(0, len(batch_values), BATCH_SIZE):
-                batch = batch_values[i:i + BATCH_SIZE]
-                start_time = datetime.now()
-                cur.executemany(insert_sql, batch)
-                conn.commit()
-                end_time = datetime.now()
-                total_inserted += len(batch)
-                print(f"  Lote {i // BATCH_SIZE + 1}: {len(batch)} registros inseridos/atualizados em {(end_time - start_time).total_seconds():.2f}s. Total: {total_inserted}")
-                
-            print(f"Carregamento para a tabela {table_name} concluído. Total de {total_inserted} registros processados.")
+            for batch_values in row_chunks:
+                for i in range(0, len(batch_values), BATCH_SIZE):
+                    batch = batch_values[i:i + BATCH_SIZE]
+                    batch_number += 1
+                    with metrics.timer("loader_batch_seconds", series=series_id, method="executemany") as measured:
+                        cur.executemany(insert_sql, [(series_id, date_str, valor, precision) for date_str, valor in batch])
+                        total_changed += max(cur.rowcount, 0)
+                        conn.commit()
+                    total_inserted += len(batch)
+                    print(f"  Lote {batch_number}: {len(batch)} registros inseridos/atualizados em {measured['segundos']:.2f}s. Total: {total_inserted}")
+
+            save_fingerprints(cur, series_id, fingerprints)
+            conn.commit()
+            print(f"Carregamento para a série {series_id} concluído. Total de {total_inserted} registros processados.")
+            return {"inseridos_atualizados": total_changed, "inalterados": total_inserted - total_changed}
             
     except psycopg2.Error as e:
-        print(f"Erro psycopg2 ao inserir dados na tabela {table_name}: {e}")
+        print(f"Erro psycopg2 ao inserir dados da série {series_id}: {e}")
         conn.rollback()
     except Exception as e:
-        print(f"Erro inesperado durante o carregamento para {table_name}: {e}")
+        print(f"Erro inesperado durante o carregamento para {series_id}: {e}")
         conn.rollback()
+    return None
+
+def load_data_copy(conn, series_id, row_chunks, fingerprints=None):
+    """Streams chunks of (data, valor) tuples into a temp staging table with COPY and merges them in one transaction.
+
+    Returns a dict with inserted/updated/unchanged row counts, or None on failure.
+    """
+    staging_table = f"tmp_stage_{series_id}"
+    # Deduplica por data mantendo o último valor recebido, como acontecia com os upserts sequenciais,
+    # e arredonda para a precisão da série no registro
+    merge_sql = f"""
+    WITH deduplicado AS (
+        SELECT DISTINCT ON (data) data, valor FROM {staging_table} ORDER BY data, ordem DESC
+    )
+    INSERT INTO {VALUES_TABLE} (series_id, data, valor)
+    SELECT %(series_id)s, data, round(valor, %(precisao)s) FROM deduplicado
+    ON CONFLICT (series_id, data) DO UPDATE SET valor = EXCLUDED.valor
+    WHERE {VALUES_TABLE}.valor IS DISTINCT FROM EXCLUDED.valor
+    RETURNING (xmax = 0) AS inserido;
+    """
+    merge_params = {"series_id": series_id, "precisao": int(series_registry.get(series_id)["precisao"])}
+
+    print(f"Iniciando carregamento via COPY para a série {series_id}...")
+    try:
+        start_time = time.perf_counter()
+        with conn.cursor() as cur:
+            # ON COMMIT DROP mantém a tabela temporária restrita à transação (compatível com o pooler em modo transação)
+            cur.execute(f"CREATE TEMP TABLE {staging_table} (ordem BIGSERIAL, data DATE, valor NUMERIC) ON COMMIT DROP;")
+            for batch_values in row_chunks:
+                buffer = io.StringIO()
+                for date_str, valor in batch_values:
+                    buffer.write(f"{date_str}\t{valor!r}\n")
+                buffer.seek(0)
+                cur.copy_expert(f"COPY {staging_table} (data, valor) FROM STDIN", buffer)
+            cur.execute(f"SELECT count(DISTINCT data) FROM {staging_table};")
+            staged_rows = cur.fetchone()[0]
+            cur.execute(merge_sql, merge_params)
+            # xmax = 0 identifica linhas novas; as demais linhas retornadas foram atualizadas
+            merged_flags = [row[0] for row in cur.fetchall()]
+            save_fingerprints(cur, series_id, fingerprints)
+        conn.commit()
+        elapsed = time.perf_counter() - start_time
+        metrics.observe("loader_batch_seconds", elapsed, series=series_id, method="copy")
+        inserted = sum(1 for flag in merged_flags if flag)
+        updated = len(merged_flags) - inserted
+        print(f"Carregamento para a série {series_id} concluído. {inserted} inseridos e {updated} atualizados em {elapsed:.2f}s.")
+        return {"inseridos": inserted, "atualizados": updated, "inalterados": staged_rows - len(merged_flags)}
+    except psycopg2.Error as e:
+        print(f"Erro psycopg2 ao inserir dados da série {series_id}: {e}")
+        conn.rollback()
+    except Exception as e:
+        print(f"Erro inesperado durante o carregamento para {series_id}: {e}")
+        conn.rollback()
+    return None
+
+def iter_normalized_chunks(series_id, records, chunk_rows=CHUNK_ROWS):
+    """Normalizes records chunk by chunk, yielding lists of (data, valor) tuples."""
+    for chunk in json_stream.iter_chunks(records, chunk_rows):
+        yield prepare_records(series_id, chunk)
+
+def iter_month_chunks(row_chunks):
+    """Re-cuts chunks of (data, valor) tuples at month boundaries.
+
+    Each chunk is sorted by date (stable, so repeated dates keep their order) and the rows of its last
+    month are carried over to the next one, so each month's fingerprint is computed over all of its rows.
+    A month is only yielded more than once when the input is out of order across chunks.
+    """
+    carry = []
+    for chunk in row_chunks:
+        rows = sorted(carry + chunk, key=lambda row: row[0])
+        if not rows:
+            carry = []
+            continue
+        last_month = rows[-1][0][:7]
+        cut = len(rows)
+        while cut > 0 and rows[cut - 1][0][:7] == last_month:
+            cut -= 1
+        carry = rows[cut:]
+        if cut:
+            yield rows[:cut]
+    if carry:
+        yield carry
+
+def load_data_batch(conn, series_id, data, normalized=False):
+    """Loads a series into the values table after normalizing dates, shipping only months whose content changed.
+
+    data may be a list or any iterable of records (e.g. streamed from disk), or, with normalized=True, an
+    iterable of lists of (YYYY-MM-DD, float) tuples. Returns a dict with row counts (unchanged, inserted,
+    updated), or None if nothing was loaded.
+    """
+    row_chunks = data if normalized else iter_normalized_chunks(series_id, data)
+    stored = fetch_fingerprints(conn, series_id) if CHANGE_DETECTION else {}
+    counters = {"meses": 0, "meses_alterados": 0, "registros": 0, "inalterados": 0}
+    changed_hashes = {}
+    seen_months = set()
+    split_months = set()
+
+    def changed_rows():
+        """Yields only the rows of new or changed months, filling changed_hashes along the way."""
+        for rows in iter_month_chunks(row_chunks):
+            months, hashes = compute_month_fingerprints(rows)
+            changed_months = sorted(month for month, month_hash in hashes.items() if stored.get(month) != month_hash)
+            rows_to_ship = [row for month in changed_months for row in months[month]]
+            repeated = seen_months.intersection(months)
+            if repeated:
+                print(f"Aviso: {series_id} fora de ordem entre blocos; meses {', '.join(sorted(repeated))} serão reenviados na próxima carga.")
+                split_months.update(repeated)
+            new_months = set(months) - seen_months
+            seen_months.update(new_months)
+            counters["meses"] += len(new_months)
+            counters["meses_alterados"] += len(changed_months)
+            counters["registros"] += sum(len(month_rows) for month_rows in months.values())
+            counters["inalterados"] += sum(len(month_rows) for month_rows in months.values()) - len(rows_to_ship)
+            changed_hashes.update((month, hashes[month]) for month in changed_months)
+            # Entrada fora de ordem entre blocos: o hash de cada parte não representa o mês inteiro.
+            # Um hash vazio nunca coincide, e o mês é reenviado (e recalculado) na próxima carga
+            changed_hashes.update((month, "") for month in split_months)
+            if rows_to_ship:
+                yield rows_to_ship
+
+    with metrics.timer("loader_load_seconds", series=series_id) as measured:
+        if USE_COPY:
+            stats = load_data_copy(conn, series_id, changed_rows(), changed_hashes)
+        else:
+            stats = load_data_executemany(conn, series_id, changed_rows(), changed_hashes)
+
+    if stats is None:
+        return None
+    if counters["registros"] == 0:
+        print(f"Nenhum dado para carregar na série {series_id}.")
+        return None
+    print(f"{counters['meses_alterados']} de {counters['meses']} meses com alterações. {counters['inalterados']} registros inalterados não foram enviados.")
+    stats["inalterados"] = stats.get("inalterados", 0) + counters["inalterados"]
+    print(f"Resumo {series_id}: " + ", ".join(f"{key}={value}" for key, value in stats.items()))
+    upserted = sum(stats.get(key, 0) for key in ("inseridos", "atualizados", "inseridos_atualizados"))
+    metrics.inc("loader_rows_upserted_total", upserted, series=series_id)
+    metrics.inc("loader_rows_skipped_total", stats["inalterados"], series=series_id)
+    metrics.log_event("carga", serie=series_id, segundos=round(measured["segundos"], 4),
+                      meses=counters["meses"], meses_alterados=counters["meses_alterados"], **stats)
+    return stats
+
+def load_file(conn, series_id, filepath):
+    """Streams a series into the values table, from the columnar store when available or else from its JSON file.
+
+    With change detection on, a source file identical to the one of the last load is skipped without being
+    read. Returns the load stats, or None on failure.
+    """
+    use_store = "arrow" in columnar_store.DATA_FORMATS and columnar_store.has_series(series_id)
+    source_path = columnar_store.series_path(series_id) if use_store else filepath
+    if use_store:
+        print(f"\n--- Processando série colunar: {source_path} da série: {series_id} ---")
+    else:
+        print(f"\n--- Processando arquivo: {source_path} da série: {series_id} ---")
+        if not os.path.exists(source_path):
+            print(f"Arquivo {source_path} não encontrado. Pulando.")
+            return None
+
+    file_hash = None
+    if CHANGE_DETECTION:
+        try:
+            file_hash = file_fingerprint(source_path)
+        except IOError as e:
+            print(f"Erro ao calcular o hash de {source_path}: {e}")
+        if file_hash and fetch_file_fingerprint(conn, series_id) == file_hash:
+            print(f"{source_path} sem alterações desde a última carga. Série {series_id} pulada.")
+            metrics.inc("loader_files_skipped_total", series=series_id)
+            metrics.log_event("carga", serie=series_id, arquivo_inalterado=True)
+            return {"arquivo_inalterado": 1}
+
+    stats = load_source(conn, series_id, source_path, use_store)
+    if stats is not None and file_hash:
+        save_file_fingerprint(conn, series_id, file_hash)
+    return stats
+
+def load_table(conn, series_id, table):
+    """Loads a series already in memory as an Arrow table (columnar_store schema), e.g. handed over by pipeline.py.
+
+    The hash of the series' columnar file is recorded as after load_file, so a later standalone run skips it.
+    Returns the load stats, or None on failure.
+    """
+    print(f"\n--- Processando série em memória ({table.num_rows} registros): {series_id} ---")
+    try:
+        stats = load_data_batch(conn, series_id, columnar_store.iter_table_rows(table, CHUNK_ROWS), normalized=True)
+    except Exception as e:
+        print(f"Erro inesperado ao processar a série {series_id}: {e}")
+        conn.rollback()
+        return None
+    if stats is not None and CHANGE_DETECTION and columnar_store.has_series(series_id):
+        save_file_fingerprint(conn, series_id, file_fingerprint(columnar_store.series_path(series_id)))
+    return stats
+
+def load_source(conn, series_id, source_path, use_store):
+    """Loads a series from its columnar partition (use_store=True) or JSON file. Returns the stats or None."""
+    if use_store:
+        try:
+            return load_data_batch(conn, series_id, columnar_store.iter_series_rows(series_id, CHUNK_ROWS), normalized=True)
+        except Exception as e:
+            print(f"Erro inesperado ao processar {source_path}: {e}")
+            conn.rollback()
+            return None
+
+    try:
+        print(f"Lendo {source_path} em blocos de até {CHUNK_ROWS} registros.")
+        return load_data_batch(conn, series_id, json_stream.iter_json_records(source_path))
+    except (json.JSONDecodeError, ValueError) as e:
+        print(f"Erro ao decodificar JSON do arquivo {source_path}: {e}")
+    except IOError as e:
+        print(f"Erro ao ler arquivo {source_path}: {e}")
+    except Exception as e:
+        print(f"Erro inesperado ao processar {source_path}: {e}")
+    conn.rollback()
+    return None
+
+def load_table_from_pool(pool, series_id, filepath):
+    """Worker: checks out a pooled connection, loads one series, and returns (series id, stats, seconds)."""
+    start_time = time.perf_counter()
+    conn = pool.getconn()
+    try:
+        stats = load_file(conn, series_id, filepath)
+    except Exception as e:
+        print(f"Erro inesperado ao carregar a série {series_id}: {e}")
+        conn.rollback()
+        stats = None
+    finally:
+        pool.putconn(conn)
+    return series_id, stats, time.perf_counter() - start_time
+
+def print_load_report(results, wall_time):
+    """Prints per-series timings and compares wall-clock time with the summed per-series time."""
+    print("\n--- Resumo da carga ---")
+    for series_id, stats, duration in results:
+        status = ", ".join(f"{key}={value}" for key, value in stats.items()) if stats else "falhou ou sem dados"
+        print(f"  {series_id:<20} {duration:7.2f}s  ({status})")
+    summed_time = sum(duration for _, _, duration in results)
+    speedup = summed_time / wall_time if wall_time > 0 else 1.0
+    print(f"Tempo total (relógio): {wall_time:.2f}s | Soma dos tempos por série: {summed_time:.2f}s | Speedup: {speedup:.2f}x")
+
+def main_parallel():
+    """Loads every series concurrently, one worker and one pooled connection per series."""
+    max_workers = max(1, min(MAX_WORKERS, len(FILES_TO_LOAD)))
+    pool = get_db_pool(max_workers)
+    if not pool:
+        return
+
+    try:
+        conn = pool.getconn()
+        try:
+            create_series_tables(conn)
+            create_fingerprint_table(conn)
+        finally:
+            pool.putconn(conn)
+
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(load_table_from_pool, pool, series_id, filepath)
+                for series_id, filepath in FILES_TO_LOAD.items()
+            ]
+            results = [future.result() for future in futures]
+        print_load_report(results, time.perf_counter() - start_time)
+    finally:
+        pool.closeall()
+        print("\nConexões do pool fechadas.")
 
 # --- Main Execution --- 
 def main():
+    if PARALLEL_LOAD:
+        main_parallel()
+        return
+
     conn = get_db_connection()
     if not conn:
         return
 
     try:
         print("Verificando/Criando tabelas...")
-        for table_name in FILES_TO_LOAD.keys():
-            create_table(conn, table_name)
+        create_series_tables(conn)
+        create_fingerprint_table(conn)
         print("Verificação/Criação de tabelas concluída.")
 
-        for table_name, filepath in FILES_TO_LOAD.items():
-            print(f"\n--- Processando arquivo: {filepath} para tabela: {table_name} ---")
-            if not os.path.exists(filepath):
-                print(f"Arquivo {filepath} não encontrado. Pulando.")
-                continue
-
-            try:
-                with open(filepath, "r", encoding="utf-8") as f:
-                    data_to_load = json.load(f)
-                print(f"Arquivo {filepath} lido com sucesso. {len(data_to_load)} registros encontrados.")
-                load_data_batch(conn, table_name, data_to_load)
-            except json.JSONDecodeError as e:
-                print(f"Erro ao decodificar JSON do arquivo {filepath}: {e}")
-            except IOError as e:
-                print(f"Erro ao ler arquivo {filepath}: {e}")
-            except Exception as e:
-                print(f"Erro inesperado ao processar {filepath}: {e}")
+        results = []
+        start_time = time.perf_counter()
+        for series_id, filepath in FILES_TO_LOAD.items():
+            table_start = time.perf_counter()
+            stats = load_file(conn, series_id, filepath)
+            results.append((series_id, stats, time.perf_counter() - table_start))
+        print_load_report(results, time.perf_counter() - start_time)
 
     finally:
         if conn:
@@ -175,4 +672,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+# Instrumentação compartilhada pelos coletores, pela carga, pelo pipeline e pelo dashboard:
+#   - contadores e histogramas (com rótulos) em memória, seguros entre threads;
+#   - timer() mede um trecho e registra a duração em um histograma;
+#   - log_event() grava eventos estruturados (uma linha JSON por evento) em metricas/<job>.jsonl;
+#   - export() grava todas as métricas no formato texto do Prometheus em metricas/<job>.prom
+#     (chamado automaticamente ao fim do processo; o dashboard exporta ao fim de cada execução do script).
+# O job é o nome do script em execução (ou METRICS_JOB); METRICS_ENABLED=0 desliga a gravação dos arquivos.
+import atexit
+import json
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+METRICS_DIR = os.environ.get("METRICS_DIR", "metricas")
+METRICS_JOB = os.environ.get("METRICS_JOB") or os.path.splitext(os.path.basename(sys.argv[0] if sys.argv and sys.argv[0] else ""))[0] or "python"
+
+# Limites (s) dos histogramas de latência
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+class Registry:
+    """Thread-safe store of labelled counters and histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}  # nome -> {rótulos: valor}
+        self._histograms = {}  # nome -> {rótulos: [contagens por limite, soma, total]}
+        self._buckets = {}
+
+    def inc(self, name, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            buckets = self._buckets.setdefault(name, tuple(buckets))
+            series = self._histograms.setdefault(name, {})
+            state = series.get(key)
+            if state is None:
+                state = series[key] = [[0] * len(buckets), 0.0, 0]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def snapshot(self):
+        """Returns {"counters": {name: [(labels, value)]}, "histograms": {name: [(labels, sum, count)]}}."""
+        with self._lock:
+            return {
+                "counters": {name: [(dict(key), value) for key, value in series.items()] for name, series in self._counters.items()},
+                "histograms": {
+                    name: [(dict(key), state[1], state[2]) for key, state in series.items()]
+                    for name, series in self._histograms.items()
+                },
+            }
+
+    def render_prometheus(self):
+        """Formats every metric in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name in sorted(self._counters):
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(self._counters[name].items()):
+                    lines.append(f"{name}{format_labels(key)} {format_value(value)}")
+            for name in sorted(self._histograms):
+                lines.append(f"# TYPE {name} histogram")
+                buckets = self._buckets[name]
+                for key, (counts, total, count) in sorted(self._histograms[name].items()):
+                    for bound, bucket_count in zip(buckets, counts):
+                        lines.append(f"{name}_bucket{format_labels(key + (('le', format_value(bound)),))} {bucket_count}")
+                    lines.append(f"{name}_bucket{format_labels(key + (('le', '+Inf'),))} {count}")
+                    lines.append(f"{name}_sum{format_labels(key)} {format_value(total)}")
+                    lines.append(f"{name}_count{format_labels(key)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def is_empty(self):
+        with self._lock:
+            return not self._counters and not self._histograms
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def format_labels(key):
+    if not key:
+        return ""
+    return "{" + ",".join(f'{label}="{escape_label(value)}"' for label, value in key) + "}"
+
+def format_value(value):
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value)
+    return str(value)
+
+REGISTRY = Registry()
+_log_lock = threading.Lock()
+
+def inc(name, amount=1, **labels):
+    """Adds amount to a counter."""
+    REGISTRY.inc(name, amount, **labels)
+
+def observe(name, value, **labels):
+    """Records a value (e.g. a duration in seconds) in a histogram."""
+    REGISTRY.observe(name, value, **labels)
+
+@contextmanager
+def timer(name, **labels):
+    """Measures the enclosed block and records its duration in seconds in the histogram name.
+
+    Yields a dict that holds the measured duration under "segundos" once the block exits.
+    """
+    measured = {}
+    start_time = time.perf_counter()
+    try:
+        yield measured
+    finally:
+        measured["segundos"] = time.perf_counter() - start_time
+        REGISTRY.observe(name, measured["segundos"], **labels)
+
+def log_path(job=None):
+    return os.path.join(METRICS_DIR, f"{job or METRICS_JOB}.jsonl")
+
+def prometheus_path(job=None):
+    return os.path.join(METRICS_DIR, f"{job or METRICS_JOB}.prom")
+
+def log_event(event, **fields):
+    """Appends a structured event (timestamp, job, event name and fields) as one JSON line to the job's log."""
+    if not METRICS_ENABLED:
+        return
+    entry = {"ts": datetime.now().isoformat(timespec="milliseconds"), "job": METRICS_JOB, "evento": event, **fields}
+    line = json.dumps(entry, ensure_ascii=False, default=str)
+    try:
+        with _log_lock:
+            os.makedirs(METRICS_DIR, exist_ok=True)
+            with open(log_path(), "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+    except OSError as e:
+        print(f"Erro ao gravar o log de métricas {log_path()}: {e}")
+
+def export(path=None):
+    """Writes all metrics in the Prometheus text format (atomically) to path or metricas/<job>.prom.
+
+    Nothing is written while no metric has been recorded.
+    """
+    if not METRICS_ENABLED or REGISTRY.is_empty():
+        return
+    path = path or prometheus_path()
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(REGISTRY.render_prometheus())
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Erro ao exportar as métricas para {path}: {e}")
+
+# Exporta ao fim de qualquer script que registrou métricas
+atexit.register(export)
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# Normalização vetorizada (pandas) dos registros {data_referencia|data, valor} das séries.
+# Compartilhada pelo carregador e pelo armazenamento colunar local.
+import re
+
+import pandas as pd
+
+# BCB usa dd/mm/YYYY; SIDRA e World Bank (já processados) usam YYYY-MM-DD
+DATE_FORMAT_PATTERNS = {
+    "%d/%m/%Y": r"^\d{2}/\d{2}/\d{4}$",
+    "%Y-%m-%d": r"^\d{4}-\d{2}-\d{2}$",
+}
+
+def detect_date_format(dates):
+    """Detects the date format of a column from its first non-empty value (once per file, not per row)."""
+    sample = dates.dropna()
+    if sample.empty:
+        return None
+    first_value = str(sample.iloc[0]).strip()
+    for fmt, pattern in DATE_FORMAT_PATTERNS.items():
+        if re.match(pattern, first_value):
+            return fmt
+    return None
+
+def parse_dates(dates):
+    """Parses a date column with the detected format, retrying the remaining formats only on the rows that failed."""
+    detected_format = detect_date_format(dates)
+    formats = [detected_format] if detected_format else []
+    formats += [fmt for fmt in DATE_FORMAT_PATTERNS if fmt != detected_format]
+
+    # Resolução em segundos: uma data fora do intervalo do datetime64[ns] (ex.: a sentinela 31/12/9999)
+    # não interrompe a série inteira com OutOfBoundsDatetime
+    parsed = pd.Series(pd.NaT, index=dates.index, dtype="datetime64[s]")
+    pending = dates.notna()
+    for fmt in formats:
+        if not pending.any():
+            break
+        parsed[pending] = pd.to_datetime(dates[pending], format=fmt, errors="coerce").astype("datetime64[s]")
+        pending = pending & parsed.isna()
+    # Datas que o pandas não representa em nanossegundos (antes de 1677 ou depois de 2262) ficam NaT e
+    # são rejeitadas como "data inválida"
+    parsed[(parsed < pd.Timestamp.min) | (parsed > pd.Timestamp.max)] = pd.NaT
+    return parsed.astype("datetime64[ns]"), detected_format
+
+def normalize_records(data):
+    """Vectorized normalization of a list of {data_referencia|data, valor} dicts.
+
+    Returns (valid, rejected): a DataFrame with 'data' (YYYY-MM-DD) and 'valor' (float64) columns, and a
+    DataFrame with the rejected rows and the reason each one was rejected.
+    """
+    frame = pd.DataFrame.from_records(data)
+    # Arquivos do SIDRA/World Bank usam "data_referencia"; os do BCB mantêm a chave original "data"
+    date_column = "data_referencia" if "data_referencia" in frame.columns else "data"
+    raw_dates = frame[date_column] if date_column in frame.columns else pd.Series(None, index=frame.index, dtype="object")
+    raw_values = frame["valor"] if "valor" in frame.columns else pd.Series(None, index=frame.index, dtype="object")
+
+    dates = raw_dates.astype("string").str.strip()
+    parsed_dates, detected_format = parse_dates(dates)
+    values = pd.to_numeric(raw_values, errors="coerce")
+
+    reasons = pd.Series(None, index=frame.index, dtype="object")
+    reasons[values.isna()] = "valor inválido"
+    reasons[raw_values.isna()] = "valor ausente"
+    reasons[parsed_dates.isna()] = "data inválida"
+    reasons[raw_dates.isna()] = "data ausente"
+    rejected_mask = reasons.notna()
+
+    valid = pd.DataFrame({
+        "data": parsed_dates[~rejected_mask].dt.strftime("%Y-%m-%d"),
+        "valor": values[~rejected_mask].astype("float64"),
+    })
+    rejected = pd.DataFrame({
+        "data_original": raw_dates[rejected_mask],
+        "valor_original": raw_values[rejected_mask],
+        "motivo": reasons[rejected_mask],
+    })
+    return valid, rejected, detected_format
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+# Pipeline completo (coleta -> carga -> dbt) em um único processo, modelado como um DAG por série:
+#   coleta:<serie> -> carga:<serie> -> transformacao
+# Cada tarefa começa assim que suas dependências terminam: a carga da selic roda enquanto o SIDRA
+# ainda está baixando. A série coletada passa para a carga em memória (tabela Arrow), sem reler nem
+# reinterpretar os arquivos, e as conexões HTTP e com o banco são abertas uma única vez. As séries são
+# as do registro (series_registry.json) e todas são carregadas na tabela longa valores_series. Ao final,
+# o dbt roda apenas se alguma série mudou, e é exibido o tempo de cada tarefa e de cada etapa.
+#
+# Uso: python pipeline.py [--series selic ipca ...] [--skip-dbt] [--workers 8]
+import argparse
+import datetime
+import os
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import columnar_store
+import fetch_all_data
+import get_bcb_data
+import http_client
+import load_all_data_to_supabase_normalized_v2 as loader
+import metrics
+
+# Número máximo de tarefas do DAG executadas ao mesmo tempo
+MAX_WORKERS = int(os.environ.get("PIPELINE_MAX_WORKERS", "8"))
+# Projeto e perfis do dbt
+DBT_PROJECT_DIR = os.environ.get("DBT_PROJECT_DIR", os.path.join("bi_project", "termometro_economia"))
+DBT_PROFILES_DIR = os.environ.get("DBT_PROFILES_DIR", os.path.expanduser("~/.dbt"))
+# Nome da source do dbt que aponta para as tabelas carregadas (models/sources.yml)
+DBT_SOURCE = "public"
+
+class Task:
+    """A DAG node: func receives {dependency name: dependency value} and returns the task's value."""
+
+    def __init__(self, name, stage, func, deps=()):
+        self.name = name
+        self.stage = stage
+        self.func = func
+        self.deps = tuple(deps)
+
+class TaskResult:
+    def __init__(self, task, value, start, end, error=None):
+        self.task = task
+        self.value = value
+        self.start = start
+        self.end = end
+        self.error = error
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+def run_task(task, inputs, origin):
+    start = time.perf_counter() - origin
+    try:
+        value, error = task.func(inputs), None
+    except Exception as e:
+        value, error = None, e
+        print(f"Erro inesperado na tarefa {task.name}: {e}")
+    result = TaskResult(task, value, start, time.perf_counter() - origin, error)
+    metrics.observe("pipeline_task_seconds", result.duration, stage=task.stage)
+    metrics.log_event("tarefa", tarefa=task.name, etapa=task.stage, inicio=round(start, 4),
+                      segundos=round(result.duration, 4), erro=str(error) if error else None)
+    return result
+
+def run_dag(tasks, max_workers=MAX_WORKERS):
+    """Runs each task as soon as all of its dependencies have finished. Returns ({name: TaskResult}, wall time).
+
+    A task whose dependency failed still runs and receives None as that dependency's value.
+    """
+    pending = {task.name: task for task in tasks}
+    unknown = {dep for task in tasks for dep in task.deps} - set(pending)
+    if unknown:
+        raise ValueError(f"Dependências inexistentes no DAG: {', '.join(sorted(unknown))}")
+    results = {}
+    running = {}
+    origin = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        while pending or running:
+            ready = [task for task in pending.values() if all(dep in results for dep in task.deps)]
+            if not ready and not running:
+                raise ValueError(f"Ciclo no DAG entre: {', '.join(sorted(pending))}")
+            for task in ready:
+                del pending[task.name]
+                inputs = {dep: results[dep].value for dep in task.deps}
+                running[executor.submit(run_task, task, inputs, origin)] = task
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                task = running.pop(future)
+                results[task.name] = future.result()
+    return results, time.perf_counter() - origin
+
+# --- Tarefas ---
+
+def fetch_task(name, fetch):
+    """Coleta uma série; o valor da tarefa é (pontos recebidos, tabela Arrow da série ou None)."""
+    def run(_inputs):
+        received = fetch()
+        # A série acabou de ser gravada no armazenamento colunar: a carga recebe a tabela (memory map)
+        table = columnar_store.read_series(name) if received and "arrow" in columnar_store.DATA_FORMATS else None
+        return received, table
+    return run
+
+def load_task(name, pool):
+    """Carrega uma série a partir da tabela recebida da coleta ou, se ela não mudou, do arquivo local.
+
+    Sem alterações na coleta, load_file compara o hash do arquivo com o da última carga e pula a série
+    se for igual (e carrega, se a carga anterior não chegou a acontecer).
+    """
+    def run(inputs):
+        received, table = inputs[f"coleta:{name}"] or (None, None)
+        if received is None and not columnar_store.has_saved_series(name, loader.FILES_TO_LOAD[name]):
+            print(f"Sem dados locais de {name} para carregar.")
+            return None
+        conn = pool.getconn()
+        try:
+            if table is not None:
+                return loader.load_table(conn, name, table)
+            return loader.load_file(conn, name, loader.FILES_TO_LOAD[name])
+        finally:
+            pool.putconn(conn)
+    return run
+
+def table_changed(stats):
+    """True when a load inserted or updated rows."""
+    if not stats:
+        return False
+    return sum(stats.get(key, 0) for key in ("inseridos", "atualizados", "inseridos_atualizados")) > 0
+
+def dbt_selectors():
+    """Seletores do dbt para a tabela longa de origem e todos os modelos a jusante dela.
+
+    Os modelos incrementais reprocessam apenas a janela de revisão de cada série, então séries que
+    não mudaram custam pouco.
+    """
+    return [f"source:{DBT_SOURCE}.{loader.VALUES_TABLE}+", f"source:{DBT_SOURCE}.{loader.CATALOG_TABLE}+"]
+
+def transform_task(load_names):
+    """Roda o dbt para os modelos a jusante da tabela longa quando alguma série mudou nesta execução."""
+    def run(inputs):
+        changed = [name for name in load_names if table_changed(inputs[f"carga:{name}"])]
+        if not changed:
+            print("Nenhuma série alterada; dbt não executado.")
+            return []
+        if shutil.which("dbt") is None:
+            raise RuntimeError("dbt não encontrado no PATH.")
+        command = [
+            "dbt", "run", "--project-dir", DBT_PROJECT_DIR, "--profiles-dir", DBT_PROFILES_DIR,
+            "--select", *dbt_selectors(),
+        ]
+        print(f"Executando: {' '.join(command)}")
+        completed = subprocess.run(command)
+        if completed.returncode != 0:
+            raise RuntimeError(f"dbt run terminou com código {completed.returncode}.")
+        return changed
+    return run
+
+def build_tasks(session, bcb_state, end_date, pool, selected=None, run_dbt=True):
+    """Monta o DAG: uma coleta e uma carga por série do registro e a transformação do dbt."""
+    fetches = {name: fetch for name, (_label, fetch) in fetch_all_data.series_fetchers(session, bcb_state, end_date).items()}
+    if selected:
+        fetches = {name: fetch for name, fetch in fetches.items() if name in selected}
+
+    tasks = [Task(f"coleta:{name}", "coleta", fetch_task(name, fetch)) for name, fetch in fetches.items()]
+    load_names = [name for name in loader.FILES_TO_LOAD if name in fetches]
+    if pool is not None:
+        tasks += [Task(f"carga:{name}", "carga", load_task(name, pool), deps=[f"coleta:{name}"]) for name in load_names]
+        if run_dbt and load_names:
+            tasks.append(Task("transformacao:dbt", "transformacao", transform_task(load_names),
+                              deps=[f"carga:{name}" for name in load_names]))
+    return tasks
+
+# --- Relatório ---
+
+def describe(result):
+    if result.error is not None:
+        return f"erro: {result.error}"
+    value = result.value
+    if result.task.stage == "coleta":
+        received = value[0] if value else None
+        return "sem dados" if received is None else ("sem alterações" if received == 0 else f"{received} registros")
+    if result.task.stage == "carga":
+        return ", ".join(f"{key}={val}" for key, val in value.items()) if value else "falhou ou sem dados"
+    return f"séries alteradas: {', '.join(value)}" if value else "nada a executar"
+
+def print_report(results, wall_time):
+    """Tempo de cada tarefa (início relativo e duração) e, por etapa, a soma das durações e o intervalo ocupado."""
+    print("\n--- Resumo do pipeline ---")
+    ordered = sorted(results.values(), key=lambda result: result.start)
+    for result in ordered:
+        print(f"  {result.task.name:<32} início {result.start:7.2f}s  duração {result.duration:7.2f}s  ({describe(result)})")
+    print("\n  Etapa            tarefas   soma (s)   de (s)  até (s)")
+    for stage in ("coleta", "carga", "transformacao"):
+        stage_results = [result for result in ordered if result.task.stage == stage]
+        if not stage_results:
+            continue
+        print(f"  {stage:<16} {len(stage_results):>7} {sum(r.duration for r in stage_results):10.2f} "
+              f"{min(r.start for r in stage_results):8.2f} {max(r.end for r in stage_results):8.2f}")
+    summed_time = sum(result.duration for result in ordered)
+    print(f"Tempo total (relógio): {wall_time:.2f}s | Soma dos tempos das tarefas: {summed_time:.2f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Executa coleta, carga e dbt como um DAG por série.")
+    parser.add_argument("--series", nargs="+", help="Séries a processar (padrão: todas).")
+    parser.add_argument("--skip-load", action="store_true", help="Apenas coleta (sem banco e sem dbt).")
+    parser.add_argument("--skip-dbt", action="store_true", help="Coleta e carga, sem rodar o dbt.")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    args = parser.parse_args()
+
+    os.makedirs(get_bcb_data.save_dir, exist_ok=True)
+    bcb_state = get_bcb_data.load_state()
+    end_date = datetime.date.today()
+
+    pool = None
+    if not args.skip_load:
+        # ThreadedConnectionPool não espera por uma conexão livre (getconn levanta PoolError): o pool
+        # comporta todas as cargas que o DAG pode rodar ao mesmo tempo (uma por série, até --workers)
+        pool = loader.get_db_pool(max(1, min(args.workers, len(loader.FILES_TO_LOAD))))
+        if pool is None:
+            print("Sem conexão com o banco: apenas a coleta será executada.")
+    try:
+        if pool is not None:
+            conn = pool.getconn()
+            try:
+                loader.create_series_tables(conn)
+                loader.create_fingerprint_table(conn)
+            finally:
+                pool.putconn(conn)
+        with http_client.HttpClient() as session:
+            tasks = build_tasks(session, bcb_state, end_date, pool, selected=args.series, run_dbt=not args.skip_dbt)
+            results, wall_time = run_dag(tasks, args.workers)
+    finally:
+        if pool is not None:
+            pool.closeall()
+    get_bcb_data.save_state(bcb_state)
+    print_report(results, wall_time)
+    # Uma falha do dbt interrompe o workflow, como quando ele rodava em um passo separado
+    transform = results.get("transformacao:dbt")
+    if transform is not None and transform.error is not None:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
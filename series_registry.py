@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+# Registro declarativo das séries (series_registry.json): fonte, código, frequência, unidade e precisão
+# de cada indicador, além dos rótulos usados pelo dashboard. Coletores, carga, pipeline, previsões e
+# dashboard percorrem este registro; incluir um indicador é acrescentar uma entrada ao JSON.
+#
+# Campos de cada série:
+#   id: identificador da série (arquivo em dados_economicos e series_id na tabela longa do banco)
+#   indicador: nome curto usado nas marts e no dashboard (padrão: id)
+#   fonte: "bcb" (SGS), "sidra" (IBGE) ou "worldbank"; codigo: código da série/tabela/indicador na fonte
+#   sidra / worldbank: parâmetros adicionais da fonte (variável, nível, classificação / país)
+#   frequencia: "diaria", "mensal", "trimestral", "trimestre_movel" ou "anual"
+#   unidade e precisao (casas decimais gravadas no banco)
+#   janela_revisao_dias: janela reprocessada pelo staging incremental do dbt (revisões da fonte)
+#   nome, rotulo, cartao, grafico: textos e formatação do dashboard; dashboard=false oculta a série
+import json
+import os
+import re
+
+REGISTRY_FILE = os.environ.get(
+    "SERIES_REGISTRY", os.path.join(os.path.dirname(os.path.abspath(__file__)), "series_registry.json")
+)
+DATA_DIR = "dados_economicos"
+
+SOURCES = {"bcb", "sidra", "worldbank"}
+FREQUENCIES = {"diaria", "mensal", "trimestral", "trimestre_movel", "anual"}
+REQUIRED_FIELDS = ("id", "fonte", "codigo", "frequencia", "unidade", "precisao")
+# id e indicador viram nomes de arquivo, chaves no banco e colunas do painel
+IDENTIFIER = re.compile(r"^[a-z][a-z0-9_]*$")
+DEFAULT_REVISION_DAYS = 45
+
+def normalize_entry(entry, position):
+    """Validates one registry entry and fills in its defaults. Raises ValueError when it is invalid."""
+    missing = [field for field in REQUIRED_FIELDS if entry.get(field) in (None, "")]
+    if missing:
+        raise ValueError(f"Série {entry.get('id', position)} sem os campos obrigatórios: {', '.join(missing)}")
+    series = dict(entry)
+    series["codigo"] = str(series["codigo"])
+    series.setdefault("indicador", series["id"])
+    series.setdefault("nome", series["id"])
+    series.setdefault("rotulo", series["nome"])
+    series.setdefault("dashboard", True)
+    series.setdefault("janela_revisao_dias", DEFAULT_REVISION_DAYS)
+    series.setdefault("cartao", {})
+    series.setdefault("grafico", {})
+    series["grafico"].setdefault("titulo", series["rotulo"])
+    series["grafico"].setdefault("eixo_y", series["unidade"])
+    series["grafico"].setdefault("formato", f".{series['precisao']}f")
+    series["ordem"] = position
+    for field in ("id", "indicador"):
+        if not IDENTIFIER.match(series[field]):
+            raise ValueError(f"{field} inválido na série {series['id']}: use letras minúsculas, dígitos e _.")
+    if series["fonte"] not in SOURCES:
+        raise ValueError(f"Fonte desconhecida na série {series['id']}: {series['fonte']}")
+    if series["frequencia"] not in FREQUENCIES:
+        raise ValueError(f"Frequência desconhecida na série {series['id']}: {series['frequencia']}")
+    return series
+
+def load_registry(path=REGISTRY_FILE):
+    """Reads and validates the registry file. Returns {series id: entry} in file order."""
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f)["series"]
+    registry = {}
+    indicators = set()
+    for position, entry in enumerate(entries):
+        series = normalize_entry(entry, position)
+        if series["id"] in registry or series["indicador"] in indicators:
+            raise ValueError(f"Série ou indicador repetido no registro: {series['id']} / {series['indicador']}")
+        registry[series["id"]] = series
+        indicators.add(series["indicador"])
+    return registry
+
+SERIES = load_registry()
+
+def get(series_id):
+    return SERIES[series_id]
+
+def by_source(source):
+    """Entries of one source ("bcb", "sidra" or "worldbank"), in registry order."""
+    return [series for series in SERIES.values() if series["fonte"] == source]
+
+def dashboard_series():
+    """Entries shown by the dashboard, in registry order."""
+    return [series for series in SERIES.values() if series["dashboard"]]
+
+def by_indicator(indicator):
+    return next(series for series in SERIES.values() if series["indicador"] == indicator)
+
+def json_path(series_id):
+    """Path of the series' JSON file in the data directory."""
+    return os.path.join(DATA_DIR, f"{series_id}.json")
+
+def catalog_rows():
+    """(series_id, indicador, nome, fonte, codigo, frequencia, unidade, precisao, janela_revisao_dias, dashboard, ordem) of each series."""
+    return [
+        (series["id"], series["indicador"], series["nome"], series["fonte"], series["codigo"], series["frequencia"],
+         series["unidade"], int(series["precisao"]), int(series["janela_revisao_dias"]), bool(series["dashboard"]),
+         series["ordem"])
+        for series in SERIES.values()
+    ]
@@ -1,19 +1,58 @@
 # -*- coding: utf-8 -*-
+# Início do script, para medir o tempo até os primeiros cartões (benchmarks/bench_startup.py)
+import time
+APP_START_TIME = time.perf_counter()
+
+# Módulos pesados (psycopg2, plotly, prophet, statsmodels) são importados apenas nas seções que os usam
 import streamlit as st
 import pandas as pd
-import psycopg2
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import math
-from prophet import Prophet
-from prophet.plot import plot_plotly, plot_components_plotly
 import base64
+import functools
+import os
+import re
+import threading
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+
+import forecasting
+import metrics
+import series_registry
+from downsampling import downsample_frame
 
 def decode_base64(encoded_string):
     """Decodes a Base64 encoded string."""
     return base64.b64decode(encoded_string).decode("utf-8")
 
+# --- Cache Metrics ---
+# O st.cache_data não informa se uma chamada foi atendida pelo cache: o corpo da função só roda
+# em uma falta, então ele marca a chamada atual (por thread, aceitando chamadas aninhadas)
+_cache_call = threading.local()
+
+def instrumented_cache_data(**cache_kwargs):
+    """st.cache_data que conta acertos e faltas por função (dashboard_cache_total{function, result})."""
+    def decorator(func):
+        @functools.wraps(func)
+        def body(*args, **kwargs):
+            _cache_call.miss = True
+            return func(*args, **kwargs)
+
+        cached = st.cache_data(**cache_kwargs)(body)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            outer, _cache_call.miss = getattr(_cache_call, "miss", False), False
+            try:
+                return cached(*args, **kwargs)
+            finally:
+                result = "miss" if _cache_call.miss else "hit"
+                _cache_call.miss = outer
+                metrics.inc("dashboard_cache_total", function=func.__name__, result=result)
+
+        wrapper.clear = cached.clear
+        return wrapper
+    return decorator
+
 # --- Database Credentials (Use environment variables in production!) ---
 DB_HOST = "aws-0-us-west-1.pooler.supabase.com"
 DB_PORT = "6543"
@@ -22,41 +61,240 @@ DB_USER = "postgres.exjrfoajzobkncnoompk"
 DB_PASSWORD = decode_base64("cHJvamV0b2JpMTIz")
 
 # --- Database Connection --- 
-@st.cache_resource # Cache the connection for efficiency
-def get_db_connection():
-    """Estabelece uma conexão com o banco de dados PostgreSQL."""
-    try:
-        conn = psycopg2.connect(
-            host=DB_HOST,
-            port=DB_PORT,
-            database=DB_NAME,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            connect_timeout=10
-        )
-        return conn
-    except psycopg2.OperationalError as e:
-        st.error(f"Erro ao conectar ao banco de dados: {e}")
-        print(f"Erro ao conectar ao banco de dados: {e}")
-        return None
+@st.cache_resource # Um único pool compartilhado por todas as sessões
+def get_db_pool():
+    """Cria o pool de conexões com o banco de dados PostgreSQL (tamanho em DB_POOL_MAX)."""
+    import db_pool
+    return db_pool.ConnectionPool(
+        host=DB_HOST,
+        port=DB_PORT,
+        database=DB_NAME,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        connect_timeout=10,
+        cursor_factory=db_pool.InstrumentedCursor
+    )
+
+def query_label(query):
+    """Rótulo de uma consulta nas métricas: a primeira tabela do FROM (ex.: mart_indicadores_mensal)."""
+    match = re.search(r"\bFROM\s+(?:\w+\.)?(\w+)", query, re.IGNORECASE)
+    return match.group(1) if match else "outra"
+
+def read_sql_frame(conn, query, params):
+    return pd.read_sql_query(query, conn, params=params)
+
+def query_db(query, params=None, reader=read_sql_frame):
+    """Executa uma consulta com uma conexão do pool; se a conexão cair durante a consulta, tenta uma vez com outra.
 
-@st.cache_data(ttl=3600) # Cache data for 1 hour
-def fetch_data(query):
-    """Busca dados do banco de dados usando a query fornecida."""
-    conn = get_db_connection()
-    if conn:
+    reader(conn, query, params) lê o resultado: DataFrame do pandas por padrão, db_pool.fetch_arrow para Arrow.
+    """
+    import db_pool
+    pool = get_db_pool()
+    label = query_label(query)
+    for attempt in range(2):
+        conn = None
         try:
-            df = pd.read_sql_query(query, conn)
-            if "data_referencia" in df.columns:
-                 df["data_referencia"] = pd.to_datetime(df["data_referencia"])
-                 df["ano"] = df["data_referencia"].dt.year
-            return df
-        except Exception as e:
-            st.error(f"Erro ao buscar dados: {e}")
-            print(f"Erro ao buscar dados: {e}")
-            return pd.DataFrame()
-    else:
+            with pool.connection() as conn:
+                with metrics.timer("dashboard_query_seconds", query=label) as measured:
+                    result = reader(conn, query, params)
+            metrics.log_event("consulta", consulta=label, segundos=round(measured["segundos"], 4), linhas=len(result))
+            return result
+        except db_pool.CONNECTION_ERRORS as e:
+            # Só repete se a conexão caiu; os demais erros (ex.: QueryCanceled do statement timeout) vão para quem chamou
+            if attempt == 1 or conn is None or not conn.closed:
+                raise
+            print(f"Conexão perdida durante a consulta, tentando novamente: {e}")
+
+@instrumented_cache_data(ttl=3600) # Cache data for 1 hour
+def fetch_data(query, params=None):
+    """Busca dados do banco de dados usando a query fornecida (params: tupla de parâmetros %s)."""
+    try:
+        df = query_db(query, params)
+        if "data_referencia" in df.columns:
+             df["data_referencia"] = pd.to_datetime(df["data_referencia"])
+             df["ano"] = df["data_referencia"].dt.year
+        return df
+    except Exception as e:
+        st.error(f"Erro ao buscar dados: {e}")
+        print(f"Erro ao buscar dados: {e}")
+        return pd.DataFrame()
+
+# --- Batched History Fetch ---
+# HISTORY_BATCH_FETCH=1 busca o histórico de todos os indicadores em uma única consulta à tabela longa de
+# staging, transferida com COPY ... TO STDOUT e decodificada pelo leitor CSV do Arrow direto em colunas
+# tipadas (sem um objeto Python por célula); os DataFrames de cada indicador são recortados localmente.
+# Com 0, uma consulta por indicador com pd.read_sql_query.
+HISTORY_BATCH_FETCH = os.environ.get("HISTORY_BATCH_FETCH", "1") == "1"
+
+@instrumented_cache_data(ttl=3600)
+def fetch_history_batch(series_ids, date_ranges=None):
+    """Histórico de várias séries em uma única consulta: {series_id: DataFrame (data_referencia, valor, ano)}."""
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import db_pool
+
+    query, params = build_query(HISTORY_BATCH_QUERY, "data_referencia", date_ranges, {"series_id": list(series_ids)})
+    column_types = {"series_id": pa.string(), "data_referencia": pa.date32(), "valor": pa.float64()}
+    try:
+        table = query_db(query, params, reader=lambda conn, q, p: db_pool.fetch_arrow(conn, q, p, column_types))
+    except Exception as e:
+        st.error(f"Erro ao buscar dados: {e}")
+        print(f"Erro ao buscar dados: {e}")
+        return {}
+
+    # Ordena por série mantendo a ordem das datas (argsort estável dos códigos do dicionário) e recorta
+    # cada série como uma fatia contígua da tabela
+    encoded = pc.dictionary_encode(table.column("series_id")).combine_chunks()
+    codes = encoded.indices.to_numpy(zero_copy_only=False)
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    table = table.select(["data_referencia", "valor"]).take(pa.array(order))
+    frames = {}
+    for code, series_id in enumerate(encoded.dictionary.to_pylist()):
+        start, end = np.searchsorted(sorted_codes, code, "left"), np.searchsorted(sorted_codes, code, "right")
+        df = table.slice(start, end - start).to_pandas(date_as_object=False)
+        df["data_referencia"] = pd.to_datetime(df["data_referencia"])
+        df["ano"] = df["data_referencia"].dt.year
+        frames[series_id] = df
+    return frames
+
+# --- Local Data Source ---
+# DATA_SOURCE=local lê as séries do armazenamento colunar local (dados_economicos/arrow) em vez do banco
+DATA_SOURCE = os.environ.get("DATA_SOURCE", "db")
+
+@instrumented_cache_data(ttl=3600)
+def fetch_local_series(series_name, value_column):
+    """Lê uma série do armazenamento colunar local (Arrow IPC via memory map)."""
+    import columnar_store
+    df = columnar_store.read_series_frame(series_name)
+    if df is None:
+        st.warning(f"Série {series_name} não encontrada no armazenamento local.")
+        return pd.DataFrame()
+    df = df.rename(columns={"valor": value_column})
+    df["ano"] = df["data_referencia"].dt.year
+    return df
+
+@instrumented_cache_data(ttl=3600)
+def fetch_local_series_range(series_name, value_column, date_ranges):
+    """Lê apenas os intervalos de datas pedidos de uma série local (filtro aplicado no Arrow, antes do pandas)."""
+    import columnar_store
+    import pyarrow.compute as pc
+    table = columnar_store.read_series(series_name)
+    if table is None:
+        st.warning(f"Série {series_name} não encontrada no armazenamento local.")
         return pd.DataFrame()
+    mask = None
+    for start_date, end_date in date_ranges:
+        in_range = pc.and_(pc.greater_equal(table.column("data"), start_date), pc.less(table.column("data"), end_date))
+        mask = in_range if mask is None else pc.or_(mask, in_range)
+    if mask is not None:
+        table = table.filter(mask)
+    df = table.to_pandas(date_as_object=False).rename(columns={"data": "data_referencia", "valor": value_column})
+    df["data_referencia"] = pd.to_datetime(df["data_referencia"])
+    df["ano"] = df["data_referencia"].dt.year
+    return df
+
+@instrumented_cache_data(ttl=3600)
+def fetch_local_latest_values():
+    """Último valor de cada série local, lido da última linha do arquivo Arrow (sem carregar o histórico no pandas)."""
+    import columnar_store
+    rows = []
+    for indicador, series_name in LOCAL_SERIES.items():
+        table = columnar_store.read_series(series_name)
+        if table is not None and table.num_rows:
+            last_row = table.slice(table.num_rows - 1).to_pylist()[0]
+            rows.append({"indicador": indicador, "data_referencia": pd.Timestamp(last_row["data"]), "valor": last_row["valor"]})
+    return pd.DataFrame(rows, columns=["indicador", "data_referencia", "valor"])
+
+@instrumented_cache_data(ttl=3600)
+def fetch_local_years():
+    """Anos cobertos pelas séries locais, a partir da primeira e da última data de cada arquivo."""
+    import columnar_store
+    import pyarrow.compute as pc
+    years = set()
+    for series_name in LOCAL_SERIES.values():
+        table = columnar_store.read_series(series_name)
+        if table is not None and table.num_rows:
+            bounds = pc.min_max(table.column("data")).as_py()
+            years.update(range(bounds["min"].year, bounds["max"].year + 1))
+    return pd.DataFrame({"ano": sorted(years, reverse=True)})
+
+# Indicadores exibidos, na ordem do registro (series_registry.json): indicador -> entrada do registro
+# (série, rótulos e formatação dos cartões e gráficos)
+DASHBOARD_INDICATORS = {entry["indicador"]: entry for entry in series_registry.dashboard_series()}
+
+# indicador -> série no armazenamento local
+LOCAL_SERIES = {indicador: entry["id"] for indicador, entry in DASHBOARD_INDICATORS.items()}
+
+# --- Forecast Cache ---
+# Tempo máximo (s) que um clique em "Gerar Previsão" espera pelo treino antes de devolver a sessão
+FORECAST_WAIT_SECONDS = float(os.environ.get("FORECAST_WAIT_SECONDS", "20"))
+# FORECAST_PREWARM=1 treina em segundo plano as previsões do horizonte padrão de todos os indicadores
+FORECAST_PREWARM = os.environ.get("FORECAST_PREWARM", "1") == "1"
+
+@st.cache_resource
+def get_forecast_cache():
+    """Cache de previsões compartilhado entre as sessões (LRU em memória + modelos persistidos em disco)."""
+    return forecasting.ForecastCache()
+
+@st.cache_resource
+def get_forecast_trainer():
+    """Worker de treino em segundo plano compartilhado entre as sessões."""
+    return forecasting.ForecastTrainer(get_forecast_cache())
+
+def prewarm_forecasts(indicator_frames):
+    """Agenda o treino do horizonte padrão para os indicadores que ainda não estão em cache."""
+    cache = get_forecast_cache()
+    trainer = get_forecast_trainer()
+    for name, (df_orig, y_col) in indicator_frames.items():
+        if df_orig.empty:
+            continue
+        df_prophet = forecasting.prepare_prophet_frame(df_orig, "data_referencia", y_col)
+        if len(df_prophet) < 2:
+            continue
+        key = forecasting.make_cache_key(name, df_prophet, forecasting.DEFAULT_FORECAST_PERIODS)
+        if cache.get(key) is None:
+            trainer.submit(key, df_prophet, forecasting.DEFAULT_FORECAST_PERIODS)
+
+@st.cache_resource
+def prewarm_forecasts_once(data_version):
+    """Carrega o histórico completo e agenda o pré-treino uma única vez por processo e versão dos dados
+    (data do último valor de cada indicador); as reexecuções do script não repetem a carga."""
+    full_histories = load_histories()
+    prewarm_forecasts({entry["nome"]: (full_histories[indicador], indicador) for indicador, entry in DASHBOARD_INDICATORS.items()})
+    return True
+
+@instrumented_cache_data(ttl=3600)
+def fetch_stored_forecast(indicator, periods):
+    """Lê a previsão pré-calculada pelo job em lote (python forecasting.py) ou devolve um DataFrame vazio."""
+    columns = ["ds", "yhat", "yhat_lower", "yhat_upper", "hash_dados"]
+    if DATA_SOURCE == "local":
+        if not os.path.exists(forecasting.FORECAST_STORE_PATH):
+            return pd.DataFrame(columns=columns)
+        df = pd.read_feather(forecasting.FORECAST_STORE_PATH)
+        df = df[(df["indicador"] == indicator) & (df["horizonte"] == periods)]
+        return df[columns].sort_values(by="ds").reset_index(drop=True)
+    query = f"SELECT ds, yhat, yhat_lower, yhat_upper, hash_dados FROM public.{forecasting.FORECAST_TABLE} WHERE indicador = %(indicador)s AND horizonte = %(horizonte)s ORDER BY ds ASC;"
+    try:
+        df = query_db(query, {"indicador": indicator, "horizonte": int(periods)})
+        df["ds"] = pd.to_datetime(df["ds"])
+        return df
+    except Exception as e:
+        # A tabela só existe depois da primeira execução do job em lote
+        print(f"Previsão pré-calculada indisponível para {indicator}: {e}")
+        return pd.DataFrame(columns=columns)
+
+def plot_forecast_frame(df_prophet, forecast):
+    """Gráfico no estilo do plot_plotly do Prophet a partir apenas de ds/yhat/yhat_lower/yhat_upper (job em lote, ETS, tendência)."""
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=df_prophet["ds"], y=df_prophet["y"], mode="markers", marker=dict(color="black", size=4), name="Observado"))
+    fig.add_trace(go.Scatter(x=forecast["ds"], y=forecast["yhat_lower"], mode="lines", line=dict(width=0), hoverinfo="skip", showlegend=False))
+    fig.add_trace(go.Scatter(x=forecast["ds"], y=forecast["yhat_upper"], mode="lines", line=dict(width=0), fill="tonexty", fillcolor="rgba(0, 114, 178, 0.2)", name="Intervalo"))
+    fig.add_trace(go.Scatter(x=forecast["ds"], y=forecast["yhat"], mode="lines", line=dict(color="#0072B2", width=2), name="Previsão"))
+    return fig
 
 # --- Helper Functions for Period Grouping --- 
 def get_period_groups(years, group_size):
@@ -78,27 +316,137 @@ st.set_page_config(page_title="Projeto final de BI - Termômetro da economia", l
 st.title("🇧🇷 Projeto final de BI - Termômetro da economia")
 st.markdown("Dashboard interativo com indicadores econômicos chave do Brasil.")
 
+# --- Display Key Metrics --- 
+# Os cartões são desenhados primeiro, a partir de uma consulta pequena (uma linha por indicador na
+# mart_ultimos_valores); o histórico completo só é buscado depois, gráfico a gráfico.
+def fetch_latest_values():
+    """Retorna o último valor de cada indicador (colunas indicador, data_referencia, valor)."""
+    if DATA_SOURCE == "local":
+        return fetch_local_latest_values()
+    return fetch_data("SELECT indicador, data_referencia, valor FROM public.mart_ultimos_valores;")
+
+def get_latest_value(indicador, df_orig=None, y_col=None):
+    """Retorna (data_referencia, valor) do último registro do indicador, ou None."""
+    if not df_ultimos.empty:
+        rows = df_ultimos[df_ultimos["indicador"] == indicador]
+        if not rows.empty:
+            return rows.iloc[0]["data_referencia"], float(rows.iloc[0]["valor"])
+    if df_orig is not None and not df_orig.empty:
+        latest = df_orig.sort_values(by='data_referencia', ascending=False).iloc[0]
+        return latest["data_referencia"], latest[y_col]
+    return None
+
+# Cartões por linha
+CARDS_PER_ROW = 5
+
+def format_metric_value(entry, value):
+    """Formata o valor do cartão com o prefixo, a escala, as casas decimais e o sufixo do registro."""
+    card = entry["cartao"]
+    decimals = card.get("casas", entry["precisao"])
+    return f"{card.get('prefixo', '')}{value * card.get('escala', 1):.{decimals}f}{card.get('sufixo', '')}"
+
+def show_metric(slot, indicador, latest):
+    entry = DASHBOARD_INDICATORS[indicador]
+    label = entry["cartao"].get("rotulo", entry["rotulo"])
+    if latest:
+        slot.metric(label=f"{label} - {latest[0].strftime('%d/%m/%Y')}", value=format_metric_value(entry, latest[1]))
+    else:
+        slot.metric(label=label, value="N/D")
+
+st.header("Últimos Valores Registrados")
+df_ultimos = fetch_latest_values()
+metric_slots = {}
+card_indicators = list(DASHBOARD_INDICATORS)
+for start in range(0, len(card_indicators), CARDS_PER_ROW):
+    row = card_indicators[start:start + CARDS_PER_ROW]
+    metric_slots.update({indicador: col.empty() for indicador, col in zip(row, st.columns(CARDS_PER_ROW))})
+pending_metrics = []
+for indicador, slot in metric_slots.items():
+    latest = get_latest_value(indicador)
+    if latest:
+        show_metric(slot, indicador, latest)
+    else:
+        # Sem a mart (ou sem o indicador nela): preenchido com o histórico, mais abaixo
+        pending_metrics.append(indicador)
+st.session_state["tempo_primeira_renderizacao_s"] = time.perf_counter() - APP_START_TIME
+
 # --- Fetch Data --- 
-query_selic = "SELECT data_referencia, taxa_selic_percentual AS selic FROM public.stg_selic ORDER BY data_referencia ASC;"
-query_ipca = "SELECT data_referencia, indice_ipca AS ipca FROM public.stg_ipca ORDER BY data_referencia ASC;"
-query_cambio = "SELECT data_referencia, cambio_ptax_venda_brl_usd AS cambio FROM public.stg_cambio_ptax_venda ORDER BY data_referencia ASC;"
-query_desemprego = "SELECT data_referencia, taxa_desemprego_percentual AS desemprego FROM public.stg_desemprego ORDER BY data_referencia ASC;"
-query_pib = "SELECT data_referencia, pib_valor_corrente_brl_milhoes AS pib FROM public.stg_pib_trimestral ORDER BY data_referencia ASC;" 
-
-df_selic_orig = fetch_data(query_selic)
-df_ipca_orig = fetch_data(query_ipca)
-df_cambio_orig = fetch_data(query_cambio)
-df_desemprego_orig = fetch_data(query_desemprego)
-df_pib_orig = fetch_data(query_pib) 
+# Histórico de um indicador na tabela longa de staging; build_query acrescenta o filtro da série
+# (series_id, atendido pelo índice (series_id, data_referencia)), o filtro de período e a ordenação
+HISTORY_QUERY = "SELECT data_referencia, valor AS {indicador} FROM public.stg_valores_series"
+# Histórico de várias séries de uma vez (fetch_history_batch)
+HISTORY_BATCH_QUERY = "SELECT series_id, data_referencia, valor FROM public.stg_valores_series"
+# Último valor de cada série pedida (atendido pelo índice (series_id, data_referencia))
+LATEST_HISTORY_QUERY = "SELECT DISTINCT ON (series_id) series_id, data_referencia, valor FROM public.stg_valores_series WHERE series_id = ANY(%s) ORDER BY series_id, data_referencia DESC;"
+
+def years_to_date_ranges(years):
+    """Converte anos selecionados em intervalos [1º de janeiro, 1º de janeiro seguinte), unindo anos consecutivos."""
+    ranges = []
+    for year in sorted(set(int(y) for y in years)):
+        if ranges and ranges[-1][1].year == year:
+            ranges[-1] = (ranges[-1][0], date(year + 1, 1, 1))
+        else:
+            ranges.append((date(year, 1, 1), date(year + 1, 1, 1)))
+    return tuple(ranges)
+
+def build_query(base_query, date_column, date_ranges=None, filters=None):
+    """Acrescenta à consulta filtros de igualdade ({coluna: valor}, ou lista de valores), um filtro parametrizado
+    por intervalos de datas (usa o índice da coluna) e a ordenação."""
+    params = []
+    conditions = []
+    for column, value in (filters or {}).items():
+        conditions.append(f"{column} = ANY(%s)" if isinstance(value, list) else f"{column} = %s")
+        params.append(value)
+    date_conditions = []
+    for start_date, end_date in date_ranges or ():
+        date_conditions.append(f"({date_column} >= %s AND {date_column} < %s)")
+        params.extend([start_date, end_date])
+    if date_conditions:
+        conditions.append(f"({' OR '.join(date_conditions)})")
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    return f"{base_query}{where} ORDER BY {date_column} ASC;", tuple(params) or None
+
+def fetch_history_latest_values(indicadores):
+    """Último valor dos indicadores pedidos, lido da staging (uma linha por série), sem o histórico completo."""
+    series_ids = {DASHBOARD_INDICATORS[indicador]["id"]: indicador for indicador in indicadores}
+    df = fetch_data(LATEST_HISTORY_QUERY, (list(series_ids),))
+    if df.empty:
+        return pd.DataFrame(columns=["indicador", "data_referencia", "valor"])
+    df["indicador"] = df.pop("series_id").map(series_ids)
+    return df[["indicador", "data_referencia", "valor"]]
+
+def load_history(indicador, date_ranges=None):
+    """Busca o histórico de um indicador (do banco ou do armazenamento local), completo ou só nos intervalos pedidos."""
+    series_name = DASHBOARD_INDICATORS[indicador]["id"]
+    if DATA_SOURCE == "local":
+        if date_ranges is None:
+            return fetch_local_series(series_name, indicador)
+        return fetch_local_series_range(series_name, indicador, date_ranges)
+    query, params = build_query(HISTORY_QUERY.format(indicador=indicador), "data_referencia", date_ranges, {"series_id": series_name})
+    return fetch_data(query, params)
+
+def load_histories(date_ranges=None):
+    """Histórico de todos os indicadores do dashboard, {indicador: DataFrame}; no banco, em uma única consulta."""
+    if DATA_SOURCE == "local" or not HISTORY_BATCH_FETCH:
+        return {indicador: load_history(indicador, date_ranges) for indicador in DASHBOARD_INDICATORS}
+    frames = fetch_history_batch(tuple(entry["id"] for entry in DASHBOARD_INDICATORS.values()), date_ranges)
+    return {
+        indicador: frames[entry["id"]].rename(columns={"valor": indicador}) if entry["id"] in frames else pd.DataFrame()
+        for indicador, entry in DASHBOARD_INDICATORS.items()
+    }
+
+# Os anos do filtro vêm de uma consulta pequena (mart_indicadores_anual), sem esperar o histórico
+if DATA_SOURCE == "local":
+    df_anos = fetch_local_years()
+else:
+    df_anos = fetch_data("SELECT DISTINCT ano FROM public.mart_indicadores_anual ORDER BY ano DESC;")
+    if df_anos.empty:
+        # Sem a mart: os anos vêm da tabela de staging, sem transferir o histórico
+        df_anos = fetch_data("SELECT DISTINCT extract(year FROM data_referencia)::int AS ano FROM public.stg_valores_series ORDER BY ano DESC;")
+all_years = set(df_anos["ano"].dropna().astype(int)) if not df_anos.empty else set()
 
 # --- Sidebar Filters --- 
 st.sidebar.header("Filtros de Período (Visualização Histórica)")
-all_years = set()
-if not df_selic_orig.empty and "ano" in df_selic_orig.columns: all_years.update(df_selic_orig["ano"].unique())
-if not df_ipca_orig.empty and "ano" in df_ipca_orig.columns: all_years.update(df_ipca_orig["ano"].unique())
-if not df_cambio_orig.empty and "ano" in df_cambio_orig.columns: all_years.update(df_cambio_orig["ano"].unique())
-if not df_desemprego_orig.empty and "ano" in df_desemprego_orig.columns: all_years.update(df_desemprego_orig["ano"].unique())
-if not df_pib_orig.empty and "ano" in df_pib_orig.columns: all_years.update(df_pib_orig["ano"].unique())
 
 sorted_years = sorted([int(y) for y in filter(lambda x: not pd.isna(x), all_years)], reverse=True)
 
@@ -141,87 +489,102 @@ elif filter_type == "Biênio":
         selected_years_final = sorted_years
 
 # --- Filter Data Based on Selection --- 
-def filter_df_by_years(df, years):
-    if df.empty or "ano" not in df.columns:
-        return df
-    df_copy = df.copy()
-    df_copy["ano"] = pd.to_numeric(df_copy["ano"], errors="coerce")
-    return df_copy[df_copy["ano"].isin(years)].sort_values(by="data_referencia")
-
-df_selic_filtered = filter_df_by_years(df_selic_orig, selected_years_final)
-df_ipca_filtered = filter_df_by_years(df_ipca_orig, selected_years_final)
-df_cambio_filtered = filter_df_by_years(df_cambio_orig, selected_years_final)
-df_desemprego_filtered = filter_df_by_years(df_desemprego_orig, selected_years_final)
-df_pib_filtered = filter_df_by_years(df_pib_orig, selected_years_final) 
-
-# --- Display Key Metrics --- 
-st.header("Últimos Valores Registrados")
-col_m1, col_m2, col_m3, col_m4, col_m5 = st.columns(5) 
+# O período selecionado vira intervalos de datas aplicados na consulta (WHERE parametrizado), então
+# só as linhas do período são transferidas; o histórico completo só é lido pela previsão.
+selected_date_ranges = years_to_date_ranges(selected_years_final)
 
-with col_m1:
-    if not df_selic_orig.empty:
-        latest_selic = df_selic_orig.sort_values(by='data_referencia', ascending=False).iloc[0]
-        st.metric(label=f"Selic (% a.a.) - {latest_selic['data_referencia'].strftime('%d/%m/%Y')}", value=f"{latest_selic['selic']:.2f}%")
-    else:
-        st.metric(label="Selic (% a.a.)", value="N/D")
-with col_m2:
-    if not df_ipca_orig.empty:
-        latest_ipca = df_ipca_orig.sort_values(by='data_referencia', ascending=False).iloc[0]
-        st.metric(label=f"IPCA (Índice) - {latest_ipca['data_referencia'].strftime('%d/%m/%Y')}", value=f"{latest_ipca['ipca']:.2f}")
-    else:
-        st.metric(label="IPCA", value="N/D")
-with col_m3:
-    if not df_cambio_orig.empty:
-        latest_cambio = df_cambio_orig.sort_values(by='data_referencia', ascending=False).iloc[0]
-        st.metric(label=f"Câmbio (R$/US$) - {latest_cambio['data_referencia'].strftime('%d/%m/%Y')}", value=f"R$ {latest_cambio['cambio']:.2f}")
-    else:
-        st.metric(label="Câmbio (R$/US$)", value="N/D")
-with col_m4:
-    if not df_desemprego_orig.empty:
-        latest_desemprego = df_desemprego_orig.sort_values(by='data_referencia', ascending=False).iloc[0]
-        st.metric(label=f"Desemprego (%) - {latest_desemprego['data_referencia'].strftime('%d/%m/%Y')}", value=f"{latest_desemprego['desemprego']:.1f}%")
-    else:
-        st.metric(label="Desemprego (%)", value="N/D")
-with col_m5: 
-    if not df_pib_orig.empty:
-        latest_pib = df_pib_orig.sort_values(by='data_referencia', ascending=False).iloc[0]
-        st.metric(label=f"PIB (R$ Bilhões) - {latest_pib['data_referencia'].strftime('%d/%m/%Y')}", value=f"R$ {latest_pib['pib']/1e3:.2f} Bi") 
-    else:
-        st.metric(label="PIB (R$ Milhões)", value="N/D")
+def date_ranges_mask(dates, date_ranges):
+    """Máscara das datas contidas nos intervalos (usada no painel de correlação, já carregado); sem intervalos, todas as datas."""
+    mask = pd.Series(not date_ranges, index=dates.index)
+    for start_date, end_date in date_ranges:
+        mask |= (dates >= pd.Timestamp(start_date)) & (dates < pd.Timestamp(end_date))
+    return mask
 
 # --- Display Charts --- 
+# O histórico do período de todos os indicadores chega em uma única consulta (load_histories).
 st.header(f"Visualização Histórica de Indicadores Macroeconômicos ({filter_label})")
-col1, col2, col3 = st.columns(3) 
+chart_columns = st.columns(3)
+
+# Acima deste número de pontos (após a redução), a linha é desenhada sem marcadores
+MAX_PONTOS_MARCADORES = 400
 
 def plot_indicator(df, x_col, y_col, title, labels, y_format, col_obj):
+    import plotly.express as px
+
     with col_obj:
         st.subheader(title)
         if not df.empty:
-            fig = px.line(df, x=x_col, y=y_col, title=title, labels=labels, markers=True)
+            # Períodos longos são reduzidos com LTTB para no máximo MAX_PONTOS_GRAFICO pontos
+            df_plot = downsample_frame(df, x_col, y_col)
+            fig = px.line(df_plot, x=x_col, y=y_col, title=title, labels=labels, markers=len(df_plot) <= MAX_PONTOS_MARCADORES)
             fig.update_traces(hovertemplate=f"Data: %{{x|%d/%m/%Y}}<br>{labels[y_col]}: %{{y:{y_format}}}")
             fig.update_layout(hovermode="x unified")
             st.plotly_chart(fig, use_container_width=True)
         else:
             st.warning(f"Não há dados de {title.split('(')[0].strip()} para o período selecionado.")
 
-plot_indicator(df_selic_filtered, "data_referencia", "selic", "Taxa Selic (% a.a.)", {"data_referencia": "Data", "selic": "Taxa (%)"}, ".2f%", col1)
-plot_indicator(df_ipca_filtered, "data_referencia", "ipca", "IPCA (Índice)", {"data_referencia": "Data", "ipca": "Índice"}, ".2f", col1)
-plot_indicator(df_cambio_filtered, "data_referencia", "cambio", "Câmbio (R$/US$ - PTAX Venda)", {"data_referencia": "Data", "cambio": "Taxa (R$/US$)"}, ".2f", col2)
-plot_indicator(df_desemprego_filtered, "data_referencia", "desemprego", "Taxa de Desocupação (% - PNAD Contínua)", {"data_referencia": "Data", "desemprego": "Taxa (%)"}, ".1f%", col2)
-plot_indicator(df_pib_filtered, "data_referencia", "pib", "PIB Trimestral (R$ Milhões)", {"data_referencia": "Data", "pib": "Valor (R$ Milhões)"}, ",.0f", col3) 
+# Os gráficos são distribuídos em ordem pelas colunas, preenchendo uma coluna antes da seguinte
+charts_per_column = math.ceil(len(DASHBOARD_INDICATORS) / len(chart_columns))
+filtered_frames = load_histories(selected_date_ranges)
+for position, (indicador, entry) in enumerate(DASHBOARD_INDICATORS.items()):
+    chart = entry["grafico"]
+    plot_indicator(filtered_frames[indicador], "data_referencia", indicador, chart["titulo"], {"data_referencia": "Data", indicador: chart["eixo_y"]}, chart["formato"], chart_columns[position // charts_per_column])
+
+# Cartões que não estavam na mart_ultimos_valores: último valor de cada série pendente na staging
+# (no armazenamento local, os cartões já vêm do último registro de cada arquivo)
+if pending_metrics:
+    if DATA_SOURCE != "local":
+        df_ultimos = pd.concat([df_ultimos, fetch_history_latest_values(tuple(pending_metrics))], ignore_index=True)
+    for indicador in pending_metrics:
+        show_metric(metric_slots[indicador], indicador, get_latest_value(indicador))
 
 # --- Correlation Analysis --- 
+# O painel mensal pré-alinhado (mart_painel_indicadores; sem ele, montado localmente por reamostragem)
+# é lido uma vez, e as matrizes de todos os pares e as correlações móveis são calculadas em uma passada
+# e guardadas em cache por seleção de anos; trocar os indicadores apenas lê os resultados.
+@instrumented_cache_data(ttl=3600)
+def get_correlation_results(date_ranges):
+    """Resultados de correlação (matrizes Pearson/Spearman, observações, janelas móveis) para o período."""
+    import correlation
+    if DATA_SOURCE != "local":
+        df_painel = fetch_data(f"SELECT mes AS data_referencia, {', '.join(DASHBOARD_INDICATORS)} FROM public.mart_painel_indicadores ORDER BY mes ASC;")
+    else:
+        df_painel = pd.DataFrame()
+    if df_painel.empty:
+        # Sem a mart: apenas o período selecionado, mais uma janela móvel antes de cada intervalo
+        context_ranges = tuple(
+            ((pd.Timestamp(start) - pd.DateOffset(months=correlation.ROLLING_WINDOW)).date(), end) for start, end in date_ranges
+        ) or None
+        df_painel = correlation.build_panel(load_histories(context_ranges))
+    if df_painel.empty:
+        return None
+    return correlation.compute_correlations(df_painel, date_ranges_mask(df_painel["data_referencia"], date_ranges))
+
 st.header(f"Análise de Correlação ({filter_label})")
-indicator_options_corr = {
-    "Selic (% a.a.)": df_selic_filtered,
-    "IPCA (Índice)": df_ipca_filtered,
-    "Câmbio (R$/US$)": df_cambio_filtered,
-    "Desemprego (%)": df_desemprego_filtered,
-    "PIB (R$ Milhões)": df_pib_filtered 
+corr_results = get_correlation_results(selected_date_ranges)
+indicator_options_corr = {entry["rotulo"]: indicador for indicador, entry in DASHBOARD_INDICATORS.items()}
+valid_indicators_corr = {
+    name: col for name, col in indicator_options_corr.items()
+    if corr_results is not None and col in corr_results["indicadores"] and corr_results["observacoes"].loc[col, col] > 0
 }
-valid_indicators_corr = {name: df for name, df in indicator_options_corr.items() if not df.empty}
 
 if len(valid_indicators_corr) >= 2:
+    import numpy as np
+    import plotly.express as px
+    import plotly.graph_objects as go
+    import correlation
+
+    corr_method = st.radio("Método de correlação:", ("Pearson", "Spearman"), index=0, horizontal=True, key="corr_method")
+    corr_matrix = corr_results[corr_method.lower()]
+    corr_columns = list(valid_indicators_corr.values())
+    corr_labels = {col: name for name, col in valid_indicators_corr.items()}
+    fig_matrix = px.imshow(
+        corr_matrix.loc[corr_columns, corr_columns].rename(index=corr_labels, columns=corr_labels),
+        text_auto=".2f", zmin=-1, zmax=1, color_continuous_scale="RdBu",
+        title=f"Matriz de Correlação ({corr_method}, base mensal)"
+    )
+    st.plotly_chart(fig_matrix, use_container_width=True)
+
     col_corr1, col_corr2 = st.columns(2)
     with col_corr1:
         indicator1_name = st.selectbox("Selecione o primeiro indicador para correlação:", list(valid_indicators_corr.keys()), index=0, key="corr_ind1")
@@ -231,34 +594,36 @@ if len(valid_indicators_corr) >= 2:
              st.warning("Selecione pelo menos dois indicadores com dados disponíveis para correlação.")
         else:
             indicator2_name = st.selectbox("Selecione o segundo indicador para correlação:", available_options_y, index=0, key="corr_ind2")
-            df1 = valid_indicators_corr[indicator1_name].set_index('data_referencia')
-            df2 = valid_indicators_corr[indicator2_name].set_index('data_referencia')
-            df_merged = pd.merge(df1, df2, left_index=True, right_index=True, how="inner")
-            if not df_merged.empty and len(df_merged) > 1:
-                col_name1 = df_merged.columns[0]
-                col_name2 = df_merged.columns[1]
-                correlation = df_merged[col_name1].corr(df_merged[col_name2])
+            col_name1 = valid_indicators_corr[indicator1_name]
+            col_name2 = valid_indicators_corr[indicator2_name]
+            correlation_value = corr_matrix.loc[col_name1, col_name2]
+            if pd.notna(correlation_value):
                 st.subheader(f"Correlação entre {indicator1_name} e {indicator2_name}")
-                st.metric(label="Coeficiente de Correlação (Pearson)", value=f"{correlation:.3f}")
-                fig_corr = px.scatter(df_merged, x=col_name1, y=col_name2, title=f"{indicator1_name} vs {indicator2_name}", labels={col_name1: indicator1_name, col_name2: indicator2_name}, trendline="ols")
+                st.metric(label=f"Coeficiente de Correlação ({corr_method}, base mensal)", value=f"{correlation_value:.3f}")
+                st.caption(f"{int(corr_results['observacoes'].loc[col_name1, col_name2])} meses com os dois indicadores no período.")
+                df_pair = corr_results["painel"][["data_referencia", col_name1, col_name2]].dropna()
+                fig_corr = px.scatter(df_pair, x=col_name1, y=col_name2, title=f"{indicator1_name} vs {indicator2_name}", labels={col_name1: indicator1_name, col_name2: indicator2_name})
+                # Reta de mínimos quadrados com NumPy (sem o ajuste do statsmodels a cada troca de indicador)
+                slope, intercept = np.polyfit(df_pair[col_name1], df_pair[col_name2], 1)
+                x_line = np.array([df_pair[col_name1].min(), df_pair[col_name1].max()])
+                fig_corr.add_trace(go.Scatter(x=x_line, y=slope * x_line + intercept, mode="lines", name="Tendência (MQO)"))
                 st.plotly_chart(fig_corr, use_container_width=True)
-            elif len(df_merged) <= 1:
-                 st.warning(f"Não há dados suficientes em comum entre '{indicator1_name}' e '{indicator2_name}' no período selecionado para calcular a correlação.")
+
+                df_rolling = correlation.pair_rolling(corr_results["rolling"], col_name1, col_name2)
+                if not df_rolling.empty:
+                    fig_rolling = px.line(df_rolling, x="data_referencia", y="correlacao", title=f"Correlação Móvel ({correlation.ROLLING_WINDOW} meses, Pearson)", labels={"data_referencia": "Data", "correlacao": "Correlação"})
+                    fig_rolling.update_yaxes(range=[-1, 1])
+                    st.plotly_chart(fig_rolling, use_container_width=True)
             else:
-                st.warning(f"Não foi possível encontrar datas em comum entre '{indicator1_name}' e '{indicator2_name}' no período selecionado.")
+                 st.warning(f"Não há dados suficientes em comum entre '{indicator1_name}' e '{indicator2_name}' no período selecionado para calcular a correlação.")
 else:
     st.warning("Dados insuficientes para análise de correlação. Verifique os filtros ou a disponibilidade dos dados.")
 
 # --- Forecasting Section ---
 st.header("Previsão de Indicadores")
 
-indicator_options_forecast = {
-    "Selic": (df_selic_orig, "selic"),
-    "IPCA": (df_ipca_orig, "ipca"),
-    "Câmbio": (df_cambio_orig, "cambio"),
-    "Desemprego": (df_desemprego_orig, "desemprego"),
-    "PIB": (df_pib_orig, "pib")
-}
+# A previsão usa o histórico completo, carregado apenas quando necessário
+indicator_options_forecast = {entry["nome"]: indicador for indicador, entry in DASHBOARD_INDICATORS.items()}
 
 selected_indicator_forecast_name = st.selectbox(
     "Selecione o indicador para previsão:",
@@ -267,81 +632,114 @@ selected_indicator_forecast_name = st.selectbox(
     key="forecast_indicator"
 )
 
-forecast_periods = st.number_input("Período de previsão (dias):", min_value=30, max_value=730, value=365, step=30, key="forecast_days")
+# Apenas os horizontes pré-calculados pelo job em lote (FORECAST_HORIZONS), para que fetch_stored_forecast os encontre
+forecast_horizons = sorted(set(forecasting.FORECAST_HORIZONS) | {forecasting.DEFAULT_FORECAST_PERIODS})
+forecast_periods = st.selectbox("Período de previsão (dias):", forecast_horizons, index=forecast_horizons.index(forecasting.DEFAULT_FORECAST_PERIODS), key="forecast_days")
+
+engine_names = list(forecasting.FORECAST_ENGINES.keys())
+default_engine_index = list(forecasting.FORECAST_ENGINES.values()).index(forecasting.DEFAULT_FORECAST_ENGINE) if forecasting.DEFAULT_FORECAST_ENGINE in forecasting.FORECAST_ENGINES.values() else 0
+selected_engine_name = st.selectbox("Modelo de previsão:", engine_names, index=default_engine_index, key="forecast_engine")
+forecast_engine = forecasting.FORECAST_ENGINES[selected_engine_name]
+
+# O Prophet (e o Stan) só é carregado quando escolhido
+if FORECAST_PREWARM and forecast_engine == "prophet":
+    prewarm_forecasts_once(tuple(zip(df_ultimos["indicador"], df_ultimos["data_referencia"].astype(str))))
 
 if st.button("Gerar Previsão", key="generate_forecast_button"):
-    df_to_forecast_orig, y_col_name = indicator_options_forecast[selected_indicator_forecast_name]
+    y_col_name = indicator_options_forecast[selected_indicator_forecast_name]
+    df_to_forecast_orig = load_histories()[y_col_name]
     
     if df_to_forecast_orig.empty or not pd.api.types.is_datetime64_any_dtype(df_to_forecast_orig["data_referencia"]):
         st.error(f"Dados insuficientes ou formato de data inválido para {selected_indicator_forecast_name}.")
     else:
-        df_prophet = df_to_forecast_orig[["data_referencia", y_col_name]].copy()
-        df_prophet.rename(columns={"data_referencia": "ds", y_col_name: "y"}, inplace=True)
-        df_prophet = df_prophet.dropna(subset=["ds", "y"])
-        df_prophet = df_prophet.sort_values(by="ds")
+        df_prophet = forecasting.prepare_prophet_frame(df_to_forecast_orig, "data_referencia", y_col_name)
 
         if len(df_prophet) < 2:
             st.error(f"Não há dados suficientes para treinar o modelo de previsão para {selected_indicator_forecast_name} (mínimo 2 pontos).")
         else:
             try:
-                with st.spinner(f"Treinando modelo e gerando previsão para {selected_indicator_forecast_name}..."):
-                    model = Prophet()
-                    model.fit(df_prophet)
-                    future = model.make_future_dataframe(periods=forecast_periods)
-                    forecast = model.predict(future)
-
-                st.subheader(f"Previsão para {selected_indicator_forecast_name}")
-                fig_forecast = plot_plotly(model, forecast)
-                fig_forecast.update_layout(title=f"Previsão de {selected_indicator_forecast_name} para os próximos {forecast_periods} dias", xaxis_title="Data", yaxis_title="Valor")
-                st.plotly_chart(fig_forecast, use_container_width=True)
-
-                st.subheader(f"Componentes da Previsão para {selected_indicator_forecast_name}")
-                fig_components = plot_components_plotly(model, forecast)
-                # Tentar traduzir os eixos dos subplots
-                for i in range(1, 10): # Tentar para um número razoável de possíveis subplots
-                    if hasattr(fig_components.layout, f"xaxis{i}"):
-                        fig_components.layout[f"xaxis{i}"].title.text = "Data"
-                    if hasattr(fig_components.layout, f"yaxis{i}"):
-                        fig_components.layout[f"yaxis{i}"].title.text = "Valor"
-                # Caso o primeiro eixo não tenha número (ex: xaxis, yaxis)
-                if hasattr(fig_components.layout, "xaxis") and fig_components.layout.xaxis.title.text:
-                    fig_components.layout.xaxis.title.text = "Data"
-                if hasattr(fig_components.layout, "yaxis") and fig_components.layout.yaxis.title.text:
-                    fig_components.layout.yaxis.title.text = "Valor"
-
-                st.plotly_chart(fig_components, use_container_width=True)
-                st.subheader("Dados da Previsão")
-                forecast_display = forecast[["ds", "yhat", "yhat_lower", "yhat_upper"]].tail(forecast_periods).copy()
-                forecast_display.rename(columns={
-                    "ds": "Data",
-                    "yhat": "Previsão",
-                    "yhat_lower": "Previsão Inferior",
-                    "yhat_upper": "Previsão Superior"
-                }, inplace=True)
-                st.dataframe(forecast_display)
+                cache_key = forecasting.make_cache_key(selected_indicator_forecast_name, df_prophet, forecast_periods, forecast_engine)
+                model, forecast = None, None
+                cached = get_forecast_cache().get(cache_key)
+                if cached is None and forecast_engine != "prophet":
+                    # Modelos rápidos rodam na própria requisição, sem esperar a fila de treino do Prophet
+                    with st.spinner(f"Gerando previsão para {selected_indicator_forecast_name} ({selected_engine_name})..."):
+                        cached = forecasting.fit_and_predict(df_prophet, forecast_periods, forecast_engine)
+                        get_forecast_cache().put(cache_key, *cached)
+                if cached is None:
+                    # Previsão pré-calculada pelo job em lote, válida se foi gerada com os mesmos dados
+                    stored = fetch_stored_forecast(selected_indicator_forecast_name, forecast_periods)
+                    if not stored.empty and (stored["hash_dados"] == cache_key[1]).all():
+                        forecast = stored
+                if cached is None and forecast is None:
+                    # Treino em segundo plano; a sessão espera no máximo FORECAST_WAIT_SECONDS
+                    future_result = get_forecast_trainer().submit(cache_key, df_prophet, forecast_periods)
+                    with st.spinner(f"Treinando modelo e gerando previsão para {selected_indicator_forecast_name}..."):
+                        try:
+                            cached = future_result.result(timeout=FORECAST_WAIT_SECONDS)
+                        except FuturesTimeoutError:
+                            cached = None
+                if cached is not None:
+                    model, forecast = cached
+                if forecast is None:
+                    st.info(f"A previsão para {selected_indicator_forecast_name} ainda está sendo treinada em segundo plano. Clique em \"Gerar Previsão\" novamente em alguns instantes.")
+                else:
+                    st.subheader(f"Previsão para {selected_indicator_forecast_name}")
+                    if model is not None:
+                        from prophet.plot import plot_plotly
+                        fig_forecast = plot_plotly(model, forecast)
+                    else:
+                        fig_forecast = plot_forecast_frame(df_prophet, forecast)
+                    fig_forecast.update_layout(title=f"Previsão de {selected_indicator_forecast_name} para os próximos {forecast_periods} dias", xaxis_title="Data", yaxis_title="Valor")
+                    st.plotly_chart(fig_forecast, use_container_width=True)
+
+                    # Os componentes dependem do modelo ajustado, que não é guardado pelo job em lote
+                    if model is not None:
+                        st.subheader(f"Componentes da Previsão para {selected_indicator_forecast_name}")
+                        from prophet.plot import plot_components_plotly
+                        fig_components = plot_components_plotly(model, forecast)
+                        # Tentar traduzir os eixos dos subplots
+                        for i in range(1, 10): # Tentar para um número razoável de possíveis subplots
+                            if hasattr(fig_components.layout, f"xaxis{i}"):
+                                fig_components.layout[f"xaxis{i}"].title.text = "Data"
+                            if hasattr(fig_components.layout, f"yaxis{i}"):
+                                fig_components.layout[f"yaxis{i}"].title.text = "Valor"
+                        # Caso o primeiro eixo não tenha número (ex: xaxis, yaxis)
+                        if hasattr(fig_components.layout, "xaxis") and fig_components.layout.xaxis.title.text:
+                            fig_components.layout.xaxis.title.text = "Data"
+                        if hasattr(fig_components.layout, "yaxis") and fig_components.layout.yaxis.title.text:
+                            fig_components.layout.yaxis.title.text = "Valor"
+
+                        st.plotly_chart(fig_components, use_container_width=True)
+                    st.subheader("Dados da Previsão")
+                    forecast_display = forecast[["ds", "yhat", "yhat_lower", "yhat_upper"]].tail(forecast_periods).copy()
+                    forecast_display.rename(columns={
+                        "ds": "Data",
+                        "yhat": "Previsão",
+                        "yhat_lower": "Previsão Inferior",
+                        "yhat_upper": "Previsão Superior"
+                    }, inplace=True)
+                    st.dataframe(forecast_display)
 
             except Exception as e:
                 st.error(f"Erro ao gerar previsão para {selected_indicator_forecast_name}: {e}")
-                print(f"Erro Prophet para {selected_indicator_forecast_name}: {e}")
+                print(f"Erro na previsão ({forecast_engine}) para {selected_indicator_forecast_name}: {e}")
 
 st.markdown("--- ")
 st.markdown(f"_Dados atualizados até onde disponíveis nas fontes originais. Última verificação: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}_ ")
 
+# --- Connection Pool Diagnostics ---
+if DATA_SOURCE != "local":
+    with st.expander("Diagnóstico do pool de conexões"):
+        st.caption("Retiradas, tempo de espera por uma conexão e reconexões desde o início do servidor (para dimensionar DB_POOL_MAX).")
+        st.json(get_db_pool().stats())
+
 # --- Display Raw Data (Filtered) ---
 with st.expander(f"Ver dados brutos transformados ({filter_label})"):
-    show_selic = st.checkbox("Mostrar Dados Selic", value=False, key="cb_selic")
-    if show_selic and not df_selic_filtered.empty: st.dataframe(df_selic_filtered)
-    elif show_selic: st.write("Sem dados de Selic para o período.")
-    show_ipca = st.checkbox("Mostrar Dados IPCA", value=False, key="cb_ipca")
-    if show_ipca and not df_ipca_filtered.empty: st.dataframe(df_ipca_filtered)
-    elif show_ipca: st.write("Sem dados de IPCA para o período.")
-    show_cambio = st.checkbox("Mostrar Dados Câmbio", value=False, key="cb_cambio")
-    if show_cambio and not df_cambio_filtered.empty: st.dataframe(df_cambio_filtered)
-    elif show_cambio: st.write("Sem dados de Câmbio para o período.")
-    show_desemprego = st.checkbox("Mostrar Dados Desemprego", value=False, key="cb_desemprego")
-    if show_desemprego and not df_desemprego_filtered.empty: st.dataframe(df_desemprego_filtered)
-    elif show_desemprego: st.write("Sem dados de Desemprego para o período.")
-    show_pib = st.checkbox("Mostrar Dados PIB", value=False, key="cb_pib")
-    if show_pib and not df_pib_filtered.empty: st.dataframe(df_pib_filtered)
-    elif show_pib: st.write("Sem dados de PIB para o período.")
+    for indicador, entry in DASHBOARD_INDICATORS.items():
+        show_raw = st.checkbox(f"Mostrar Dados {entry['nome']}", value=False, key=f"cb_{indicador}")
+        if show_raw and not filtered_frames[indicador].empty: st.dataframe(filtered_frames[indicador])
+        elif show_raw: st.write(f"Sem dados de {entry['nome']} para o período.")
 
+# Métricas da execução (consultas, cache, previsões) no formato do Prometheus
+metrics.export()
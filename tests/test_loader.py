@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+import load_all_data_to_supabase_normalized_v2 as loader
+
+
+def month_chunks(records):
+    chunks = list(loader.iter_month_chunks(loader.iter_normalized_chunks("selic", records)))
+    months = [month for rows in chunks for month in loader.compute_month_fingerprints(rows)[0]]
+    hashes = {}
+    for rows in chunks:
+        hashes.update(loader.compute_month_fingerprints(rows)[1])
+    return months, hashes
+
+
+def test_unsorted_input_keeps_each_month_in_one_chunk():
+    records = [
+        {"data": "15/02/2024", "valor": "2.0"},
+        {"data": "01/01/2024", "valor": "1.0"},
+        {"data": "01/02/2024", "valor": "3.0"},
+        {"data": "31/01/2024", "valor": "4.0"},
+        {"data": "01/03/2024", "valor": "5.0"},
+    ]
+    sorted_records = sorted(records, key=lambda record: record["data"][6:] + record["data"][3:5] + record["data"][:2])
+
+    months, hashes = month_chunks(records)
+
+    assert sorted(months) == ["2024-01", "2024-02", "2024-03"]
+    assert len(months) == len(set(months))
+    assert hashes == month_chunks(sorted_records)[1]
+
+
+def test_unsorted_chunks_are_cut_at_month_boundaries():
+    chunks = [
+        [("2024-01-20", 2.0), ("2024-02-01", 3.0), ("2024-01-05", 1.0)],
+        [("2024-02-10", 4.0), ("2024-03-01", 5.0)],
+    ]
+
+    cut = list(loader.iter_month_chunks(chunks))
+
+    assert cut == [
+        [("2024-01-05", 1.0), ("2024-01-20", 2.0)],
+        [("2024-02-01", 3.0), ("2024-02-10", 4.0)],
+        [("2024-03-01", 5.0)],
+    ]
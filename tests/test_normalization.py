@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+import normalization
+
+
+def test_out_of_range_date_is_rejected_and_other_rows_load():
+    records = [
+        {"data": "01/01/2000", "valor": "1.5"},
+        {"data": "31/12/9999", "valor": "2.0"},
+        {"data": "02/01/2000", "valor": "3.0"},
+    ]
+
+    valid, rejected, detected_format = normalization.normalize_records(records)
+
+    assert detected_format == "%d/%m/%Y"
+    assert valid["data"].tolist() == ["2000-01-01", "2000-01-02"]
+    assert valid["valor"].tolist() == [1.5, 3.0]
+    assert rejected["data_original"].tolist() == ["31/12/9999"]
+    assert rejected["motivo"].tolist() == ["data inválida"]